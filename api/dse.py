@@ -1,53 +1,114 @@
 
 
-from typing import Any, Dict, Optional
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 
-from services.stock_service import StockDataService
-from utils.response import api_response
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
+from models.schemas import DSEBatchRequest, DSEQuery
+from services.dse_layout import LayoutError
+from services.intraday import intraday_store
+from services.stock_service import stock_service
+from utils.response import json_response
+from utils.snapshot import snapshot_response
 
-router = APIRouter(prefix="/dse", tags=["dse"])
 
-stock_service = StockDataService()
+router = APIRouter(prefix="/dse", tags=["dse"])
 
 
-@router.get("/latest")
-async def get_stock_data():
-    """Get latest stock data"""
+async def _page_response(request: Request, kind: str, *args):
+    """Cached snapshot of a DSE page, with a broken page layout reported as a bad gateway"""
     try:
-        data = await stock_service.get_stock_data()
-        return api_response(data)
+        snapshot = await stock_service.get_snapshot(kind, *args)
+        return await snapshot_response(snapshot, request)
+    except LayoutError as e:
+        raise HTTPException(status_code=502, detail=f"Unexpected DSE page layout: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/latest")
+async def get_stock_data(request: Request):
+    """Get latest stock data"""
+    return await _page_response(request, "latest")
+
+
 @router.get("/dsexdata")
-async def get_dsex_data(symbol: Optional[str] = Query(None, description="Stock symbol to filter")):
+async def get_dsex_data(request: Request, symbol: Optional[str] = Query(None, description="Stock symbol to filter")):
     """Get DSEX data with optional symbol filter"""
-    try:
-        data = await stock_service.get_dsex_data(symbol)
-        return api_response(data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _page_response(request, "dsex", symbol)
+
 
 @router.get("/top30")
-async def get_top30():
+async def get_top30(request: Request):
     """Get top 30 stocks data"""
-    try:
-        data = await stock_service.get_top30()
-        return api_response(data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _page_response(request, "top30")
+
 
 @router.get("/historical")
 async def get_historical_data(
+    request: Request,
     startDate: str = Query(..., description="Start date"),
     endDate: str = Query(..., description="End date"),
     inst: str = Query("All Instrument", description="Trading code")
 ):
     """Get historical stock data"""
+    return await _page_response(request, "historical", startDate, endDate, inst)
+
+
+@router.get("/intraday/{symbol}")
+async def get_intraday(symbol: str, interval: str = Query("1m", description="Bar interval, e.g. 1m or 5m")):
+    """Get today's LTP/volume samples and OHLC bars for one trading code"""
+    if interval not in intraday_store.intervals:
+        raise HTTPException(status_code=422, detail=f"interval must be one of {list(intraday_store.intervals)}")
+    series = intraday_store.series(symbol)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No intraday data for {symbol.upper()}")
+    return json_response({
+        "symbol": symbol.upper(),
+        "date": intraday_store.day.isoformat(),
+        "interval": interval,
+        "series": series,
+        "bars": intraday_store.bars(symbol, interval)
+    })
+
+
+def _snapshot_args(query: DSEQuery) -> Tuple:
+    if query.kind == "dsex":
+        return ("dsex", query.symbol)
+    if query.kind == "historical":
+        return ("historical", query.startDate, query.endDate, query.inst)
+    return (query.kind,)
+
+
+async def _run_query(index: int, query: DSEQuery) -> bytes:
+    """One NDJSON line embedding the query's cached response envelope"""
+    head = orjson.dumps({"index": index, "query": query.model_dump(exclude_none=True)})[:-1]
     try:
-        data = await stock_service.get_historical_data(startDate, endDate, inst)
-        return api_response(data)
+        snapshot = await stock_service.get_snapshot(*_snapshot_args(query))
+        result = snapshot.body
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        result = orjson.dumps({"success": False, "error": str(e)})
+    return head + b',"result":' + result + b'}\n'
+
+
+async def _stream_batch(queries: List[DSEQuery]) -> AsyncIterator[bytes]:
+    tasks = [asyncio.ensure_future(_run_query(index, query)) for index, query in enumerate(queries)]
+    try:
+        for next_line in asyncio.as_completed(tasks):
+            yield await next_line
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/batch")
+async def get_batch(batch: DSEBatchRequest):
+    """Run several DSE queries concurrently, streaming one NDJSON line per query as it completes.
+
+    Queries for the same page share one upstream fetch. Lines arrive in
+    completion order; each carries the query's index in the request.
+    """
+    return StreamingResponse(_stream_batch(batch.queries), media_type="application/x-ndjson")
@@ -1,65 +1,130 @@
-from fastapi import APIRouter, HTTPException, Query
-from auth.oauth import GoogleOAuthManager
-from services.email_service import GmailService
-from models.schemas import EmailsResponse, ErrorResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from auth.oauth import GoogleOAuthManager, get_oauth_manager
+from services.email_service import GmailAPIError, GmailService
+from services.sentiment_service import SentimentService
+from services.stock_service import stock_service
+from models.schemas import EmailsResponse, ErrorResponse, SentimentResponse
+from utils.email_cache import email_cache
+from utils.rate_limiter import gmail_limiter
+from utils.response import json_response, model_response
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
-oauth_manager = GoogleOAuthManager()
+sentiment_service = SentimentService()
 
 
 @router.get("", response_model=EmailsResponse)
 async def get_emails(
+    request: Request,
     user_email: str = Query(..., description="User email address"),
-    max_results: int = Query(10, ge=1, le=100, description="Maximum number of emails to return")
+    max_results: int = Query(10, ge=1, le=100, description="Maximum number of emails to return"),
+    oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)
 ):
     """
     Fetch recent emails using stored token for user
     """
     try:
         # Get stored token for user
-        token_data = oauth_manager.get_stored_token(user_email)
+        token_data = await run_in_threadpool(oauth_manager.get_stored_token, user_email)
         if not token_data:
             raise HTTPException(
                 status_code=401, 
                 detail=f"No valid token found for user {user_email}. Please authenticate first."
             )
         
-        gmail_service = GmailService(token_data)
-        emails = gmail_service.get_recent_emails(max_results=max_results)
+        # Building the client imports the discovery client and reads its document, so not on the event loop
+        gmail_service = await run_in_threadpool(GmailService, token_data, cache=email_cache, user_email=user_email)
+        emails = await run_in_threadpool(gmail_service.get_recent_emails, max_results=max_results)
         
-        return EmailsResponse(emails=emails, count=len(emails))
+        return await model_response(EmailsResponse(emails=emails, count=len(emails)), request)
         
     except HTTPException:
         raise
+    except GmailAPIError as e:
+        status_code = 429 if e.status_code == 429 else 502
+        raise HTTPException(status_code=status_code, detail=f"Failed to fetch emails: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch emails: {str(e)}")
 
 
 @router.get("/search", response_model=EmailsResponse)
 async def search_emails(
+    request: Request,
     user_email: str = Query(..., description="User email address"),
     query: str = Query(..., description="Gmail search query"),
-    max_results: int = Query(10, ge=1, le=100, description="Maximum number of emails to return")
+    max_results: int = Query(10, ge=1, le=100, description="Maximum number of emails to return"),
+    oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)
 ):
     """
     Search emails using Gmail query syntax with stored token
     """
     try:
         # Get stored token for user
-        token_data = oauth_manager.get_stored_token(user_email)
+        token_data = await run_in_threadpool(oauth_manager.get_stored_token, user_email)
         if not token_data:
             raise HTTPException(
                 status_code=401, 
                 detail=f"No valid token found for user {user_email}. Please authenticate first."
             )
         
-        gmail_service = GmailService(token_data)
-        emails = gmail_service.search_emails(query=query, max_results=max_results)
+        gmail_service = await run_in_threadpool(GmailService, token_data, cache=email_cache, user_email=user_email)
+        emails = await run_in_threadpool(gmail_service.search_emails, query=query, max_results=max_results)
         
-        return EmailsResponse(emails=emails, count=len(emails))
+        return await model_response(EmailsResponse(emails=emails, count=len(emails)), request)
         
     except HTTPException:
         raise
+    except GmailAPIError as e:
+        status_code = 429 if e.status_code == 429 else 502
+        raise HTTPException(status_code=status_code, detail=f"Failed to search emails: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to search emails: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to search emails: {str(e)}")
+
+
+@router.get("/sentiment", response_model=SentimentResponse)
+async def get_email_sentiment(
+    request: Request,
+    user_email: str = Query(..., description="User email address"),
+    query: str = Query(None, description="Optional Gmail search query, defaults to inbox"),
+    max_results: int = Query(10, ge=1, le=100, description="Maximum number of emails to return"),
+    oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)
+):
+    """
+    Fetch emails and score their sentiment, tagging mentioned DSE trading codes
+    """
+    try:
+        # Get stored token for user
+        token_data = await run_in_threadpool(oauth_manager.get_stored_token, user_email)
+        if not token_data:
+            raise HTTPException(
+                status_code=401, 
+                detail=f"No valid token found for user {user_email}. Please authenticate first."
+            )
+        
+        gmail_service = await run_in_threadpool(GmailService, token_data, cache=email_cache, user_email=user_email)
+        if query:
+            emails = await run_in_threadpool(gmail_service.search_emails, query=query, max_results=max_results)
+        else:
+            emails = await run_in_threadpool(gmail_service.get_recent_emails, max_results=max_results)
+        
+        await sentiment_service.refresh_symbols(stock_service)
+        scored = await run_in_threadpool(sentiment_service.score_emails, emails)
+        
+        return await model_response(SentimentResponse(emails=scored, count=len(scored)), request)
+        
+    except HTTPException:
+        raise
+    except GmailAPIError as e:
+        status_code = 429 if e.status_code == 429 else 502
+        raise HTTPException(status_code=status_code, detail=f"Failed to score emails: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to score emails: {str(e)}")
+
+
+@router.get("/quota")
+async def get_quota():
+    """
+    Remaining Gmail quota budget and call/retry counters
+    """
+    return json_response(gmail_limiter.metrics())
@@ -0,0 +1,83 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from api.emails import sentiment_service
+from services.intraday import intraday_store
+from services.stock_service import stock_service
+from utils.email_cache import email_cache
+from utils.metrics import metrics
+from utils.rate_limiter import gmail_limiter
+
+
+router = APIRouter(tags=["metrics"])
+
+
+def _hit_ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+def collect_cache_hit_ratio():
+    email_stats = email_cache.stats()
+    sentiment_stats = sentiment_service.stats()
+    yield {"cache": "email"}, email_stats["hit_rate"]
+    yield {"cache": "sentiment"}, sentiment_stats["hit_rate"]
+    yield {"cache": "dse_snapshot"}, _hit_ratio(stock_service.snapshot_hits, stock_service.snapshot_misses)
+
+
+def collect_cache_entries():
+    yield {"cache": "email"}, len(email_cache)
+    yield {"cache": "sentiment"}, sentiment_service.stats()["entries"]
+    entries = stock_service.cache_entries()
+    yield {"cache": "dse_snapshot"}, entries["pages"]
+    yield {"cache": "dse_symbol_snapshot"}, entries["symbols"]
+
+
+def collect_dse_snapshot_lookups():
+    yield {"outcome": "hit"}, stock_service.snapshot_hits
+    yield {"outcome": "miss"}, stock_service.snapshot_misses
+    yield {"outcome": "shared"}, stock_service.snapshot_shared
+
+
+def collect_email_cache_bytes():
+    yield {}, email_cache.stats()["memory_bytes"]
+
+
+def collect_intraday_memory():
+    yield {}, intraday_store.nbytes
+
+
+def collect_gmail_quota_remaining():
+    quota = gmail_limiter.metrics()
+    yield {"bucket": "global"}, quota["global_remaining_units"]
+    # Aggregated across users: email addresses must not become label values
+    yield {"bucket": "user_min"}, quota["user_remaining_units"]["min"]
+    yield {"bucket": "user_avg"}, quota["user_remaining_units"]["avg"]
+
+
+metrics.gauge_collector("cache_hit_ratio", "Cache hit ratio since start", collect_cache_hit_ratio)
+metrics.gauge_collector("cache_entries", "Entries held per cache", collect_cache_entries)
+metrics.counter_collector("dse_snapshot_lookups_total",
+                          "DSE snapshot lookups by outcome; shared joined a fetch in flight",
+                          collect_dse_snapshot_lookups)
+metrics.gauge_collector("email_cache_memory_bytes", "Approximate size of cached messages",
+                        collect_email_cache_bytes)
+metrics.gauge_collector("intraday_memory_bytes", "Preallocated ring buffer memory of intraday series",
+                        collect_intraday_memory)
+metrics.gauge_collector("gmail_quota_remaining_units", "Remaining Gmail quota units per bucket",
+                        collect_gmail_quota_remaining)
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in text exposition format"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    if metrics.shared_dir is None:
+        content = metrics.render()
+    else:
+        # Merging every worker's file is disk I/O; the samples are still read on the loop
+        content = await asyncio.to_thread(metrics.render, metrics.dump())
+    return Response(content=content, media_type="text/plain; version=0.0.4; charset=utf-8")
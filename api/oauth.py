@@ -1,15 +1,21 @@
-from fastapi import APIRouter, HTTPException, Query
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from auth.oauth import GoogleOAuthManager
+from auth.oauth import GoogleOAuthManager, get_oauth_manager
 from models.schemas import AuthUrlResponse, ErrorResponse
 
 router = APIRouter(prefix="/oauth", tags=["oauth"])
 
-oauth_manager = GoogleOAuthManager()
+logger = logging.getLogger(__name__)
 
 
 @router.get("/login")
-async def get_login_url(user_email: str = Query(None, description="User email address")):
+async def get_login_url(
+    user_email: str = Query(None, description="User email address"),
+    oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)
+):
     """
     Check if user has valid token, if not generate Google OAuth login URL
     """
@@ -26,7 +32,7 @@ async def get_login_url(user_email: str = Query(None, description="User email ad
             )
         
         # Check if user already has a valid token
-        if oauth_manager.user_has_token(user_email):
+        if await run_in_threadpool(oauth_manager.user_has_token, user_email):
             return JSONResponse(
                 content={
                     "message": "User already authenticated",
@@ -52,17 +58,16 @@ async def get_login_url(user_email: str = Query(None, description="User email ad
 @router.get("/callback")
 async def oauth_callback(
     code: str = Query(..., description="Authorization code from Google"),
-    state: str = Query(None, description="State parameter for CSRF protection")
+    state: str = Query(None, description="State parameter for CSRF protection"),
+    oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)
 ):
-    print(f"OAuth callback received with code: {code}, state: {state}")
     """
     Handle OAuth callback, store token, and return success message
     """
+    logger.info("oauth callback received state=%s", state)
     try:
         # Exchange code for token
         token_data = oauth_manager.exchange_code_for_token(code)
-
-        print(token_data)
         
         # Get user email from token data
         user_email = token_data.get('user_email')
@@ -71,6 +76,7 @@ async def oauth_callback(
         
         # Save token to file storage
         oauth_manager.save_user_token(user_email, token_data)
+        logger.info("oauth token stored user=%s", user_email)
         
         return JSONResponse(
             content={
@@ -81,17 +87,17 @@ async def oauth_callback(
         )
         
     except Exception as e:
-        print(e)
+        logger.warning("oauth callback failed error=%s", e)
         raise HTTPException(status_code=400, detail=f"OAuth callback failed: {str(e)}")
 
 
 @router.get("/token/{user_email}")
-async def get_user_token(user_email: str):
+async def get_user_token(user_email: str, oauth_manager: GoogleOAuthManager = Depends(get_oauth_manager)):
     """
     Get stored token for user (for debugging purposes)
     """
     try:
-        token_data = oauth_manager.get_stored_token(user_email)
+        token_data = await run_in_threadpool(oauth_manager.get_stored_token, user_email)
         if token_data:
             # Remove sensitive data for response
             safe_token_data = {
@@ -0,0 +1,76 @@
+"""End-of-day DSE archive.
+
+    python archive.py run                      # scheduler: archive each trading day after close
+    python archive.py once                     # archive pending days now, then exit
+    python archive.py backfill --start 2024-01-01 --end 2024-01-31
+    python archive.py show 2024-01-02 --table latest
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import date
+
+from config import ARCHIVE_CONFIG
+from services.archive_service import ArchiveService
+from services.stock_service import StockDataService
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    """Run a scheduler command; returns the process exit status"""
+    stock_service = StockDataService()
+    archive_service = ArchiveService(stock_service, root=args.dir)
+    try:
+        if args.command == "run":
+            await archive_service.run_forever(args.interval)
+        elif args.command == "once":
+            results = await archive_service.run_once()
+            print(json.dumps({day.isoformat(): written for day, written in results.items()}))
+        else:
+            results, failed = await archive_service.backfill(date.fromisoformat(args.start),
+                                                             date.fromisoformat(args.end))
+            print(json.dumps({day.isoformat(): written for day, written in results.items()}))
+            if failed:
+                print(f"failed: {' '.join(day.isoformat() for day in failed)}", file=sys.stderr)
+                return 1
+    finally:
+        await stock_service.close()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=ARCHIVE_CONFIG["DIR"], help="Archive root directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the scheduler until interrupted")
+    run.add_argument("--interval", type=float, default=ARCHIVE_CONFIG["CHECK_INTERVAL"])
+    commands.add_parser("once", help="Archive pending days and exit")
+    backfill = commands.add_parser("backfill", help="Archive a date range")
+    backfill.add_argument("--start", required=True, help="YYYY-MM-DD")
+    backfill.add_argument("--end", required=True, help="YYYY-MM-DD")
+    show = commands.add_parser("show", help="Print an archived day as JSON lines")
+    show.add_argument("date", help="YYYY-MM-DD")
+    show.add_argument("--table", default="historical", choices=["historical", "latest"])
+
+    args = parser.parse_args()
+    if args.command == "show":
+        archive_service = ArchiveService(None, root=args.dir)
+        for row in archive_service.read(date.fromisoformat(args.date), args.table):
+            print(json.dumps(row))
+        return
+    try:
+        sys.exit(asyncio.run(_run(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,67 @@
 import os
+import asyncio
 import json
-from typing import Dict, Any, Optional
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, Optional
+from config import TOKEN_REFRESH_CONFIG
 from utils.token_storage import TokenStorage
+from utils.email_cache import email_cache
+from utils.metrics import token_refresh_seconds
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+# The google-auth and googleapiclient stacks take a few hundred milliseconds
+# to import, so they are loaded on first use rather than with the app.
+
+
+def load_credentials(token_data: Dict[str, Any]) -> "Credentials":
+    """Build Google credentials from stored token data"""
+    from google.oauth2.credentials import Credentials
+    return Credentials.from_authorized_user_info(token_data)
+
+
+def refresh_credentials(credentials: "Credentials") -> None:
+    """Refresh credentials in place, recording refresh latency"""
+    from google.auth.transport.requests import Request
+
+    started = time.perf_counter()
+    try:
+        credentials.refresh(Request())
+    except Exception:
+        token_refresh_seconds.observe(time.perf_counter() - started, "error")
+        raise
+    token_refresh_seconds.observe(time.perf_counter() - started, "ok")
+
+
+def token_data_from_credentials(credentials: "Credentials") -> Dict[str, Any]:
+    """Token data to store for credentials, including expiry so it is only refreshed when due"""
+    token_data = {
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'scopes': credentials.scopes
+    }
+    if credentials.expiry:
+        # Same format google-auth writes and reads back (naive UTC)
+        token_data['expiry'] = credentials.expiry.isoformat() + "Z"
+    return token_data
+
+
+def expires_within(token_data: Dict[str, Any], seconds: float) -> bool:
+    """Whether a stored token expires within seconds; tokens saved without expiry always do"""
+    expiry = token_data.get('expiry')
+    if not expiry:
+        return True
+    expires_at = datetime.strptime(expiry.rstrip("Z").split(".")[0], "%Y-%m-%dT%H:%M:%S")
+    return expires_at - datetime.now(timezone.utc).replace(tzinfo=None) < timedelta(seconds=seconds)
 
 
 class GoogleOAuthManager:
@@ -15,23 +71,34 @@ class GoogleOAuthManager:
         self.client_secret_file = client_secret_file
         self.redirect_uri = os.getenv('GOOGLE_REDIRECT_URI', 'https://dsetunnel.4nik.com/oauth/callback')
         self.token_storage = TokenStorage()
-        
-        # Load client configuration from file
+        self._client_config: Optional[Dict[str, Any]] = None
+
+    @property
+    def client_config(self) -> Dict[str, Any]:
+        """Client configuration, read from the secret file on first use"""
+        if self._client_config is None:
+            self._client_config = self._load_client_config()
+        return self._client_config
+
+    def _load_client_config(self) -> Dict[str, Any]:
         try:
             with open(self.client_secret_file, 'r') as f:
-                self.client_config = json.load(f)
+                client_config = json.load(f)
         except FileNotFoundError:
             raise ValueError(f"Client secret file not found: {self.client_secret_file}")
         except json.JSONDecodeError:
             raise ValueError(f"Invalid JSON in client secret file: {self.client_secret_file}")
         
         # Update redirect URI in config
-        if "web" in self.client_config:
-            self.client_config["web"]["redirect_uris"] = [self.redirect_uri]
+        if "web" in client_config:
+            client_config["web"]["redirect_uris"] = [self.redirect_uri]
         else:
             raise ValueError("Invalid client secret file format: missing 'web' section")
+        return client_config
     
     def get_authorization_url(self) -> str:
+        from google_auth_oauthlib.flow import Flow
+
         flow = Flow.from_client_config(
             self.client_config,
             scopes=self.SCOPES,
@@ -47,6 +114,9 @@ class GoogleOAuthManager:
         return auth_url
     
     def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
+        from google_auth_oauthlib.flow import Flow
+        from googleapiclient.discovery import build
+
         flow = Flow.from_client_config(
             self.client_config,
             scopes=self.SCOPES,
@@ -65,63 +135,48 @@ class GoogleOAuthManager:
         except Exception as e:
             raise ValueError(f"Failed to get user email: {str(e)}")
         
-        token_data = {
-            'token': credentials.token,
-            'refresh_token': credentials.refresh_token,
-            'token_uri': credentials.token_uri,
-            'client_id': credentials.client_id,
-            'client_secret': credentials.client_secret,
-            'scopes': credentials.scopes,
-            'user_email': user_email
-        }
-        
-        return token_data
+        return {**token_data_from_credentials(credentials), 'user_email': user_email}
     
     def validate_token(self, token_data: Dict[str, Any]) -> bool:
         try:
-            credentials = Credentials.from_authorized_user_info(token_data)
+            credentials = load_credentials(token_data)
             
+            user_email = token_data.get('user_email', 'unknown')
             if credentials.expired:
-                print(f"Token expired for user {token_data.get('user_email', 'unknown')}")
                 if credentials.refresh_token:
-                    print("Attempting to refresh token...")
-                    credentials.refresh(Request())
+                    logger.info("token expired, refreshing user=%s", user_email)
+                    refresh_credentials(credentials)
                     return True
                 else:
-                    print("No refresh token available")
+                    logger.warning("token expired without refresh token user=%s", user_email)
                     return False
             
-            print(f"Token valid for user {token_data.get('user_email', 'unknown')}")
+            logger.debug("token valid user=%s", user_email)
             return True
         except Exception as e:
-            print(f"Token validation error: {e}")
+            logger.warning("token validation error user=%s error=%s",
+                           token_data.get('user_email', 'unknown'), e)
             return False
     
     def refresh_token(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
-        credentials = Credentials.from_authorized_user_info(token_data)
+        credentials = load_credentials(token_data)
         
         if credentials.expired and credentials.refresh_token:
-            credentials.refresh(Request())
-            
-            return {
-                'token': credentials.token,
-                'refresh_token': credentials.refresh_token,
-                'token_uri': credentials.token_uri,
-                'client_id': credentials.client_id,
-                'client_secret': credentials.client_secret,
-                'scopes': credentials.scopes
-            }
+            refresh_credentials(credentials)
+            return token_data_from_credentials(credentials)
         
         return token_data
     
     def get_user_email(self, token_data: Dict[str, Any]) -> str:
         """Get user email from token"""
+        from googleapiclient.discovery import build
+
         try:
-            credentials = Credentials.from_authorized_user_info(token_data)
+            credentials = load_credentials(token_data)
             
             # Refresh token if expired
             if credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
+                refresh_credentials(credentials)
             
             # Build Gmail service to get user info
             service = build('gmail', 'v1', credentials=credentials)
@@ -134,25 +189,57 @@ class GoogleOAuthManager:
         """Get stored token for user"""
         token_data = self.token_storage.load_token(user_email)
         if token_data:
-            print(f"Loaded token for user: {user_email}")
+            logger.debug("loaded token user=%s", user_email)
             if self.validate_token(token_data):
                 # Refresh if needed
                 if self._token_needs_refresh(token_data):
-                    token_data = self.refresh_token(token_data)
-                    self.token_storage.save_token(user_email, token_data)
+                    token_data = self._refresh_stored_token(user_email, token_data)
                 return token_data
             else:
-                print(f"Token validation failed for user: {user_email}")
+                logger.warning("token validation failed, deleting token user=%s", user_email)
                 # If token validation fails, delete the invalid token
-                self.token_storage.delete_token(user_email)
+                self.delete_user_token(user_email)
         else:
-            print(f"No token found for user: {user_email}")
+            logger.debug("no token found user=%s", user_email)
         return None
     
+    def _refresh_stored_token(self, user_email: str, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Refresh under the user's token lock so concurrent workers refresh it once"""
+        with self.token_storage.lock(user_email):
+            # Another worker may have refreshed it while we waited
+            token_data = self.token_storage.load_token(user_email) or token_data
+            if self._token_needs_refresh(token_data):
+                token_data = self.refresh_token(token_data)
+                self.token_storage.save_token(user_email, token_data)
+            return token_data
+
+    def refresh_expiring_tokens(self, margin: float = TOKEN_REFRESH_CONFIG["MARGIN"]) -> int:
+        """Refresh stored tokens expiring within margin seconds, returning how many were refreshed"""
+        refreshed = 0
+        for user_email in self.token_storage.list_users():
+            with self.token_storage.lock(user_email):
+                token_data = self.token_storage.load_token(user_email)
+                if not token_data or not token_data.get('refresh_token') or not expires_within(token_data, margin):
+                    continue
+                try:
+                    credentials = load_credentials(token_data)
+                    refresh_credentials(credentials)
+                except Exception as e:
+                    logger.warning("background token refresh failed user=%s error=%s", user_email, e)
+                    continue
+                self.token_storage.save_token(user_email, token_data_from_credentials(credentials))
+                refreshed += 1
+        return refreshed
+
     def save_user_token(self, user_email: str, token_data: Dict[str, Any]) -> None:
         """Save token for user"""
         self.token_storage.save_token(user_email, token_data)
     
+    def delete_user_token(self, user_email: str) -> bool:
+        """Delete token for user and forget their cached messages"""
+        email_cache.clear_user(user_email)
+        return self.token_storage.delete_token(user_email)
+    
     def user_has_token(self, user_email: str) -> bool:
         """Check if user has valid stored token"""
         return self.get_stored_token(user_email) is not None
@@ -160,7 +247,27 @@ class GoogleOAuthManager:
     def _token_needs_refresh(self, token_data: Dict[str, Any]) -> bool:
         """Check if token needs refresh"""
         try:
-            credentials = Credentials.from_authorized_user_info(token_data)
+            credentials = load_credentials(token_data)
             return credentials.expired and credentials.refresh_token is not None
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+
+async def keep_tokens_fresh(manager: GoogleOAuthManager,
+                            interval: float = TOKEN_REFRESH_CONFIG["INTERVAL"],
+                            margin: float = TOKEN_REFRESH_CONFIG["MARGIN"]) -> None:
+    """Refresh tokens before they expire so requests rarely have to"""
+    while True:
+        try:
+            refreshed = await asyncio.to_thread(manager.refresh_expiring_tokens, margin)
+            if refreshed:
+                logger.info("background token refresh refreshed=%d", refreshed)
+        except Exception as e:
+            logger.warning("background token refresh failed error=%s", e)
+        await asyncio.sleep(interval)
+
+
+@lru_cache(maxsize=None)
+def get_oauth_manager() -> GoogleOAuthManager:
+    """Shared OAuth manager, created on first request that needs it"""
+    return GoogleOAuthManager()
@@ -0,0 +1,87 @@
+"""Run the benchmark suite and write machine-readable results.
+
+    python -m benchmarks                           # everything
+    python -m benchmarks parse mime --output results.json
+    python -m benchmarks endpoints --concurrency 32 --requests 1000
+
+Results are written as JSON: a ``meta`` block (git commit, Python, platform,
+timestamp) and a flat list of ``results`` records, one per benchmark case.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks import (
+    bench_endpoints, bench_import, bench_mime, bench_parse, bench_response, bench_scaling, bench_sentiment
+)
+
+
+SUITES = ["import", "parse", "mime", "response", "sentiment", "endpoints", "scaling"]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_suite(suite: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    if suite == "import":
+        return bench_import.run()
+    if suite == "parse":
+        return bench_parse.run()
+    if suite == "mime":
+        return bench_mime.run()
+    if suite == "response":
+        return bench_response.run()
+    if suite == "sentiment":
+        return bench_sentiment.run()
+    if suite == "scaling":
+        return bench_scaling.run(concurrency=args.concurrency)
+    return bench_endpoints.run(args.concurrency, args.requests, cold=args.cold)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", choices=SUITES, help="Suites to run, default all")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=16, help="Endpoint suite concurrency")
+    parser.add_argument("--requests", type=int, default=400, help="Endpoint suite requests per endpoint")
+    parser.add_argument("--cold", action="store_true", help="Endpoint suite without DSE snapshot caching")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for suite in args.suites or SUITES:
+        print(f"\n== {suite} ==", file=sys.stderr)
+        # Human-readable tables go to stderr so stdout stays valid JSON
+        with redirect_stdout(sys.stderr):
+            results.extend(run_suite(suite, args))
+
+    document = json.dumps({"meta": environment(), "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + "\n")
+    else:
+        print(document)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""End-to-end HTTP benchmark of the API against offline upstreams.
+
+Starts the dsebd.org stub server and the app (``benchmarks.serve_app``) in
+separate processes, then drives each endpoint at a fixed concurrency and
+reports requests/s and latency percentiles.
+
+    python -m benchmarks.bench_endpoints --concurrency 16 --requests 400
+    python -m benchmarks.bench_endpoints --cold   # no DSE snapshot caching
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+
+# Case name -> path; {user} is replaced per request to spread Gmail quota over users
+ENDPOINTS = {
+    "health": "/health",
+    "dse_latest": "/dse/latest",
+    "dse_dsexdata": "/dse/dsexdata",
+    "dse_dsexdata_symbol": "/dse/dsexdata?symbol=GP",
+    "dse_top30": "/dse/top30",
+    "dse_historical": "/dse/historical?startDate=2024-01-01&endDate=2024-01-20",
+    "emails": "/emails?user_email={user}&max_results=10",
+    "emails_search": "/emails/search?user_email={user}&query=dividend&max_results=10",
+    "emails_sentiment": "/emails/sentiment?user_email={user}&max_results=10",
+    "metrics": "/metrics",
+}
+
+USERS = [f"bench{index}@example.com" for index in range(32)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout}s")
+            time.sleep(0.1)
+
+
+@contextmanager
+def running_servers(cold: bool = False, upstream_latency: float = 0.0, historical_days: int = 20,
+                    workers: int = 1):
+    """Start the stub upstream and the app, yield the app base URL"""
+    stub_port, app_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    app_command = [sys.executable, "-m", "benchmarks.serve_app",
+                   "--port", str(app_port), "--dse-base-url", stub_url, "--workers", str(workers)]
+    if cold:
+        app_command.append("--cold")
+
+    processes = [subprocess.Popen([sys.executable, "-m", "benchmarks.stub_server",
+                                   "--port", str(stub_port), "--latency", str(upstream_latency),
+                                   "--historical-days", str(historical_days)],
+                                  stdout=subprocess.DEVNULL)]
+    try:
+        _wait_until_up(f"{stub_url}/dse30_share.php")
+        processes.append(subprocess.Popen(app_command, stdout=subprocess.DEVNULL))
+        app_url = f"http://127.0.0.1:{app_port}"
+        _wait_until_up(f"{app_url}/health")
+        yield app_url
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _drive(session: aiohttp.ClientSession, base_url: str, path: str,
+                 concurrency: int, total: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    received = 0
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors, received
+        for index in remaining:
+            url = base_url + path.format(user=USERS[index % len(USERS)])
+            started = time.perf_counter()
+            try:
+                async with session.get(url, headers={"Accept-Encoding": "gzip, br"}) as response:
+                    body = await response.read()
+                    if response.status >= 400:
+                        errors += 1
+                    received += len(body)
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "bytes_per_request": received // total if total else 0,
+    }
+
+
+async def _run_all(base_url: str, endpoints: Dict[str, str], concurrency: int,
+                   total: int, warmup: int) -> List[Dict[str, Any]]:
+    records = []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False) as session:
+        for name, path in endpoints.items():
+            if warmup:
+                await _drive(session, base_url, path, min(concurrency, warmup), warmup)
+            result = await _drive(session, base_url, path, concurrency, total)
+            records.append({"benchmark": "endpoints", "case": name, "concurrency": concurrency, **result})
+    return records
+
+
+def run(concurrency: int = 16, requests: int = 400, warmup: int = 20, cold: bool = False,
+        upstream_latency: float = 0.0, historical_days: int = 20,
+        only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    endpoints = {name: path for name, path in ENDPOINTS.items() if not only or name in only}
+    with running_servers(cold, upstream_latency, historical_days) as base_url:
+        records = asyncio.run(_run_all(base_url, endpoints, concurrency, requests, warmup))
+
+    mode = "cold" if cold else "warm"
+    print(f"{'endpoint (' + mode + ')':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'bytes':>11}")
+    for record in records:
+        record["mode"] = mode
+        print(
+            f"{record['case']:<24}{record['requests_per_second']:>10,.1f}{record['p50_ms']:>10.2f}"
+            f"{record['p95_ms']:>10.2f}{record['p99_ms']:>10.2f}{record['errors']:>8}"
+            f"{record['bytes_per_request']:>11,}"
+        )
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cold", action="store_true", help="Disable DSE snapshot caching in the app")
+    parser.add_argument("--upstream-latency", type=float, default=0.0,
+                        help="Seconds of simulated dsebd.org latency")
+    parser.add_argument("--historical-days", type=int, default=20, help="Days in the stub archive page")
+    parser.add_argument("--only", nargs="*", choices=list(ENDPOINTS), help="Endpoints to run")
+    args = parser.parse_args()
+    run(args.concurrency, args.requests, args.warmup, args.cold, args.upstream_latency,
+        args.historical_days, args.only)
+
+
+if __name__ == "__main__":
+    main()
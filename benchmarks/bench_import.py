@@ -0,0 +1,107 @@
+"""Measure cold import time of the app with ``python -X importtime``.
+
+Reports the cumulative import time of ``main`` and its slowest top-level
+dependencies, and checks that modules meant to load on first use stay out
+of startup. Exits non-zero when over budget: the absolute import time, or
+the app's own cost as a fraction of FastAPI's in the same interpreter,
+which holds on slow or busy machines too.
+
+    python -m benchmarks.bench_import --budget-ms 800 --overhead-budget 0.75
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy clients that must only be imported when a request needs them
+LAZY_MODULES = (
+    "aiohttp",
+    "bs4",
+    "google.auth.transport.requests",
+    "google.oauth2.credentials",
+    "google_auth_oauthlib",
+    "googleapiclient.discovery",
+)
+
+# Importing main took ~750 ms before heavy clients were made lazy and ~450 ms after
+BUDGET_MS = 800
+# Everything main imports besides fastapi, relative to fastapi: ~0.4 now, while
+# eagerly importing aiohttp or the Google clients alone adds 0.5-0.8
+OVERHEAD_BUDGET = 0.75
+
+
+def import_tree(module: str = "main") -> List[Tuple[int, str, int]]:
+    """(depth, name, cumulative microseconds) for module and its imports, in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(cumulative)))
+        if depth == 0 and name.strip() == module:
+            break
+    # Children are reported before their parent; keep the block that ends in module
+    start = max((i + 1 for i, entry in enumerate(entries[:-1]) if entry[0] == 0), default=0)
+    return entries[start:]
+
+
+def overhead(tree: List[Tuple[int, str, int]], baseline: str = "fastapi") -> float:
+    """Import time of the tree's module beyond its direct import of baseline, as a fraction of baseline"""
+    baseline_us = next(cumulative for depth, name, cumulative in tree if depth == 1 and name == baseline)
+    return (tree[-1][2] - baseline_us) / baseline_us
+
+
+def eager_lazy_modules(names: Iterable[str]) -> List[str]:
+    names = set(names)
+    return [module for module in LAZY_MODULES if module in names]
+
+
+def run(budget_ms: float = BUDGET_MS, overhead_budget: float = OVERHEAD_BUDGET) -> List[Dict[str, Any]]:
+    trees = [import_tree() for _ in range(3)]
+    tree = min(trees, key=lambda entries: entries[-1][2])
+    total_ms = tree[-1][2] / 1000
+    app_overhead = min(overhead(entries) for entries in trees)
+    slowest = sorted((entry for entry in tree if entry[0] == 1), key=lambda entry: entry[2], reverse=True)[:10]
+
+    print(f"import main: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"over fastapi: {app_overhead:.2f}x (budget {overhead_budget:.2f}x)")
+    for _, name, value in slowest:
+        print(f"  {name:<28}{value / 1000:>8.1f} ms")
+    eager = eager_lazy_modules(name for _, name, _ in tree)
+    if eager:
+        print(f"imported eagerly: {', '.join(eager)}")
+
+    return [{
+        "benchmark": "import",
+        "case": "main",
+        "import_ms": round(total_ms, 1),
+        "budget_ms": budget_ms,
+        "overhead": round(app_overhead, 2),
+        "overhead_budget": overhead_budget,
+        "within_budget": total_ms <= budget_ms and app_overhead <= overhead_budget,
+        "eager_lazy_modules": eager,
+        "slowest": {name: round(value / 1000, 1) for _, name, value in slowest},
+    }]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Fail when importing main takes longer")
+    parser.add_argument("--overhead-budget", type=float, default=OVERHEAD_BUDGET,
+                        help="Fail when the rest of main takes longer to import than this fraction of fastapi")
+    args = parser.parse_args()
+    record = run(args.budget_ms, args.overhead_budget)[0]
+    if record["eager_lazy_modules"] or not record["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
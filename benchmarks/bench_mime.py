@@ -0,0 +1,60 @@
+"""Benchmark Gmail body extraction.
+
+Compares the MIME walker in ``utils.mime`` against the previous approach of
+decoding every top-level text/plain part in full.
+
+    python -m benchmarks.bench_mime
+"""
+import base64
+import timeit
+from typing import Any, Dict, List
+
+from benchmarks import gmail_fixtures
+from utils.mime import extract_body
+
+
+def legacy_extract_body(payload):
+    body = ''
+    for part in payload.get('parts', []):
+        if part['mimeType'] == 'text/plain':
+            data = part['body'].get('data')
+            if data:
+                body = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8')
+    return body
+
+
+CASES = {
+    'simple': gmail_fixtures.simple_message(),
+    'alternative': gmail_fixtures.alternative_message(),
+    'html_only': gmail_fixtures.html_only_message(),
+    'nested_50': gmail_fixtures.deeply_nested_message(depth=50),
+    'large_8mb': gmail_fixtures.large_message(megabytes=8),
+}
+
+
+def run(number: int = 20) -> List[Dict[str, Any]]:
+    records = []
+    print(f"{'case':<14}{'legacy (ms)':>14}{'walker (ms)':>14}{'legacy chars':>14}{'walker chars':>14}")
+    for name, message in CASES.items():
+        payload = message['payload']
+        legacy = min(timeit.repeat(lambda: legacy_extract_body(payload), number=number, repeat=3))
+        walker = min(timeit.repeat(lambda: extract_body(payload), number=number, repeat=3))
+        legacy_chars = len(legacy_extract_body(payload))
+        walker_chars = len(extract_body(payload))
+        print(
+            f"{name:<14}{legacy / number * 1000:>14.3f}{walker / number * 1000:>14.3f}"
+            f"{legacy_chars:>14}{walker_chars:>14}"
+        )
+        records.append({
+            "benchmark": "mime",
+            "case": name,
+            "legacy_ms": round(legacy / number * 1000, 4),
+            "walker_ms": round(walker / number * 1000, 4),
+            "legacy_chars": legacy_chars,
+            "walker_chars": walker_chars,
+        })
+    return records
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+"""Benchmark DSE page parsing.
+
+Times building the HTML tree and extracting table rows for every page the
+service scrapes, using recorded pages when available. Row extraction is
+compared against the previous approach of re-reading the header and
+mapping every cell by header string on each parse.
+
+    python -m benchmarks.bench_parse
+"""
+import time
+from typing import Any, Dict, List
+
+from bs4 import BeautifulSoup
+
+from benchmarks import pages
+from services.dse_layout import PAGE_SCHEMAS, LayoutRegistry
+
+
+def legacy_parse_rows(soup, selector, skip_first_row):
+    headers = []
+    table = soup.select_one('table.shares-table')
+    if table:
+        first_row = table.find('tr')
+        if first_row:
+            headers = [th.get_text(strip=True) for th in first_row.find_all('th')]
+    data = []
+    for index, row in enumerate(soup.select(selector)):
+        if index == 0 and skip_first_row:
+            continue
+        tds = row.find_all('td')
+        if len(tds) == 0:
+            continue
+        row_data = {}
+        for idx, header in enumerate(headers):
+            row_data[header] = tds[idx].get_text(strip=True).replace(',', '') if idx < len(tds) else ""
+        if row_data:
+            data.append(row_data)
+    return data
+
+
+def _best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(repeat: int = 3, historical_days: int = 20) -> List[Dict[str, Any]]:
+    layouts = LayoutRegistry()
+    records = []
+    print(f"{'page':<12}{'bytes':>12}{'tree (ms)':>12}{'legacy (ms)':>13}{'compiled (ms)':>15}{'rows':>8}")
+    for name, html in pages.all_pages(historical_days).items():
+        schema = PAGE_SCHEMAS[name]
+        tree = _best_of(repeat, lambda: BeautifulSoup(html, 'html.parser'))
+        soup = BeautifulSoup(html, 'html.parser')
+        legacy = _best_of(repeat, lambda: legacy_parse_rows(soup, schema.selector, not schema.body_rows_only))
+        compiled = _best_of(repeat, lambda: layouts.parse(soup, name))
+        row_count = len(layouts.parse(soup, name))
+        print(
+            f"{name:<12}{len(html):>12,}{tree * 1000:>12.2f}{legacy * 1000:>13.2f}"
+            f"{compiled * 1000:>15.2f}{row_count:>8}"
+        )
+        records.append({
+            "benchmark": "parse",
+            "case": name,
+            "bytes": len(html),
+            "tree_ms": round(tree * 1000, 3),
+            "legacy_rows_ms": round(legacy * 1000, 3),
+            "rows_ms": round(compiled * 1000, 3),
+            "rows": row_count,
+        })
+    return records
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,57 @@
+"""Benchmark response serialization for DSE payloads.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps), orjson per
+request, and reusing the serialized body of a cached snapshot.
+
+    python -m benchmarks.bench_response
+"""
+import timeit
+from typing import Any, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from benchmarks import dse_fixtures
+from utils.response import api_response, json_response
+from utils.snapshot import Snapshot
+
+
+PAYLOADS = {
+    "latest (400 rows)": dse_fixtures.latest_rows(),
+    "historical (8000 rows)": dse_fixtures.historical_rows(days=20),
+}
+
+
+def default_path(data):
+    return JSONResponse(content=jsonable_encoder(api_response(data))).body
+
+
+def orjson_path(data):
+    return json_response(data).body
+
+
+def run(number: int = 20) -> List[Dict[str, Any]]:
+    records = []
+    print(f"{'payload':<24}{'default (ms)':>14}{'orjson (ms)':>14}{'snapshot (ms)':>15}{'bytes':>11}")
+    for name, data in PAYLOADS.items():
+        snapshot = Snapshot(data)
+        default = min(timeit.repeat(lambda: default_path(data), number=number, repeat=3))
+        fast = min(timeit.repeat(lambda: orjson_path(data), number=number, repeat=3))
+        cached = min(timeit.repeat(lambda: Response(content=snapshot.body, media_type="application/json").body, number=number, repeat=3))
+        print(
+            f"{name:<24}{default / number * 1000:>14.3f}{fast / number * 1000:>14.3f}"
+            f"{cached / number * 1000:>15.4f}{len(snapshot.body):>11,}"
+        )
+        records.append({
+            "benchmark": "response",
+            "case": name,
+            "default_ms": round(default / number * 1000, 4),
+            "orjson_ms": round(fast / number * 1000, 4),
+            "snapshot_ms": round(cached / number * 1000, 4),
+            "bytes": len(snapshot.body),
+        })
+    return records
+
+
+if __name__ == "__main__":
+    run()
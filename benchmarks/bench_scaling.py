@@ -0,0 +1,101 @@
+"""Benchmark throughput against the number of app worker processes.
+
+Starts the stub upstream and the app with 1, 2, 4... workers sharing DSE
+snapshots through SHARED_DIR, then drives each endpoint from several load
+generator processes so the client is not the bottleneck. Reports requests/s,
+speedup over one worker, and scaling efficiency (speedup / workers).
+
+    python -m benchmarks.bench_scaling --workers 1 2 4 --clients 4
+
+Scaling can only be close to linear while there is a free CPU core per
+worker on top of the load generators; the table header shows the core count.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiohttp
+
+from benchmarks.bench_endpoints import ENDPOINTS, _drive, running_servers
+
+
+DEFAULT_CASES = ["health", "dse_latest", "dse_dsexdata_symbol", "dse_top30"]
+
+
+async def _client_async(base_url: str, path: str, concurrency: int, total: int) -> Dict[str, Any]:
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False) as session:
+        return await _drive(session, base_url, path, concurrency, total)
+
+
+def _client(base_url: str, path: str, concurrency: int, total: int) -> Dict[str, Any]:
+    return asyncio.run(_client_async(base_url, path, concurrency, total))
+
+
+def _measure(pool: ProcessPoolExecutor, base_url: str, path: str, clients: int,
+             concurrency: int, requests: int) -> Dict[str, Any]:
+    per_client = max(1, requests // clients)
+    started = time.perf_counter()
+    futures = [pool.submit(_client, base_url, path, concurrency, per_client) for _ in range(clients)]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    total = per_client * clients
+    return {
+        "requests": total,
+        "errors": sum(result["errors"] for result in results),
+        "requests_per_second": round(total / elapsed, 1),
+        "p99_ms": max(result["p99_ms"] for result in results),
+    }
+
+
+def run(workers: Sequence[int] = (1, 2, 4), clients: int = 4, concurrency: int = 16,
+        requests: int = 2000, only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    cases = {name: ENDPOINTS[name] for name in (only or DEFAULT_CASES)}
+    records = []
+    baseline: Dict[str, float] = {}
+    print(f"cores={os.cpu_count()} clients={clients} concurrency/client={concurrency}")
+    print(f"{'endpoint':<24}{'workers':>8}{'req/s':>11}{'speedup':>9}{'efficiency':>12}{'p99 ms':>10}{'errors':>8}")
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        for count in workers:
+            with running_servers(workers=count) as base_url:
+                for name, path in cases.items():
+                    # Warm the shared snapshots and every worker's connection pool
+                    _measure(pool, base_url, path, clients, concurrency, clients * concurrency * 2)
+                    result = _measure(pool, base_url, path, clients, concurrency, requests)
+                    rps = result["requests_per_second"]
+                    baseline.setdefault(name, rps)
+                    speedup = rps / baseline[name]
+                    record = {
+                        "benchmark": "scaling",
+                        "case": name,
+                        "workers": count,
+                        "clients": clients,
+                        "speedup": round(speedup, 2),
+                        "efficiency": round(speedup / count, 2),
+                        **result,
+                    }
+                    records.append(record)
+                    print(
+                        f"{name:<24}{count:>8}{rps:>11,.1f}{speedup:>9.2f}{record['efficiency']:>12.2f}"
+                        f"{record['p99_ms']:>10.2f}{record['errors']:>8}"
+                    )
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connections per load generator")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint per worker count")
+    parser.add_argument("--only", nargs="*", choices=list(ENDPOINTS), help="Endpoints to run")
+    args = parser.parse_args()
+    run(args.workers, args.clients, args.concurrency, args.requests, args.only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark sentiment scoring throughput in messages per second.
+
+Scores a batch of synthetic market-news emails against an index of ~400
+trading codes, cold (every message scored) and warm (cached per message ID).
+
+    python -m benchmarks.bench_sentiment
+"""
+import random
+import time
+from typing import Any, Dict, List
+
+from benchmarks import gmail_fixtures
+from models.schemas import EmailData
+from services.sentiment_service import SentimentService
+
+
+def trading_codes(count: int = 400):
+    rng = random.Random(7)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    codes = {"GP", "SQURPHARMA", "BRACBANK", "BATBC", "1JANATAMF"}
+    while len(codes) < count:
+        codes.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(codes)
+
+
+def emails(count: int, codes):
+    rng = random.Random(11)
+    body = gmail_fixtures.news_text(3)
+    return [
+        EmailData(
+            id=f"{index:016x}",
+            sender="news@example.com",
+            subject=f"{rng.choice(codes)} and {rng.choice(codes)} in focus",
+            snippet=f"{body} {rng.choice(codes)} fell while {rng.choice(codes)} rose.",
+            date="2024-01-01 12:00:00"
+        )
+        for index in range(count)
+    ]
+
+
+def run(count: int = 5000) -> List[Dict[str, Any]]:
+    codes = trading_codes()
+    batch = emails(count, codes)
+    service = SentimentService(max_entries=count)
+
+    started = time.perf_counter()
+    service.set_symbols(codes)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    service.score_emails(batch)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    service.score_emails(batch)
+    warm = time.perf_counter() - started
+
+    print(f"index build ({len(codes)} codes): {build * 1000:.2f} ms")
+    print(f"cold: {count / cold:,.0f} messages/s")
+    print(f"warm: {count / warm:,.0f} messages/s")
+    return [{
+        "benchmark": "sentiment",
+        "case": f"{count} messages",
+        "index_build_ms": round(build * 1000, 3),
+        "cold_messages_per_second": round(count / cold),
+        "warm_messages_per_second": round(count / warm),
+    }]
+
+
+if __name__ == "__main__":
+    run()
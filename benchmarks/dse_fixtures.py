@@ -0,0 +1,79 @@
+"""Synthetic DSE table rows shaped like the scraped dsebd.org pages"""
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+
+LATEST_HEADERS = [
+    "#", "TRADING CODE", "LTP*", "HIGH", "LOW", "CLOSEP*", "YCP*",
+    "CHANGE", "TRADE", "VALUE (mn)", "VOLUME"
+]
+
+HISTORICAL_HEADERS = [
+    "#", "DATE", "TRADING CODE", "LTP*", "HIGH", "LOW", "OPENP*",
+    "CLOSEP*", "YCP", "TRADE", "VALUE (mn)", "VOLUME"
+]
+
+
+def trading_codes(count: int = 400, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    codes = ["GP", "SQURPHARMA", "BRACBANK", "BATBC", "1JANATAMF"]
+    seen = set(codes)
+    while len(codes) < count:
+        code = "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        if code not in seen:
+            seen.add(code)
+            codes.append(code)
+    return codes
+
+
+def _price_row(rng: random.Random) -> Dict[str, str]:
+    ycp = rng.uniform(5, 900)
+    ltp = ycp * rng.uniform(0.9, 1.1)
+    return {
+        "LTP*": f"{ltp:.2f}",
+        "HIGH": f"{ltp * 1.02:.2f}",
+        "LOW": f"{ltp * 0.98:.2f}",
+        "CLOSEP*": f"{ltp:.2f}",
+        "YCP*": f"{ycp:.2f}",
+        "CHANGE": f"{ltp - ycp:.2f}",
+        "TRADE": str(rng.randint(1, 5000)),
+        "VALUE (mn)": f"{rng.uniform(0.01, 300):.3f}",
+        "VOLUME": str(rng.randint(100, 5_000_000)),
+    }
+
+
+def latest_rows(count: int = 400, seed: int = 1) -> List[Dict[str, str]]:
+    """Rows of latest_share_price_scroll_l.php as returned by _parse_table_rows"""
+    rng = random.Random(seed)
+    return [
+        {"#": str(index + 1), "TRADING CODE": code, **_price_row(rng)}
+        for index, code in enumerate(trading_codes(count))
+    ]
+
+
+def historical_rows(days: int = 20, symbols: int = 400, seed: int = 2) -> List[Dict[str, str]]:
+    """Rows of day_end_archive.php for every instrument over a date range"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    for day in range(days):
+        current = (start + timedelta(days=day)).isoformat()
+        for code in trading_codes(symbols):
+            prices = _price_row(rng)
+            rows.append({
+                "#": str(len(rows) + 1),
+                "DATE": current,
+                "TRADING CODE": code,
+                "LTP*": prices["LTP*"],
+                "HIGH": prices["HIGH"],
+                "LOW": prices["LOW"],
+                "OPENP*": prices["YCP*"],
+                "CLOSEP*": prices["CLOSEP*"],
+                "YCP": prices["YCP*"],
+                "TRADE": prices["TRADE"],
+                "VALUE (mn)": prices["VALUE (mn)"],
+                "VOLUME": prices["VOLUME"],
+            })
+    return rows
@@ -0,0 +1,116 @@
+"""Synthetic Gmail ``format='full'`` payloads used by tests and benchmarks"""
+import base64
+from typing import Dict, Any
+
+
+def encode(text: str) -> str:
+    """Encode text the way the Gmail API does (base64url, no padding)"""
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def text_part(mime_type: str, text: str, charset: str = 'utf-8') -> Dict[str, Any]:
+    return {
+        'mimeType': mime_type,
+        'filename': '',
+        'headers': [{'name': 'Content-Type', 'value': f'{mime_type}; charset="{charset}"'}],
+        'body': {'size': len(text), 'data': encode(text)}
+    }
+
+
+def attachment_part(filename: str, size: int = 1024 * 1024) -> Dict[str, Any]:
+    return {
+        'mimeType': 'application/pdf',
+        'filename': filename,
+        'headers': [],
+        'body': {'size': size, 'attachmentId': 'ANGjdJ_attachment'}
+    }
+
+
+def multipart(subtype: str, *parts: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'mimeType': f'multipart/{subtype}',
+        'filename': '',
+        'headers': [],
+        'body': {'size': 0},
+        'parts': list(parts)
+    }
+
+
+def news_text(paragraphs: int) -> str:
+    paragraph = (
+        "GP and SQURPHARMA gained in early trade while the broad DSEX index "
+        "edged higher on strong turnover. Analysts expect profit booking "
+        "in the banking sector after a week of steady gains.\n"
+    )
+    return paragraph * paragraphs
+
+
+def news_html(paragraphs: int) -> str:
+    body = ''.join(f"<p>{line}</p>" for line in news_text(paragraphs).splitlines())
+    return (
+        "<html><head><style>p { color: #333; }</style></head><body>"
+        f"<div class='content'>{body}</div>"
+        "<script>track();</script></body></html>"
+    )
+
+
+def message(payload: Dict[str, Any], message_id: str = '18c0ffee') -> Dict[str, Any]:
+    payload = {
+        **payload,
+        'headers': payload.get('headers', []) + [
+            {'name': 'From', 'value': 'DSE News <news@dsebd.org>'},
+            {'name': 'Subject', 'value': 'Market update'},
+            {'name': 'Date', 'value': 'Mon, 1 Jan 2024 12:00:00 +0600'}
+        ]
+    }
+    return {'id': message_id, 'snippet': 'Market update', 'payload': payload}
+
+
+def simple_message(paragraphs: int = 5) -> Dict[str, Any]:
+    """Single-part text/plain message"""
+    return message(text_part('text/plain', news_text(paragraphs)))
+
+
+def alternative_message(paragraphs: int = 5) -> Dict[str, Any]:
+    """multipart/mixed > multipart/alternative > (text/plain, text/html) + attachment"""
+    return message(multipart(
+        'mixed',
+        multipart(
+            'alternative',
+            text_part('text/plain', news_text(paragraphs)),
+            text_part('text/html', news_html(paragraphs))
+        ),
+        attachment_part('report.pdf')
+    ))
+
+
+def html_only_message(paragraphs: int = 5) -> Dict[str, Any]:
+    """multipart/related with a text/html body and no text/plain alternative"""
+    return message(multipart(
+        'related',
+        text_part('text/html', news_html(paragraphs)),
+        attachment_part('logo.png', size=4096)
+    ))
+
+
+def deeply_nested_message(depth: int = 50, paragraphs: int = 5) -> Dict[str, Any]:
+    """Body buried under ``depth`` levels of forwarded multipart/mixed parts"""
+    part = multipart(
+        'alternative',
+        text_part('text/plain', news_text(paragraphs)),
+        text_part('text/html', news_html(paragraphs))
+    )
+    for level in range(depth):
+        part = multipart('mixed', part, attachment_part(f'forward-{level}.eml', size=2048))
+    return message(part)
+
+
+def large_message(megabytes: int = 8) -> Dict[str, Any]:
+    """Several multi-megabyte text parts, as produced by long digest emails"""
+    paragraphs = megabytes * 1024 * 1024 // len(news_text(1))
+    return message(multipart(
+        'mixed',
+        text_part('text/plain', news_text(paragraphs)),
+        text_part('text/plain', news_text(paragraphs)),
+        text_part('text/html', news_html(paragraphs))
+    ))
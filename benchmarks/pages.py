@@ -0,0 +1,88 @@
+"""dsebd.org pages for offline benchmarks.
+
+Pages recorded from the live site with ``python -m benchmarks.record dse`` are
+read from benchmarks/recordings/. When no recording exists, a deterministic
+synthetic page with the same table layout is rendered from dse_fixtures.
+"""
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks import dse_fixtures
+
+
+RECORDINGS_DIR = Path(__file__).parent / "recordings"
+
+# Page name -> dsebd.org path
+PAGE_PATHS = {
+    "latest": "/latest_share_price_scroll_l.php",
+    "dsex": "/dseX_share.php",
+    "top30": "/dse30_share.php",
+    "historical": "/day_end_archive.php",
+}
+
+
+def _format_cell(header: str, value: str) -> str:
+    if header == "TRADING CODE":
+        return f'<a href="displayCompany.php?name={escape(value)}" class="ab1">{escape(value)}</a>'
+    if header in ("VOLUME", "TRADE"):
+        # dsebd.org prints thousands separators; the parser strips them
+        return f"{int(value):,}"
+    return escape(value)
+
+
+def render_table_page(title: str, headers: List[str], rows: List[Dict[str, str]]) -> str:
+    """Render rows the way dsebd.org lays out its share tables"""
+    head = "".join(f"<th>{escape(header)}</th>" for header in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{_format_cell(header, row[header])}</td>" for header in headers) + "</tr>\n"
+        for row in rows
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{escape(title)}</title><link rel='stylesheet' href='/assets/css/style.css'></head>"
+        "<body><div class='container'><nav class='navbar'><ul><li><a href='/'>Home</a></li></ul></nav>"
+        f"<h2 class='BodyHead topBodyHead'>{escape(title)}</h2>"
+        "<div class='table-responsive inner-scroll'>"
+        "<table class='table table-bordered background-white shares-table fixedHeader'>"
+        f"<thead><tr>{head}</tr></thead><tbody>\n{body}</tbody></table></div></div>"
+        "<footer class='footer'>Dhaka Stock Exchange PLC.</footer></body></html>"
+    )
+
+
+def _recorded(name: str) -> Optional[str]:
+    path = RECORDINGS_DIR / f"{name}.html"
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    return None
+
+
+def latest_page(symbols: int = 400) -> str:
+    return _recorded("latest") or render_table_page(
+        "Latest Share Price", dse_fixtures.LATEST_HEADERS, dse_fixtures.latest_rows(symbols))
+
+
+def dsex_page(symbols: int = 300) -> str:
+    return _recorded("dsex") or render_table_page(
+        "DSEX Index Shares", dse_fixtures.LATEST_HEADERS, dse_fixtures.latest_rows(symbols, seed=3))
+
+
+def top30_page() -> str:
+    return _recorded("top30") or render_table_page(
+        "DS30 Index Shares", dse_fixtures.LATEST_HEADERS, dse_fixtures.latest_rows(30, seed=4))
+
+
+def historical_page(days: int = 60, symbols: int = 400) -> str:
+    """Day end archive for every instrument; 60 days x 400 symbols is ~24k rows"""
+    return _recorded("historical") or render_table_page(
+        "Day End Archive", dse_fixtures.HISTORICAL_HEADERS,
+        dse_fixtures.historical_rows(days=days, symbols=symbols))
+
+
+def all_pages(historical_days: int = 60) -> Dict[str, str]:
+    return {
+        "latest": latest_page(),
+        "dsex": dsex_page(),
+        "top30": top30_page(),
+        "historical": historical_page(days=historical_days),
+    }
@@ -0,0 +1,156 @@
+"""Record live dsebd.org pages and Gmail API responses into benchmarks/recordings/ for offline runs.
+
+    python -m benchmarks.record dse --start 2024-01-01 --end 2024-03-31
+    python -m benchmarks.record gmail --user-email you@example.com --max-results 50
+
+Recorded pages replace the synthetic ones in benchmarks.pages, and gmail.json
+replaces the synthetic mailbox in benchmarks.gmail_transport. The Gmail
+recorder uses the token stored by the OAuth flow and scrubs messages by
+default: addresses, subjects and every word of text are replaced with
+placeholders of the same length, keeping MIME structure and sizes.
+
+Recordings are kept out of git since they hold upstream pages and private
+mail; committed benchmark results always come from the deterministic
+synthetic data, so they stay comparable across machines and commits.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+from typing import Any, Dict
+
+from benchmarks.gmail_transport import RECORDINGS_FILE
+from benchmarks.pages import RECORDINGS_DIR
+from config import DHAKA_STOCK_URLS
+from services.stock_service import StockDataService
+
+
+# Headers kept in scrubbed messages; everything else, e.g. Received, is dropped
+KEPT_HEADERS = {"content-type", "content-transfer-encoding", "date", "from", "mime-version", "subject", "to"}
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_HTML_RE = re.compile(r"(<[^>]*>)|([^<]+)")
+_ATTRIBUTE_RE = re.compile(r'"[^"]*"')
+
+
+async def record_dse(start: str, end: str) -> None:
+    service = StockDataService()
+    historical_url = (
+        f"{DHAKA_STOCK_URLS['HISTORICAL_DATA']}?startDate={start}&endDate={end}"
+        "&inst=All%20Instrument&archive=data"
+    )
+    targets = {
+        "latest": DHAKA_STOCK_URLS["LATEST_DATA"],
+        "dsex": DHAKA_STOCK_URLS["DSEX"],
+        "top30": DHAKA_STOCK_URLS["TOP_30"],
+        "historical": historical_url,
+    }
+    RECORDINGS_DIR.mkdir(exist_ok=True)
+    try:
+        for name, url in targets.items():
+            html = await service._fetch_with_retry(url)
+            (RECORDINGS_DIR / f"{name}.html").write_text(html, encoding="utf-8")
+            print(f"recorded {name}: {len(html):,} bytes")
+    finally:
+        await service.close()
+
+
+def _scrub_text(text: str) -> str:
+    return _WORD_RE.sub(lambda match: "x" * len(match.group()), text)
+
+
+def _scrub_html(html: str) -> str:
+    """Scrub text and attribute values, keeping tags so parsing costs the same"""
+    def scrub(match: re.Match) -> str:
+        if match.group(1):
+            return _ATTRIBUTE_RE.sub(lambda value: '"' + "x" * (len(value.group()) - 2) + '"', match.group(1))
+        return _scrub_text(match.group(2))
+    return _HTML_RE.sub(scrub, html)
+
+
+def _scrub_part(part: Dict[str, Any], index: int) -> Dict[str, Any]:
+    headers = []
+    for header in part.get("headers", []):
+        name = header["name"].lower()
+        if name not in KEPT_HEADERS:
+            continue
+        value = header["value"]
+        if name in ("from", "to"):
+            value = f"Sender {index} <sender{index}@example.com>" if name == "from" else "bench@example.com"
+        elif name == "subject":
+            value = _scrub_text(value)
+        headers.append({"name": header["name"], "value": value})
+
+    body = {"size": part.get("body", {}).get("size", 0)}
+    data = part.get("body", {}).get("data")
+    if data:
+        text = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)).decode("utf-8", errors="replace")
+        text = _scrub_html(text) if part.get("mimeType") == "text/html" else _scrub_text(text)
+        body["data"] = base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+    scrubbed = {"mimeType": part.get("mimeType", ""), "filename": "attachment" if part.get("filename") else "",
+                "headers": headers, "body": body}
+    if "partId" in part:
+        scrubbed["partId"] = part["partId"]
+    if "parts" in part:
+        scrubbed["parts"] = [_scrub_part(child, index) for child in part["parts"]]
+    return scrubbed
+
+
+def scrub_message(message: Dict[str, Any], message_id: str, index: int) -> Dict[str, Any]:
+    """messages.get response with personal data replaced by same-length placeholders"""
+    return {
+        "id": message_id,
+        "threadId": message_id,
+        "labelIds": message.get("labelIds", []),
+        "snippet": _scrub_text(message.get("snippet", "")),
+        "internalDate": message.get("internalDate"),
+        "sizeEstimate": message.get("sizeEstimate"),
+        "payload": _scrub_part(message.get("payload", {}), index),
+    }
+
+
+def record_gmail(user_email: str, max_results: int, query: str, scrub: bool = True) -> None:
+    from auth.oauth import get_oauth_manager
+    from services.email_service import GmailService
+
+    token_data = get_oauth_manager().get_stored_token(user_email)
+    if not token_data:
+        raise SystemExit(f"No stored token for {user_email}; authenticate through /oauth/login first")
+    messages = GmailService(token_data).service.users().messages()
+    listed = messages.list(userId="me", maxResults=max_results, q=query).execute().get("messages", [])
+
+    mailbox = {}
+    for index, listed_message in enumerate(listed):
+        message = messages.get(userId="me", id=listed_message["id"], format="full").execute()
+        if scrub:
+            message_id = f"18c{index:013x}"
+            message = scrub_message(message, message_id, index)
+        mailbox[message["id"]] = message
+    RECORDINGS_DIR.mkdir(exist_ok=True)
+    RECORDINGS_FILE.write_text(json.dumps(mailbox), encoding="utf-8")
+    print(f"recorded gmail: {len(mailbox)} messages{' (scrubbed)' if scrub else ''}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sources = parser.add_subparsers(dest="source", required=True)
+    dse = sources.add_parser("dse", help="Record dsebd.org share price pages")
+    dse.add_argument("--start", required=True, help="Historical archive start date (YYYY-MM-DD)")
+    dse.add_argument("--end", required=True, help="Historical archive end date (YYYY-MM-DD)")
+    gmail = sources.add_parser("gmail", help="Record messages.get responses from a mailbox")
+    gmail.add_argument("--user-email", required=True, help="User whose stored OAuth token is used")
+    gmail.add_argument("--max-results", type=int, default=50, help="Messages to record")
+    gmail.add_argument("--query", default="in:inbox", help="Gmail search query")
+    gmail.add_argument("--no-scrub", dest="scrub", action="store_false",
+                       help="Keep addresses, subjects and bodies as they are")
+    args = parser.parse_args()
+    if args.source == "dse":
+        asyncio.run(record_dse(args.start, args.end))
+    else:
+        record_gmail(args.user_email, args.max_results, args.query, args.scrub)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Run the API against offline upstreams for end-to-end benchmarks.
+
+DSE pages come from the stub server at --dse-base-url and Gmail calls are
+answered by the replay transport, with a fixed token for every user.
+
+    python -m benchmarks.serve_app --port 8993 --dse-base-url http://127.0.0.1:8992
+    python -m benchmarks.serve_app --port 8993 --dse-base-url http://127.0.0.1:8992 --workers 4
+"""
+import argparse
+import os
+import tempfile
+
+import googleapiclient.discovery
+from auth.oauth import get_oauth_manager
+from benchmarks.gmail_transport import FAKE_TOKEN, ReplayHttp, build_replay_service
+from config import BASE_URL, DHAKA_STOCK_URLS, SNAPSHOT_CONFIG
+from main import app
+
+
+class BenchmarkOAuthManager:
+    """Hands out the same fake token for every user"""
+
+    def get_stored_token(self, user_email: str):
+        return {**FAKE_TOKEN, "user_email": user_email}
+
+
+def configure(dse_base_url: str, cold: bool = False) -> None:
+    """Point the app at the offline upstreams"""
+    for name, url in DHAKA_STOCK_URLS.items():
+        DHAKA_STOCK_URLS[name] = url.replace(BASE_URL, dse_base_url.rstrip("/"), 1)
+    if cold:
+        # Every request scrapes and parses the stub page again
+        for kind in SNAPSHOT_CONFIG["TTL"]:
+            SNAPSHOT_CONFIG["TTL"][kind] = 0
+
+    replay_http = ReplayHttp()
+    googleapiclient.discovery.build = lambda *args, **kwargs: build_replay_service(replay_http)
+    app.dependency_overrides[get_oauth_manager] = lambda: BenchmarkOAuthManager()
+
+
+if os.getenv("BENCH_DSE_BASE_URL"):
+    # Lets uvicorn worker processes configure themselves on import
+    configure(os.environ["BENCH_DSE_BASE_URL"], cold=os.getenv("BENCH_COLD") == "1")
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8993)
+    parser.add_argument("--dse-base-url", required=True)
+    parser.add_argument("--cold", action="store_true", help="Disable DSE snapshot caching")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing snapshots")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Workers configure themselves from the environment when they import this module
+        os.environ["BENCH_DSE_BASE_URL"] = args.dse_base_url
+        os.environ["BENCH_COLD"] = "1" if args.cold else "0"
+        with tempfile.TemporaryDirectory(prefix="dsentiment-shared-") as shared_dir:
+            os.environ.setdefault("SHARED_DIR", shared_dir)
+            uvicorn.run("benchmarks.serve_app:app", host=args.host, port=args.port, log_level="warning",
+                        workers=args.workers)
+        return
+
+    configure(args.dse_base_url, cold=args.cold)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Local stand-in for dsebd.org serving benchmark pages.
+
+    python -m benchmarks.stub_server --port 8992
+    DSE_BASE_URL=http://127.0.0.1:8992 python main.py
+"""
+import argparse
+import asyncio
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from benchmarks import pages
+
+
+def create_app(page_html: Optional[Dict[str, str]] = None, latency: float = 0.0) -> web.Application:
+    """aiohttp app answering the dsebd.org paths used by StockDataService"""
+    page_html = page_html or pages.all_pages()
+    bodies = {pages.PAGE_PATHS[name]: html.encode("utf-8") for name, html in page_html.items()}
+    app = web.Application()
+    app["requests"] = {path: 0 for path in bodies}
+
+    async def serve(request: web.Request) -> web.Response:
+        app["requests"][request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return web.Response(body=bodies[request.path], content_type="text/html", charset="utf-8")
+
+    for path in bodies:
+        app.router.add_get(path, serve)
+    return app
+
+
+async def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                            page_html: Optional[Dict[str, str]] = None,
+                            latency: float = 0.0):
+    """Start the stub server, return (runner, base_url); call runner.cleanup() to stop"""
+    app = create_app(page_html, latency)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8992)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated upstream latency")
+    parser.add_argument("--historical-days", type=int, default=60, help="Days in the synthetic archive page")
+    args = parser.parse_args()
+    page_html = pages.all_pages(historical_days=args.historical_days)
+    web.run_app(create_app(page_html, latency=args.latency), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 # config.py
+import os
 
-BASE_URL = "https://dsebd.org"
+from dotenv import load_dotenv
+
+# Load .env before any setting below reads the environment
+load_dotenv()
+
+BASE_URL = os.getenv("DSE_BASE_URL", "https://dsebd.org")
 
 
 # Dhaka Stock Exchange URLs
@@ -18,4 +24,112 @@ REQUEST_CONFIG = {
     "BACKOFF_FACTOR": 2,
     "MAX_CONNECTIONS": 10,
     "MAX_CONNECTIONS_PER_HOST": 5
-}
\ No newline at end of file
+}
+# Gmail message cache configuration
+EMAIL_CACHE_CONFIG = {
+    "MAX_ENTRIES": 2000,
+    "SPILL_DIR": None  # e.g. "cache/emails" to keep evicted messages on disk
+}
+
+# Gmail message parsing configuration
+GMAIL_CONFIG = {
+    "MAX_BODY_BYTES": 64 * 1024  # decoded body size cap per message
+}
+
+# Gmail API quota configuration (units per Gmail usage limits documentation)
+GMAIL_QUOTA_CONFIG = {
+    "METHOD_UNITS": {
+        "messages.list": 5,
+        "messages.get": 5,
+        "history.list": 2,
+        "users.getProfile": 1
+    },
+    "USER_UNITS_PER_SECOND": 250,  # 15,000 units per user per minute
+    "USER_BURST": 250,
+    "GLOBAL_UNITS_PER_SECOND": 20000,  # 1,200,000 units per project per minute
+    "GLOBAL_BURST": 20000,
+    "MAX_RETRIES": 5,
+    "BACKOFF_BASE": 0.5,
+    "BACKOFF_MAX": 32
+}
+
+# News sentiment scoring configuration
+SENTIMENT_CONFIG = {
+    "CACHE_MAX_ENTRIES": 10000,
+    "SYMBOL_REFRESH_SECONDS": 3600,  # how often trading codes are reloaded from /dse/latest
+    "SYMBOL_RETRY_SECONDS": 60,  # wait after a failed reload before scraping again
+    "NEUTRAL_THRESHOLD": 0.05
+}
+
+# Cached DSE snapshot configuration (seconds before a page is fetched again)
+SNAPSHOT_CONFIG = {
+    "TTL": {
+        "latest": 15,
+        "dsex": 15,
+        "top30": 15,
+        "historical": 300
+    },
+    "MAX_ENTRIES": 64,
+    "MAX_SYMBOL_ENTRIES": 256  # ?symbol= views, kept apart so they cannot evict page snapshots
+}
+
+# Batch DSE query configuration
+BATCH_CONFIG = {
+    "MAX_QUERIES": 25
+}
+
+# Response compression configuration
+COMPRESSION_CONFIG = {
+    "MINIMUM_SIZE": 1024,  # bodies smaller than this are sent uncompressed
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    "THREAD_MINIMUM_SIZE": 128 * 1024  # bodies at least this large are compressed off the event loop
+}
+
+# Metrics configuration
+METRICS_CONFIG = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "EVENT_LOOP_LAG_INTERVAL": 0.5,
+    # Seconds between workers publishing their metrics to SHARED_DIR, merged at scrape time
+    "PUBLISH_INTERVAL": 5
+}
+
+# End-of-day DSE archive configuration
+ARCHIVE_CONFIG = {
+    "ENABLED": os.getenv("ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "DIR": os.getenv("ARCHIVE_DIR", "archive"),
+    "TRADING_WEEKDAYS": (6, 0, 1, 2, 3),  # Sunday to Thursday, as date.weekday()
+    "RUN_AFTER": "15:00",  # Dhaka time; the market closes at 14:30
+    "BACKFILL_DAYS": 30,  # how far back missing days are filled in
+    "CHECK_INTERVAL": 300  # seconds between scheduler checks
+}
+
+# Intraday time-series configuration
+INTRADAY_CONFIG = {
+    "SAMPLE_CAPACITY": 1200,  # samples per symbol per day; 15 s polls over the 4.5 h session is 1,080
+    "BAR_INTERVALS": {"1m": 60, "5m": 300},
+    "MARKET_OPEN": "10:00",  # Dhaka time
+    "MARKET_CLOSE": "14:30",
+    "POLL_ENABLED": os.getenv("INTRADAY_POLL_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "POLL_INTERVAL": 15,  # seconds; matches the latest snapshot TTL
+    "FLUSH_DIR": os.getenv("INTRADAY_FLUSH_DIR"),  # e.g. "intraday" to persist samples across restarts
+    "FLUSH_INTERVAL": 300
+}
+
+# Multi-worker configuration. Setting SHARED_DIR turns on cluster mode: workers
+# share DSE snapshots through files there and elect one leader, by file lock,
+# to run background polling and token refresh.
+CLUSTER_CONFIG = {
+    "WORKERS": int(os.getenv("WORKERS", "1")),
+    "SHARED_DIR": os.getenv("SHARED_DIR"),  # defaults to "shared" when WORKERS > 1
+    "LEADER_RETRY": 5,  # seconds between attempts to take over leadership, or to restart failed leader jobs
+    "LOCK_POLL": 0.02,  # seconds between attempts on a busy snapshot lock
+    "SNAPSHOT_MAX_AGE": 86400,  # seconds before the leader deletes a shared snapshot nobody refreshed
+    "PRUNE_INTERVAL": 3600
+}
+
+# Background OAuth token refresh, run by the leader
+TOKEN_REFRESH_CONFIG = {
+    "INTERVAL": 300,  # seconds between checks
+    "MARGIN": 600  # refresh tokens expiring within this many seconds
+}
@@ -1,20 +1,103 @@
+import asyncio
+import logging
+import os
+import shutil
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 from fastapi import FastAPI
-from dotenv import load_dotenv
 from api.oauth import router as oauth_router
 from api.emails import router as emails_router
 from api.dse import router as dse_router
+from api.metrics import router as metrics_router
+from auth.oauth import get_oauth_manager, keep_tokens_fresh
+from config import ARCHIVE_CONFIG, CLUSTER_CONFIG, COMPRESSION_CONFIG, INTRADAY_CONFIG
+from services.archive_service import ArchiveService
+from services.intraday import intraday_store
+from services.stock_service import stock_service
+from utils.compression import NegotiatedGZipMiddleware
+from utils.locks import LeaderElection
+from utils.metrics import metrics, monitor_event_loop_lag, publish_metrics
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def lead() -> None:
+    """Background jobs that run in exactly one worker.
+
+    A failing job cancels the others, and this only returns once all of them
+    have stopped, so they never outlive the leader lock.
+    """
+    intraday_store.writer = True
+    async with asyncio.TaskGroup() as jobs:
+        jobs.create_task(keep_tokens_fresh(get_oauth_manager()))
+        if ARCHIVE_CONFIG["ENABLED"]:
+            jobs.create_task(ArchiveService(stock_service).run_forever())
+        if INTRADAY_CONFIG["POLL_ENABLED"]:
+            jobs.create_task(intraday_store.run_poller(stock_service))
+        if stock_service.shared is not None:
+            jobs.create_task(stock_service.shared.prune_forever())
+
+
+async def lead_alone() -> None:
+    """Single-worker mode: lead, restarting the jobs if one of them fails"""
+    while True:
+        try:
+            await lead()
+            return
+        except Exception:
+            logger.exception("background jobs failed")
+        await asyncio.sleep(CLUSTER_CONFIG["LEADER_RETRY"])
+
+
+async def follow() -> None:
+    """Background jobs of the other workers, which only read what the leader publishes"""
+    intraday_store.writer = False
+    if INTRADAY_CONFIG["POLL_ENABLED"]:
+        await intraday_store.run_poller(stock_service)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    if metrics.enabled:
+        background.append(asyncio.create_task(monitor_event_loop_lag()))
+        if metrics.shared_dir is not None:
+            background.append(asyncio.create_task(publish_metrics()))
+    if intraday_store.flush_dir is not None:
+        await asyncio.to_thread(intraday_store.restore)
+    if CLUSTER_CONFIG["SHARED_DIR"]:
+        intraday_store.writer = False
+        election = LeaderElection(Path(CLUSTER_CONFIG["SHARED_DIR"]) / "leader.lock", CLUSTER_CONFIG["LEADER_RETRY"])
+        background.append(asyncio.create_task(election.run(lead, follow)))
+    else:
+        background.append(asyncio.create_task(lead_alone()))
+    yield
+    for task in background:
+        task.cancel()
+    if intraday_store.day is not None:
+        await asyncio.to_thread(intraday_store.flush)
+    await stock_service.close()
 
-load_dotenv()
 
 app = FastAPI(
     title="Sentiment Analysis APIs",
     description="APIs for sentiment analysis using Gmail API, OpenAI, Scrapped news and other services.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+# DSE and email endpoints compress their own bodies; this covers everything else
+app.add_middleware(NegotiatedGZipMiddleware, minimum_size=COMPRESSION_CONFIG["MINIMUM_SIZE"])
+
 app.include_router(oauth_router)
 app.include_router(emails_router)
 app.include_router(dse_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -28,4 +111,13 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8991, log_level="debug")
+
+    workers = CLUSTER_CONFIG["WORKERS"]
+    if workers > 1:
+        # Worker processes import the app afresh and read this from the environment
+        os.environ.setdefault("SHARED_DIR", "shared")
+        # Counters summed across workers start from zero with the server, not with each worker
+        shutil.rmtree(Path(os.environ["SHARED_DIR"]) / "metrics", ignore_errors=True)
+        uvicorn.run("main:app", host="0.0.0.0", port=8991, log_level="debug", workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8991, log_level="debug")
@@ -1,5 +1,7 @@
-from typing import List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from config import BATCH_CONFIG
 
 
 class AuthUrlResponse(BaseModel):
@@ -25,4 +27,42 @@ class EmailsResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
-    detail: str = Field(None, description="Detailed error information")
\ No newline at end of file
+    detail: str = Field(None, description="Detailed error information")
+
+
+class EmailSentiment(BaseModel):
+    score: float = Field(..., description="Sentiment score between -1 (negative) and 1 (positive)")
+    label: str = Field(..., description="positive, negative or neutral")
+    positive: int = Field(..., description="Number of positive lexicon hits")
+    negative: int = Field(..., description="Number of negative lexicon hits")
+    symbols: List[str] = Field(..., description="DSE trading codes mentioned in the email")
+
+
+class ScoredEmail(EmailData):
+    sentiment: EmailSentiment = Field(..., description="Sentiment of subject and body")
+
+
+class SentimentResponse(BaseModel):
+    emails: List[ScoredEmail] = Field(..., description="List of scored email messages")
+    count: int = Field(..., description="Number of emails returned")
+
+
+class DSEQuery(BaseModel):
+    id: Optional[str] = Field(None, description="Client label echoed back with the result")
+    kind: Literal["latest", "dsex", "top30", "historical"] = Field(..., description="DSE page to query")
+    symbol: Optional[str] = Field(None, description="Stock symbol filter for dsex")
+    startDate: Optional[str] = Field(None, description="Start date for historical")
+    endDate: Optional[str] = Field(None, description="End date for historical")
+    inst: str = Field("All Instrument", description="Trading code for historical")
+
+    @model_validator(mode="after")
+    def check_historical_range(self) -> "DSEQuery":
+        if self.kind == "historical" and not (self.startDate and self.endDate):
+            raise ValueError("historical queries need startDate and endDate")
+        return self
+
+
+class DSEBatchRequest(BaseModel):
+    queries: List[DSEQuery] = Field(
+        ..., min_length=1, max_length=BATCH_CONFIG["MAX_QUERIES"], description="Queries to run concurrently"
+    )
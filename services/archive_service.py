@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from array import array
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import ARCHIVE_CONFIG
+from utils.columnar import MISSING, Partition, write_partition
+from utils.response import DSE_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+# (column, scraped header aliases, array typecode, fixed-point scale)
+# Prices are stored in poisha and turnover in thousands of taka, so every
+# numeric column is an integer array that can be mapped straight from disk.
+ColumnSpec = Tuple[str, Tuple[str, ...], str, int]
+
+HISTORICAL_COLUMNS: Sequence[ColumnSpec] = (
+    ("ltp", ("LTP*", "LTP"), "i", 100),
+    ("high", ("HIGH",), "i", 100),
+    ("low", ("LOW",), "i", 100),
+    ("open", ("OPENP*", "OPENP"), "i", 100),
+    ("close", ("CLOSEP*", "CLOSEP"), "i", 100),
+    ("ycp", ("YCP", "YCP*"), "i", 100),
+    ("trade", ("TRADE",), "i", 1),
+    ("value_mn", ("VALUE (mn)",), "q", 1000),
+    ("volume", ("VOLUME",), "q", 1),
+)
+
+LATEST_COLUMNS: Sequence[ColumnSpec] = (
+    ("ltp", ("LTP*", "LTP"), "i", 100),
+    ("high", ("HIGH",), "i", 100),
+    ("low", ("LOW",), "i", 100),
+    ("close", ("CLOSEP*", "CLOSEP"), "i", 100),
+    ("ycp", ("YCP*", "YCP"), "i", 100),
+    ("change", ("CHANGE",), "i", 100),
+    ("trade", ("TRADE",), "i", 1),
+    ("value_mn", ("VALUE (mn)",), "q", 1000),
+    ("volume", ("VOLUME",), "q", 1),
+)
+
+TABLES = {"historical": HISTORICAL_COLUMNS, "latest": LATEST_COLUMNS}
+
+
+def _to_fixed(text: Optional[str], scale: int, missing: int) -> int:
+    try:
+        return round(float(text) * scale)
+    except (TypeError, ValueError):
+        return missing
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], specs: Sequence[ColumnSpec]) -> Tuple[Dict[str, array], List[str]]:
+    """Encode scraped rows as typed columns with dictionary-encoded trading codes"""
+    rows = [row for row in rows if row.get('TRADING CODE')]
+    codes = sorted({row['TRADING CODE'] for row in rows})
+    if len(codes) > 0xFFFF:
+        raise ValueError(f"Too many trading codes for a uint16 dictionary: {len(codes)}")
+    code_index = {code: index for index, code in enumerate(codes)}
+
+    columns = {"code": array("H", (code_index[row['TRADING CODE']] for row in rows))}
+    for name, headers, typecode, scale in specs:
+        missing = MISSING[typecode]
+        values = array(typecode)
+        for row in rows:
+            text = next((row[header] for header in headers if header in row), None)
+            try:
+                values.append(_to_fixed(text, scale, missing))
+            except OverflowError:
+                values.append(missing)
+        columns[name] = values
+    return columns, codes
+
+
+def decode_partition(partition: Partition) -> List[Dict[str, Any]]:
+    """Rows of a partition as dicts of trading code and float/int values"""
+    codes = partition.metadata["codes"]
+    scales = partition.metadata["scales"]
+    decoded = {"code": [codes[index] for index in partition.column("code")]}
+    for name in partition.column_names:
+        if name == "code":
+            continue
+        values = partition.column(name)
+        missing = MISSING[values.format if isinstance(values, memoryview) else values.typecode]
+        scale = scales[name]
+        decoded[name] = [
+            None if value == missing else (value / scale if scale != 1 else value)
+            for value in values
+        ]
+    return [dict(zip(decoded, row)) for row in zip(*decoded.values())]
+
+
+class ArchiveService:
+    """Captures the market's end-of-day data into one partition per table per trading day"""
+
+    def __init__(self, stock_service, root: str = ARCHIVE_CONFIG["DIR"],
+                 trading_weekdays: Iterable[int] = ARCHIVE_CONFIG["TRADING_WEEKDAYS"],
+                 run_after: str = ARCHIVE_CONFIG["RUN_AFTER"],
+                 backfill_days: int = ARCHIVE_CONFIG["BACKFILL_DAYS"]):
+        self.stock_service = stock_service
+        self.root = Path(root)
+        self.trading_weekdays = frozenset(trading_weekdays)
+        self.run_after = dt_time.fromisoformat(run_after)
+        self.backfill_days = backfill_days
+
+    def partition_path(self, day: date, table: str) -> Path:
+        return self.root / f"{day:%Y}" / day.isoformat() / f"{table}.col"
+
+    def is_archived(self, day: date, table: str) -> bool:
+        return self.partition_path(day, table).exists()
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() in self.trading_weekdays
+
+    def last_closed_day(self, now: datetime) -> date:
+        """Most recent day whose close has passed by now"""
+        now = now.astimezone(DSE_TIMEZONE)
+        return now.date() if now.time() >= self.run_after else now.date() - timedelta(days=1)
+
+    def pending_days(self, now: Optional[datetime] = None) -> List[date]:
+        """Trading days within the backfill window whose close has not been archived"""
+        now = (now or datetime.now(DSE_TIMEZONE)).astimezone(DSE_TIMEZONE)
+        today = now.date()
+        last = self.last_closed_day(now)
+        days = []
+        for offset in range(self.backfill_days, -1, -1):
+            day = today - timedelta(days=offset)
+            if day > last or not self.is_trading_day(day):
+                continue
+            if not self.is_archived(day, "historical") or (day == today and not self.is_archived(day, "latest")):
+                days.append(day)
+        return days
+
+    async def _write(self, day: date, table: str, rows: List[Dict[str, Any]]) -> int:
+        specs = TABLES[table]
+        columns, codes = encode_rows(rows, specs)
+        metadata = {
+            "table": table,
+            "date": day.isoformat(),
+            "archived_at": datetime.now(DSE_TIMEZONE).isoformat(timespec="seconds"),
+            "codes": codes,
+            "scales": {name: scale for name, _, _, scale in specs}
+        }
+        await asyncio.to_thread(write_partition, self.partition_path(day, table), columns, metadata)
+        return len(columns["code"])
+
+    async def archive_day(self, day: date, today: Optional[date] = None) -> Dict[str, int]:
+        """Archive one trading day, skipping tables that are already on disk.
+
+        The latest share prices can only be captured on the day itself; past
+        days get the day end archive only. Returns rows written per table.
+        """
+        today = today or datetime.now(DSE_TIMEZONE).date()
+        written = {}
+
+        if not self.is_archived(day, "historical"):
+            rows = await self.stock_service.get_historical_data(day.isoformat(), day.isoformat())
+            if rows or day < today:
+                # An empty past day is a market holiday; record it so it is not refetched
+                written["historical"] = await self._write(day, "historical", rows)
+            else:
+                logger.info("archive day end data not published yet date=%s", day)
+
+        if day == today and not self.is_archived(day, "latest"):
+            rows = await self.stock_service.get_stock_data()
+            written["latest"] = await self._write(day, "latest", rows)
+
+        if written:
+            logger.info("archived date=%s rows=%s", day, written)
+        return written
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[date, Dict[str, int]]:
+        """Archive every pending day; a failed day is retried on the next run"""
+        now = (now or datetime.now(DSE_TIMEZONE)).astimezone(DSE_TIMEZONE)
+        results = {}
+        for day in self.pending_days(now):
+            try:
+                results[day] = await self.archive_day(day, today=now.date())
+            except Exception as e:
+                logger.warning("archive failed date=%s error=%s", day, e)
+        return results
+
+    async def backfill(self, start: date, end: date) -> Tuple[Dict[date, Dict[str, int]], List[date]]:
+        """Archive every closed trading day from start to end inclusive.
+
+        A failed day does not stop the rest of the range; returns rows written
+        per archived day and the days that failed.
+        """
+        now = datetime.now(DSE_TIMEZONE)
+        today = now.date()
+        results = {}
+        failed = []
+        day = start
+        while day <= min(end, self.last_closed_day(now)):
+            if self.is_trading_day(day):
+                try:
+                    results[day] = await self.archive_day(day, today=today)
+                except Exception as e:
+                    logger.warning("archive failed date=%s error=%s", day, e)
+                    failed.append(day)
+            day += timedelta(days=1)
+        return results, failed
+
+    async def run_forever(self, interval: float = ARCHIVE_CONFIG["CHECK_INTERVAL"]) -> None:
+        """Check for pending days every interval seconds"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("archive run failed error=%s", e)
+            await asyncio.sleep(interval)
+
+    def read(self, day: date, table: str = "historical") -> List[Dict[str, Any]]:
+        """Decoded rows of an archived day"""
+        with Partition(self.partition_path(day, table)) as partition:
+            return decode_partition(partition)
@@ -0,0 +1,144 @@
+import logging
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+
+logger = logging.getLogger(__name__)
+
+dse_layout_changes = metrics.counter(
+    "dse_layout_changes_total", "DSE table header layouts that differ from the known schema", ["page"])
+
+SHARE_PRICE_HEADERS = (
+    "#", "TRADING CODE", "LTP*", "HIGH", "LOW", "CLOSEP*", "YCP*",
+    "CHANGE", "TRADE", "VALUE (mn)", "VOLUME"
+)
+
+HISTORICAL_HEADERS = (
+    "#", "DATE", "TRADING CODE", "LTP*", "HIGH", "LOW", "OPENP*",
+    "CLOSEP*", "YCP", "TRADE", "VALUE (mn)", "VOLUME"
+)
+
+
+class LayoutError(Exception):
+    """Scraped DSE page does not have the table layout we can parse"""
+
+
+class PageSchema:
+    """Known table layout of one DSE page"""
+
+    def __init__(self, name: str, headers: Tuple[str, ...], body_rows_only: bool = False,
+                 required: Iterable[str] = ("TRADING CODE",), allow_empty: bool = False):
+        self.name = name
+        self.headers = headers
+        # Data rows are either every row after the header or only rows inside <tbody>
+        self.body_rows_only = body_rows_only
+        self.required: FrozenSet[str] = frozenset(required)
+        # Day end archive queries legitimately return no rows on holidays
+        self.allow_empty = allow_empty
+
+    @property
+    def selector(self) -> str:
+        """CSS equivalent of the row lookup, used as a metrics label"""
+        return "table.table-bordered tbody tr" if self.body_rows_only else "table.table-bordered tr"
+
+    def data_rows(self, soup: "BeautifulSoup") -> List["Tag"]:
+        """Rows of the share tables, found by walking the tree rather than matching CSS"""
+        rows = []
+        for table in soup.find_all('table', class_='table-bordered'):
+            containers = table.find_all('tbody') if self.body_rows_only else (table,)
+            for container in containers:
+                rows.extend(container.find_all('tr'))
+        return rows if self.body_rows_only else rows[1:]
+
+
+PAGE_SCHEMAS: Dict[str, PageSchema] = {
+    "latest": PageSchema("latest", SHARE_PRICE_HEADERS),
+    "dsex": PageSchema("dsex", SHARE_PRICE_HEADERS),
+    "top30": PageSchema("top30", SHARE_PRICE_HEADERS),
+    "historical": PageSchema("historical", HISTORICAL_HEADERS, body_rows_only=True, allow_empty=True),
+}
+
+
+def _cell_text(cell: "Tag") -> str:
+    # Most cells hold one string, possibly inside a link; skip the generic text walk
+    text = cell.string
+    text = cell.get_text(strip=True) if text is None else text.strip()
+    return text.replace(',', '')
+
+
+class CompiledLayout:
+    """Fixed cell-index to field mapping for one observed header row"""
+
+    __slots__ = ('schema', 'headers', 'fields', 'indices')
+
+    def __init__(self, schema: PageSchema, headers: Tuple[str, ...]):
+        missing = schema.required.difference(headers)
+        if missing:
+            raise LayoutError(f"{schema.name} table is missing columns {sorted(missing)}; headers={list(headers)}")
+        self.schema = schema
+        self.headers = headers
+        # Unnamed header cells carry no data we can key on
+        columns = [(index, header) for index, header in enumerate(headers) if header]
+        self.indices = tuple(index for index, _ in columns)
+        self.fields = tuple(header for _, header in columns)
+
+    def extract(self, rows: Iterable["Tag"]) -> List[Dict[str, Any]]:
+        fields, indices = self.fields, self.indices
+        data = []
+        for row in rows:
+            cells = row.find_all('td', recursive=False)
+            count = len(cells)
+            if count == 0:
+                continue
+            values = [_cell_text(cells[index]) if index < count else "" for index in indices]
+            data.append(dict(zip(fields, values)))
+        return data
+
+
+class LayoutRegistry:
+    """Compiles each page's header layout once and flags layouts that change"""
+
+    def __init__(self, schemas: Optional[Dict[str, PageSchema]] = None):
+        self.schemas = schemas or PAGE_SCHEMAS
+        self._compiled: Dict[Tuple[str, Tuple[str, ...]], CompiledLayout] = {}
+        self._current: Dict[str, Tuple[str, ...]] = {}
+
+    @staticmethod
+    def read_headers(soup: "BeautifulSoup") -> Tuple[str, ...]:
+        table = soup.find('table', class_='shares-table')
+        if table is None:
+            raise LayoutError("share table not found")
+        first_row = table.find('tr')
+        headers = tuple(th.get_text(strip=True) for th in first_row.find_all('th')) if first_row else ()
+        if not headers:
+            raise LayoutError("share table has no header row")
+        return headers
+
+    def layout(self, page: str, headers: Tuple[str, ...]) -> CompiledLayout:
+        key = (page, headers)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            schema = self.schemas[page]
+            compiled = CompiledLayout(schema, headers)
+            self._compiled[key] = compiled
+            if headers != schema.headers:
+                dse_layout_changes.inc(page)
+                logger.warning("dse layout differs from schema page=%s expected=%s actual=%s",
+                               page, list(schema.headers), list(headers))
+        previous = self._current.get(page)
+        if previous is not None and previous != headers:
+            logger.warning("dse layout changed page=%s previous=%s actual=%s", page, list(previous), list(headers))
+        self._current[page] = headers
+        return compiled
+
+    def parse(self, soup: "BeautifulSoup", page: str) -> List[Dict[str, Any]]:
+        """Rows of a page's share table as dicts keyed by header"""
+        compiled = self.layout(page, self.read_headers(soup))
+        schema = compiled.schema
+        data = compiled.extract(schema.data_rows(soup))
+        if not data and not schema.allow_empty:
+            raise LayoutError(f"{page} table has no data rows")
+        return data
@@ -1,49 +1,84 @@
-import base64
+import logging
 from email import message
-from typing import List, Dict, Any
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from typing import List, Dict, Any, Optional
 from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
 from datetime import datetime
 import email.utils
 
 from models.schemas import EmailData
+from utils.email_cache import EmailCache
+from utils.mime import extract_body
+from utils.rate_limiter import GmailQuotaLimiter, gmail_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class GmailAPIError(Exception):
+    """Gmail API call failed after retries"""
+    def __init__(self, error: HttpError):
+        super().__init__(f"Gmail API error: {error}")
+        self.status_code = error.resp.status
 
 
 class GmailService:
-    def __init__(self, token_data: Dict[str, Any]):
+    def __init__(self, token_data: Dict[str, Any], cache: Optional[EmailCache] = None,
+                 user_email: Optional[str] = None, limiter: Optional[GmailQuotaLimiter] = None):
+        # Imported on first use; the discovery client is slow to import
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+
         self.credentials = Credentials.from_authorized_user_info(token_data)
         self.service = build('gmail', 'v1', credentials=self.credentials)
+        self.user_email = user_email or token_data.get('user_email')
+        # Messages are only cached when we know whose mailbox they belong to
+        self.cache = cache if self.user_email else None
+        self.limiter = limiter if limiter is not None else gmail_limiter
+    
+    def _execute(self, request: Any, method: str) -> Dict[str, Any]:
+        """Execute request within the user's Gmail quota budget"""
+        return self.limiter.execute(request, self.user_email or 'me', method)
     
     def get_recent_emails(self, max_results: int = 10) -> List[EmailData]:
         try:
-            results = self.service.users().messages().list(
+            results = self._execute(self.service.users().messages().list(
                 userId='me',
                 maxResults=max_results,
                 q='in:inbox'
-            ).execute()
+            ), 'messages.list')
             
             messages = results.get('messages', [])
-            emails = []
-            
-            for message in messages:
-                email_data = self._get_email_details(message['id'])
-                if email_data:
-                    emails.append(email_data)
-            
-            return emails
+            return self._hydrate_messages(messages)
             
         except HttpError as error:
-            raise Exception(f"Gmail API error: {error}")
+            raise GmailAPIError(error)
     
+    def _hydrate_messages(self, messages: List[Dict[str, Any]]) -> List[EmailData]:
+        """Resolve listed message IDs to EmailData, fetching only uncached ones"""
+        message_ids = [message['id'] for message in messages]
+        cached = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(self.user_email, message_ids)
+
+        emails = []
+        for message_id in message_ids:
+            email_data = cached.get(message_id)
+            if email_data is None:
+                email_data = self._get_email_details(message_id)
+                if email_data and self.cache is not None:
+                    self.cache.put(self.user_email, email_data)
+            if email_data:
+                emails.append(email_data)
+
+        return emails
+
     def _get_email_details(self, message_id: str) -> EmailData:
         try:
-            message = self.service.users().messages().get(
+            message = self._execute(self.service.users().messages().get(
                 userId='me',
                 id=message_id,
                 format='full'
-            ).execute()
+            ), 'messages.get')
             
             headers = message['payload'].get('headers', [])
             
@@ -51,17 +86,11 @@ class GmailService:
             subject = self._get_header_value(headers, 'Subject')
             date = self._get_header_value(headers, 'Date')
 
-            print(message)
+            logger.debug("gmail message fetched id=%s size=%s parts=%d", message_id,
+                         message.get('sizeEstimate'), len(message['payload'].get('parts', [])))
             
             snippet = message.get('snippet', '')
-            body = ''
-            payload = message.get('payload', {})
-            parts = payload.get('parts', [])
-            for part in parts:
-                if part['mimeType'] == 'text/plain':
-                    data = part['body'].get('data')
-                    if data:
-                        body = base64.urlsafe_b64decode(data).decode('utf-8')
+            body = extract_body(message.get('payload', {}))
             
             formatted_date = self._format_date(date)
             
@@ -74,7 +103,11 @@ class GmailService:
             )
             
         except HttpError as error:
-            print(f"Error getting email details for {message_id}: {error}")
+            # Quota and server errors survived retries; fail the whole listing
+            if self.limiter.is_retryable(error):
+                raise
+            logger.warning("gmail message fetch failed id=%s status=%s error=%s",
+                           message_id, error.resp.status, error)
             return None
     
     def _get_header_value(self, headers: List[Dict], name: str) -> str:
@@ -92,27 +125,21 @@ class GmailService:
     
     def search_emails(self, query: str, max_results: int = 10) -> List[EmailData]:
         try:
-            results = self.service.users().messages().list(
+            results = self._execute(self.service.users().messages().list(
                 userId='me',
                 maxResults=max_results,
                 q=query
-            ).execute()
+            ), 'messages.list')
             
             messages = results.get('messages', [])
-            emails = []
-            
-            for message in messages:
-                email_data = self._get_email_details(message['id'])
-                if email_data:
-                    emails.append(email_data)
-            
-            return emails
+            return self._hydrate_messages(messages)
             
         except HttpError as error:
-            raise Exception(f"Gmail API error: {error}")
+            raise GmailAPIError(error)
     
     def get_email_by_id(self, message_id: str) -> EmailData:
         try:
-            return self._get_email_details(message_id)
+            emails = self._hydrate_messages([{'id': message_id}])
+            return emails[0] if emails else None
         except HttpError as error:
-            raise Exception(f"Gmail API error: {error}")
\ No newline at end of file
+            raise GmailAPIError(error)
\ No newline at end of file
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import time
+from array import array
+from datetime import date, datetime, time as dt_time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import ARCHIVE_CONFIG, INTRADAY_CONFIG
+from services.stock_service import stock_service
+from utils.columnar import Partition, write_partition
+from utils.response import DSE_TIMEZONE
+from utils.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Prices are kept in poisha and times as seconds since Dhaka midnight so every
+# column fits a fixed-width integer array.
+SAMPLE_COLUMNS = (("time", "i"), ("ltp", "i"), ("volume", "q"))
+BAR_COLUMNS = (("start", "i"), ("open", "i"), ("high", "i"), ("low", "i"), ("close", "i"), ("volume", "q"))
+
+
+def _session_seconds(market_open: dt_time, market_close: dt_time) -> int:
+    return (market_close.hour - market_open.hour) * 3600 + (market_close.minute - market_open.minute) * 60
+
+
+class SymbolSeries:
+    """One trading code's samples for the day plus OHLC bars maintained as samples arrive"""
+
+    __slots__ = ('samples', 'bars', 'last_volume')
+
+    def __init__(self, sample_capacity: int, bar_capacities: Dict[int, int]):
+        self.samples = RingBuffer(SAMPLE_COLUMNS, sample_capacity)
+        self.bars = {interval: RingBuffer(BAR_COLUMNS, capacity) for interval, capacity in bar_capacities.items()}
+        self.last_volume: Optional[int] = None
+
+    def append(self, second: int, ltp: int, volume: int, at_open: bool = False) -> None:
+        self.samples.append(second, ltp, volume)
+        # Volume on the page is cumulative; a bar gets what traded since the previous sample.
+        # A first sample after the open only seeds the baseline, since what traded before it
+        # is unknown, and a drop (a corrected or reset page) reseeds it.
+        if self.last_volume is None:
+            traded = volume if at_open else 0
+        else:
+            traded = max(volume - self.last_volume, 0)
+        self.last_volume = volume
+
+        for interval, bars in self.bars.items():
+            start = second - second % interval
+            if bars.count and bars.last()[0] == start:
+                _, open_, high, low, _, bar_volume = bars.last()
+                bars.update_last(start, open_, max(high, ltp), min(low, ltp), ltp, bar_volume + traded)
+            else:
+                bars.append(start, ltp, ltp, ltp, ltp, traded)
+
+    @property
+    def nbytes(self) -> int:
+        return self.samples.nbytes + sum(bars.nbytes for bars in self.bars.values())
+
+
+class IntradayStore:
+    """Per-symbol intraday series built from successive latest share price snapshots.
+
+    Memory per symbol is fixed when its first sample arrives: one ring buffer
+    of samples and one of bars per interval, all sized for a trading session.
+    Everything is dropped when the Dhaka date changes.
+    """
+
+    def __init__(self, sample_capacity: int = INTRADAY_CONFIG["SAMPLE_CAPACITY"],
+                 bar_intervals: Optional[Dict[str, int]] = None,
+                 market_open: str = INTRADAY_CONFIG["MARKET_OPEN"],
+                 market_close: str = INTRADAY_CONFIG["MARKET_CLOSE"],
+                 trading_weekdays: Iterable[int] = ARCHIVE_CONFIG["TRADING_WEEKDAYS"],
+                 flush_dir: Optional[str] = INTRADAY_CONFIG["FLUSH_DIR"],
+                 open_window: int = INTRADAY_CONFIG["POLL_INTERVAL"]):
+        self.sample_capacity = sample_capacity
+        self.intervals = dict(bar_intervals or INTRADAY_CONFIG["BAR_INTERVALS"])
+        self.market_open = dt_time.fromisoformat(market_open)
+        self.market_close = dt_time.fromisoformat(market_close)
+        self.trading_weekdays = frozenset(trading_weekdays)
+        # A symbol's first sample this soon after the open carries the whole day's volume so far
+        self.open_until = self.market_open.hour * 3600 + self.market_open.minute * 60 + open_window
+        self.flush_dir = Path(flush_dir) if flush_dir else None
+        # Only the leader fetches and flushes in multi-worker mode; followers read its snapshots
+        self.writer = True
+        session = _session_seconds(self.market_open, self.market_close)
+        # A bar per interval of the session, plus the one the close falls in
+        self.bar_capacities = {
+            seconds: min(sample_capacity, session // seconds + 1) for seconds in self.intervals.values()
+        }
+        self.day: Optional[date] = None
+        self._midnight = 0.0
+        self._series: Dict[str, SymbolSeries] = {}
+        self._writes: Set["asyncio.Task[None]"] = set()
+
+    def in_session(self, moment: datetime) -> bool:
+        return (moment.weekday() in self.trading_weekdays
+                and self.market_open <= moment.time() <= self.market_close)
+
+    def _start_day(self, day: date) -> None:
+        if self.writer and self.flush_dir is not None and self.day is not None and self._series:
+            self._flush_soon()
+        self.day = day
+        self._midnight = datetime.combine(day, dt_time(), DSE_TIMEZONE).timestamp()
+        self._series = {}
+
+    def record(self, rows: Iterable[Dict[str, Any]], timestamp: Optional[float] = None) -> int:
+        """Append one sample per trading code; returns the number of samples added"""
+        moment = datetime.fromtimestamp(timestamp if timestamp is not None else time.time(), DSE_TIMEZONE)
+        if not self.in_session(moment):
+            return 0
+        if moment.date() != self.day:
+            self._start_day(moment.date())
+
+        second = int(moment.timestamp() - self._midnight)
+        at_open = second < self.open_until
+        added = 0
+        for row in rows:
+            code = row.get('TRADING CODE')
+            try:
+                ltp = round(float(row.get('LTP*', row.get('LTP'))) * 100)
+                volume = int(float(row.get('VOLUME')))
+            except (TypeError, ValueError):
+                continue
+            if not code or ltp <= 0:
+                continue
+            series = self._series.get(code)
+            if series is None:
+                series = self._series[code] = SymbolSeries(self.sample_capacity, self.bar_capacities)
+            series.append(second, ltp, volume, at_open)
+            added += 1
+        return added
+
+    def record_snapshot(self, snapshot) -> None:
+        """Snapshot listener for the latest share prices page"""
+        self.record(snapshot.data, snapshot.created_at)
+
+    def symbols(self) -> List[str]:
+        return sorted(self._series)
+
+    def series(self, symbol: str) -> Optional[Dict[str, List]]:
+        """Sample times (epoch seconds), LTPs and cumulative volumes, oldest first"""
+        series = self._series.get(symbol.upper())
+        if series is None:
+            return None
+        columns = series.samples.columns()
+        midnight = int(self._midnight)
+        return {
+            "time": [midnight + second for second in columns["time"]],
+            "ltp": [ltp / 100 for ltp in columns["ltp"]],
+            "volume": columns["volume"],
+        }
+
+    def bars(self, symbol: str, interval: str) -> Optional[List[Dict[str, Any]]]:
+        """OHLC bars for one of the configured intervals, oldest first"""
+        series = self._series.get(symbol.upper())
+        if series is None:
+            return None
+        columns = series.bars[self.intervals[interval]].columns()
+        midnight = int(self._midnight)
+        return [
+            {
+                "time": midnight + start,
+                "open": open_ / 100,
+                "high": high / 100,
+                "low": low / 100,
+                "close": close / 100,
+                "volume": volume,
+            }
+            for start, open_, high, low, close, volume in zip(*columns.values())
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def partition_path(self, day: date) -> Path:
+        return self.flush_dir / f"{day:%Y}" / day.isoformat() / "intraday.col"
+
+    def _flush_payload(self) -> Tuple[Path, Dict[str, array], Dict[str, Any]]:
+        """Copy of the day's samples as columns, taken on the event loop so writers never see a partial update"""
+        codes = sorted(self._series)
+        columns = {name: array(typecode) for name, typecode in (("code", "H"),) + SAMPLE_COLUMNS}
+        for index, code in enumerate(codes):
+            samples = self._series[code].samples.columns()
+            columns["code"].extend([index] * len(samples["time"]))
+            for name, _ in SAMPLE_COLUMNS:
+                columns[name].extend(samples[name])
+        metadata = {
+            "table": "intraday",
+            "date": self.day.isoformat(),
+            "codes": codes,
+            "scales": {"time": 1, "ltp": 100, "volume": 1},
+        }
+        return self.partition_path(self.day), columns, metadata
+
+    def flush(self) -> Optional[Path]:
+        """Write the day's samples to one columnar partition, replacing the previous flush"""
+        if self.flush_dir is None or self.day is None or not self.writer:
+            return None
+        path, columns, metadata = self._flush_payload()
+        write_partition(path, columns, metadata)
+        logger.info("intraday flushed date=%s symbols=%d samples=%d",
+                    self.day, len(metadata["codes"]), len(columns["code"]))
+        return path
+
+    async def _write(self, path: Path, columns: Dict[str, array], metadata: Dict[str, Any]) -> None:
+        try:
+            await asyncio.to_thread(write_partition, path, columns, metadata)
+        except Exception as e:
+            logger.warning("intraday flush failed date=%s error=%s", metadata["date"], e)
+
+    def _flush_soon(self) -> None:
+        """Flush the day's samples from a worker thread when called on the event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        task = loop.create_task(self._write(*self._flush_payload()))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def restore(self, day: Optional[date] = None) -> int:
+        """Rebuild a day's series from its flushed partition, e.g. after a restart"""
+        day = day or datetime.now(DSE_TIMEZONE).date()
+        if self.flush_dir is None or not self.partition_path(day).exists():
+            return 0
+        self.day = None
+        self._start_day(day)
+        with Partition(self.partition_path(day)) as partition:
+            codes = partition.metadata["codes"]
+            code_column, times = partition.column("code"), partition.column("time")
+            ltps, volumes = partition.column("ltp"), partition.column("volume")
+            for row in range(partition.rows):
+                code = codes[code_column[row]]
+                series = self._series.get(code)
+                if series is None:
+                    series = self._series[code] = SymbolSeries(self.sample_capacity, self.bar_capacities)
+                series.append(times[row], ltps[row], volumes[row], times[row] < self.open_until)
+            restored = partition.rows
+        logger.info("intraday restored date=%s samples=%d", day, restored)
+        return restored
+
+    async def run_poller(self, stock_service, interval: float = INTRADAY_CONFIG["POLL_INTERVAL"],
+                         flush_interval: float = INTRADAY_CONFIG["FLUSH_INTERVAL"]) -> None:
+        """Poll the latest share prices during the session so samples keep arriving without traffic.
+
+        Samples are recorded by the snapshot listener, so polls that find
+        unchanged data add nothing. A follower only reads the snapshots the
+        leader publishes.
+        """
+        last_flush = time.monotonic()
+        while True:
+            if self.in_session(datetime.now(DSE_TIMEZONE)):
+                try:
+                    if self.writer:
+                        await stock_service.get_snapshot("latest")
+                    else:
+                        await stock_service.load_shared_snapshot("latest")
+                except Exception as e:
+                    logger.warning("intraday poll failed error=%s", e)
+            if (self.writer and self.flush_dir is not None and self.day is not None
+                    and time.monotonic() - last_flush >= flush_interval):
+                await self._write(*self._flush_payload())
+                last_flush = time.monotonic()
+            await asyncio.sleep(interval)
+
+
+intraday_store = IntradayStore()
+stock_service.add_snapshot_listener("latest", intraday_store.record_snapshot)
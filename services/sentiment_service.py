@@ -0,0 +1,207 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import SENTIMENT_CONFIG
+from models.schemas import EmailData, EmailSentiment, ScoredEmail
+from utils.aho_corasick import SymbolIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Compact finance-oriented lexicon; weights are relative intensities
+POSITIVE_WORDS = {
+    "gain": 1.0, "gains": 1.0, "gained": 1.0, "rise": 1.0, "rises": 1.0, "rose": 1.0,
+    "rising": 1.0, "rally": 1.5, "rallied": 1.5, "surge": 2.0, "surged": 2.0,
+    "soar": 2.0, "soared": 2.0, "jump": 1.5, "jumped": 1.5, "up": 0.5, "higher": 1.0,
+    "high": 0.5, "record": 1.0, "profit": 1.0, "profits": 1.0, "profitable": 1.0,
+    "growth": 1.0, "grow": 1.0, "grew": 1.0, "strong": 1.0, "stronger": 1.0,
+    "bullish": 2.0, "buy": 0.5, "upgrade": 1.5, "upgraded": 1.5, "outperform": 1.5,
+    "beat": 1.0, "dividend": 1.0, "bonus": 1.0, "recovery": 1.0, "recovered": 1.0,
+    "rebound": 1.0, "rebounded": 1.0, "positive": 1.0, "boost": 1.0, "boosted": 1.0,
+    "improve": 1.0, "improved": 1.0, "expansion": 1.0, "optimism": 1.5,
+    "optimistic": 1.5, "approval": 1.0, "approved": 1.0, "robust": 1.0, "steady": 0.5,
+}
+
+NEGATIVE_WORDS = {
+    "loss": 1.0, "losses": 1.0, "lose": 1.0, "lost": 1.0, "fall": 1.0, "falls": 1.0,
+    "fell": 1.0, "falling": 1.0, "drop": 1.0, "dropped": 1.0, "decline": 1.0,
+    "declined": 1.0, "slump": 2.0, "slumped": 2.0, "plunge": 2.0, "plunged": 2.0,
+    "crash": 2.5, "crashed": 2.5, "down": 0.5, "lower": 1.0, "low": 0.5, "weak": 1.0,
+    "weaker": 1.0, "bearish": 2.0, "sell": 0.5, "selloff": 1.5, "downgrade": 1.5,
+    "downgraded": 1.5, "underperform": 1.5, "miss": 1.0, "missed": 1.0, "default": 2.0,
+    "fraud": 2.5, "penalty": 1.5, "fined": 1.5, "suspended": 1.5, "halt": 1.5,
+    "halted": 1.5, "negative": 1.0, "risk": 0.5, "risks": 0.5, "concern": 1.0,
+    "concerns": 1.0, "pressure": 1.0, "volatile": 0.5, "volatility": 0.5,
+    "uncertainty": 1.0, "pessimism": 1.5, "pessimistic": 1.5, "crisis": 2.0,
+    "debt": 0.5, "delisted": 2.0, "correction": 1.0, "profit-taking": 0.5,
+}
+
+NEGATIONS = frozenset({"not", "no", "never", "without", "hardly", "nor", "neither", "barely"})
+
+INTENSIFIERS = {
+    "sharply": 1.5, "strongly": 1.5, "significantly": 1.3, "substantially": 1.3,
+    "heavily": 1.3, "slightly": 0.5, "marginally": 0.5, "modestly": 0.7,
+}
+
+NEGATION_WINDOW = 3
+# Same normalisation constant as VADER: maps raw weight sums into (-1, 1)
+NORMALIZATION_ALPHA = 15.0
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:-[a-z]+)?")
+
+
+class SentimentScorer:
+    """Lexicon-based sentiment scorer with negation and intensifier handling"""
+
+    def __init__(self, neutral_threshold: float = SENTIMENT_CONFIG["NEUTRAL_THRESHOLD"]):
+        self.neutral_threshold = neutral_threshold
+        # One lookup per token: positive weights > 0, negative weights < 0
+        self.lexicon: Dict[str, float] = {
+            **POSITIVE_WORDS,
+            **{word: -weight for word, weight in NEGATIVE_WORDS.items()}
+        }
+
+    def score_text(self, text: str) -> Tuple[float, int, int]:
+        """Return (score, positive hits, negative hits) for text"""
+        lexicon = self.lexicon
+        total = 0.0
+        positive = negative = 0
+        negate_until = -1
+        boost = 1.0
+
+        for index, token in enumerate(_TOKEN_RE.findall(text.lower())):
+            if token in NEGATIONS:
+                negate_until = index + NEGATION_WINDOW
+                continue
+            intensity = INTENSIFIERS.get(token)
+            if intensity is not None:
+                boost = intensity
+                continue
+
+            weight = lexicon.get(token)
+            if weight is None:
+                continue
+            weight *= boost
+            boost = 1.0
+            if index <= negate_until:
+                weight = -weight
+            if weight > 0:
+                positive += 1
+            else:
+                negative += 1
+            total += weight
+
+        score = total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+        return score, positive, negative
+
+    def label(self, score: float) -> str:
+        if score >= self.neutral_threshold:
+            return "positive"
+        if score <= -self.neutral_threshold:
+            return "negative"
+        return "neutral"
+
+
+class SentimentService:
+    """Scores emails and tags them with DSE trading codes, caching per message ID"""
+
+    def __init__(self, scorer: Optional[SentimentScorer] = None,
+                 max_entries: int = SENTIMENT_CONFIG["CACHE_MAX_ENTRIES"],
+                 refresh_seconds: float = SENTIMENT_CONFIG["SYMBOL_REFRESH_SECONDS"],
+                 retry_seconds: float = SENTIMENT_CONFIG["SYMBOL_RETRY_SECONDS"]):
+        self.scorer = scorer or SentimentScorer()
+        self.max_entries = max_entries
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.symbol_index = SymbolIndex(())
+        self.index_version = 0
+        self.symbols_loaded_at: Optional[float] = None
+        self.symbols_failed_at: Optional[float] = None
+        # message_id -> (index_version, sentiment)
+        self._results: "OrderedDict[str, Tuple[int, EmailSentiment]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def set_symbols(self, symbols: Iterable[str]) -> bool:
+        """Rebuild the symbol index if the set of codes changed"""
+        symbols = frozenset(symbol.strip().upper() for symbol in symbols if symbol and symbol.strip())
+        self.symbols_loaded_at = time.monotonic()
+        if symbols == self.symbol_index.symbols:
+            return False
+        index = SymbolIndex(symbols)
+        with self._lock:
+            self.symbol_index = index
+            self.index_version += 1
+        return True
+
+    async def refresh_symbols(self, stock_service, force: bool = False) -> None:
+        """Reload trading codes from the cached latest DSE snapshot when stale"""
+        now = time.monotonic()
+        if not force:
+            if self.symbols_loaded_at is not None and now - self.symbols_loaded_at < self.refresh_seconds:
+                return
+            # While DSE is down, requests do not each wait out a failing scrape
+            if self.symbols_failed_at is not None and now - self.symbols_failed_at < self.retry_seconds:
+                return
+        try:
+            snapshot = await stock_service.get_snapshot("latest")
+        except Exception as e:
+            self.symbols_failed_at = time.monotonic()
+            logger.warning("sentiment symbol refresh failed error=%s", e)
+            return
+        self.symbols_failed_at = None
+        self.set_symbols(row.get('TRADING CODE', '') for row in snapshot.data)
+
+    def _score(self, email_data: EmailData) -> EmailSentiment:
+        text = f"{email_data.subject}\n{email_data.snippet}"
+        score, positive, negative = self.scorer.score_text(text)
+        return EmailSentiment(
+            score=round(score, 4),
+            label=self.scorer.label(score),
+            positive=positive,
+            negative=negative,
+            symbols=sorted(self.symbol_index.find(text))
+        )
+
+    def score_email(self, email_data: EmailData) -> EmailSentiment:
+        """Score one email, reusing the cached result for its message ID"""
+        version = self.index_version
+        with self._lock:
+            cached = self._results.get(email_data.id)
+            if cached is not None and cached[0] == version:
+                self._results.move_to_end(email_data.id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        sentiment = self._score(email_data)
+
+        with self._lock:
+            self._results[email_data.id] = (version, sentiment)
+            self._results.move_to_end(email_data.id)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return sentiment
+
+    def score_emails(self, emails: List[EmailData]) -> List[ScoredEmail]:
+        """Score a batch of emails"""
+        return [
+            ScoredEmail(**email_data.model_dump(), sentiment=self.score_email(email_data))
+            for email_data in emails
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._results),
+            "symbols": len(self.symbol_index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
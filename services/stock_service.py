@@ -1,12 +1,26 @@
 
 # import ssl
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple
 from urllib.parse import urlencode
 
-from config import DHAKA_STOCK_URLS
+import orjson
+
+from config import CLUSTER_CONFIG, DHAKA_STOCK_URLS, SNAPSHOT_CONFIG
+from utils.metrics import dse_fetch_seconds, dse_html_parse_seconds, dse_parse_rows, dse_parse_seconds
+from services.dse_layout import LayoutRegistry
+from utils.shared_snapshots import SharedSnapshots
+from utils.snapshot import Snapshot
+
+if TYPE_CHECKING:
+    # aiohttp and bs4 are imported on first fetch to keep worker startup fast
+    import aiohttp
+    from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
 
 class Quote:
     def __init__(self, symbol: str = "", ltp: str = "", high: str = "", 
@@ -42,13 +56,43 @@ class HistData:
         self.value = value
         self.volume = volume
 
+def _store_lru(cache: "OrderedDict[Tuple, Snapshot]", key: Tuple, snapshot: Snapshot, max_entries: int) -> None:
+    cache[key] = snapshot
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
 class StockDataService:
     """Service class for fetching and parsing stock data"""
-    def __init__(self):
+    # Snapshot kind -> method that fetches it
+    SNAPSHOT_LOADERS = {
+        "latest": "get_stock_data",
+        "dsex": "get_dsex_data",
+        "top30": "get_top30",
+        "historical": "get_historical_data"
+    }
+
+    def __init__(self, shared: Optional["SharedSnapshots"] = None):
         self.session = None
+        # Snapshots published by other workers, in multi-worker mode
+        self.shared = shared
+        self.layouts = LayoutRegistry()
+        self._snapshots: "OrderedDict[Tuple, Snapshot]" = OrderedDict()
+        # Per-symbol views of a page, bounded separately from the pages themselves
+        self._symbol_snapshots: "OrderedDict[Tuple, Snapshot]" = OrderedDict()
+        # Snapshot key -> fetch in progress, shared by concurrent callers
+        self._inflight: Dict[Tuple, "asyncio.Future[Snapshot]"] = {}
+        self.snapshot_hits = 0
+        self.snapshot_misses = 0
+        self.snapshot_shared = 0
+        # Snapshot kind -> callbacks run whenever a fetch returns changed data
+        self._listeners: Dict[str, List[Callable[[Snapshot], None]]] = {}
     
-    async def _get_session(self) -> aiohttp.ClientSession:
+    async def _get_session(self) -> "aiohttp.ClientSession":
         """Get or create aiohttp session with retry configuration"""
+        import aiohttp
+
         if self.session is None or self.session.closed:
             # ssl_context = ssl.create_default_context(cafile=certifi.where())
             timeout = aiohttp.ClientTimeout(total=30)
@@ -63,117 +107,89 @@ class StockDataService:
         return self.session
     
     async def _fetch_with_retry(self, url: str, params: Dict = None, max_retries: int = 3) -> str:
+        import aiohttp
+
         session = await self._get_session()
+        url_label = url.split('?', 1)[0]
         
         for attempt in range(max_retries):
+            started = time.perf_counter()
             try:
                 async with session.get(url, params=params) as response:
                     if response.status == 200:
-                        return await response.text()
+                        text = await response.text()
+                        dse_fetch_seconds.observe(time.perf_counter() - started, url_label, "ok")
+                        return text
                     else:
                         raise aiohttp.ClientError(f"HTTP {response.status}")
             except Exception as e:
+                dse_fetch_seconds.observe(time.perf_counter() - started, url_label, "error")
                 if attempt == max_retries - 1:
-                    print(f"Failed to fetch {url} after {max_retries} attempts: {e}")
+                    logger.error("dse fetch failed url=%s attempts=%d error=%s", url_label, max_retries, e)
                     raise
                 
                 wait_time = 2 ** attempt  # Exponential backoff
+                logger.warning("dse fetch retry url=%s attempt=%d wait=%ds error=%s",
+                               url_label, attempt + 1, wait_time, e)
                 await asyncio.sleep(wait_time)
         
         raise Exception(f"Failed to fetch {url}")
     
-    async def _fetch_and_parse_html(self, url: str, params: Dict = None) -> BeautifulSoup:
+    async def _fetch_and_parse_html(self, url: str, params: Dict = None) -> "BeautifulSoup":
         """Fetch URL and return BeautifulSoup object"""
+        from bs4 import BeautifulSoup
+
         try:
             html_content = await self._fetch_with_retry(url, params)
-            return BeautifulSoup(html_content, 'html.parser')
+            with dse_html_parse_seconds.time(url.split('?', 1)[0]):
+                return BeautifulSoup(html_content, 'html.parser')
         except Exception as e:
-            print(f"Error in _fetch_and_parse_html for {url}: {e}")
+            logger.error("dse fetch and parse failed url=%s error=%s", url, e)
             raise
     
-    def _get_current_trading_codes(self, soup: BeautifulSoup) -> List[str]:
-        """Extract table headers from the first row"""
-        headers = []
-        table = soup.select_one('table.shares-table')
-        if table:
-            first_row = table.find('tr')
-            if first_row:
-                ths = first_row.find_all('th')
-                headers = [th.get_text(strip=True) for th in ths]
-        return headers
-    
-
-    async def _parse_table_rows(self, soup: BeautifulSoup, selector: str = "table.table-bordered tr", 
-                               skip_first_row: bool = True) -> List[Dict[str, Any]]:
-        """Parse table rows and return list of dictionaries"""
-        headers = self._get_current_trading_codes(soup)
-        data = []
-        
-        rows = soup.select(selector)
-        
-        for index, row in enumerate(rows):
-            if index == 0 and skip_first_row:
-                continue
-            
-            tds = row.find_all('td')
-            if len(tds) == 0:
-                continue
-                
-            row_data = {}
-            
-            for idx, header in enumerate(headers):
-                if idx < len(tds):
-                    cell_text = tds[idx].get_text(strip=True).replace(',', '')
-                    row_data[header] = cell_text
-                else:
-                    row_data[header] = ""
-            
-            if row_data:  # Only add non-empty rows
-                data.append(row_data)
-        
+    def _parse_table_rows(self, soup: "BeautifulSoup", page: str) -> List[Dict[str, Any]]:
+        """Parse a page's share table with its compiled layout, raising LayoutError if it is broken"""
+        started = time.perf_counter()
+        selector = self.layouts.schemas[page].selector
+        data = self.layouts.parse(soup, page)
+        dse_parse_seconds.observe(time.perf_counter() - started, selector)
+        dse_parse_rows.observe(len(data), selector)
         return data
     
     async def get_stock_data(self) -> List[Dict[str, Any]]:
         """Get latest stock data"""
         url = DHAKA_STOCK_URLS["LATEST_DATA"]
         soup = await self._fetch_and_parse_html(url)
-        return await self._parse_table_rows(soup, "table.table-bordered tr")
+        return self._parse_table_rows(soup, "latest")
     
     async def get_dsex_data(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get DSEX data with optional symbol filter"""
         url = DHAKA_STOCK_URLS["DSEX"]
         
-        try:
-            soup = await self._fetch_and_parse_html(url)
-            data = await self._parse_table_rows(soup, "table.table-bordered tr")
-            
-            if symbol:
-                # Filter by trading code (case-insensitive)
-                filtered_data = []
-                for item in data:
-                    trading_code = item.get('TRADING CODE', '')
-                    if trading_code and trading_code.upper() == symbol.upper():
-                        filtered_data.append(item)
-                return filtered_data
-            
-            return data
-            
-        except Exception as e:
-            print(f"Error fetching DSEX data: {e}")
-            return []
+        soup = await self._fetch_and_parse_html(url)
+        data = self._parse_table_rows(soup, "dsex")
+        
+        if symbol:
+            return self._filter_by_symbol(data, symbol)
+        
+        return data
+    
+    def _filter_by_symbol(self, data: List[Dict[str, Any]], symbol: str) -> List[Dict[str, Any]]:
+        """Filter rows by trading code (case-insensitive)"""
+        filtered_data = []
+        for item in data:
+            trading_code = item.get('TRADING CODE', '')
+            if trading_code and trading_code.upper() == symbol.upper():
+                filtered_data.append(item)
+        return filtered_data
     
     async def get_top30(self) -> List[Dict[str, Any]]:
         """Get top 30 stocks data"""
         url = DHAKA_STOCK_URLS["TOP_30"]
-        print(f"Fetching Top 30 data from {url}")
+        logger.debug("dse top30 fetch url=%s", url)
         
-        try:
-            soup = await self._fetch_and_parse_html(url)
-            return await self._parse_table_rows(soup, "table.table-bordered tr")
-            
-        except Exception as e:
-            print(f"Error fetching Top 30 data: {e}")
-            return []
+        soup = await self._fetch_and_parse_html(url)
+        return self._parse_table_rows(soup, "top30")
     
     async def get_historical_data(self, start: str, end: str, code: str = "All Instrument") -> List[Dict[str, Any]]:
         """Get historical stock data"""
@@ -189,7 +205,133 @@ class StockDataService:
         full_url = f"{url}?{urlencode(params)}"
         
         soup = await self._fetch_and_parse_html(full_url)
-        return await self._parse_table_rows(soup, "table.table-bordered tbody tr", skip_first_row=False)
+        return self._parse_table_rows(soup, "historical")
+    
+    async def get_snapshot(self, kind: str, *args) -> Snapshot:
+        """Get cached snapshot of a DSE page, fetching it again once its TTL expires.
+
+        kind is one of "latest", "dsex", "top30" or "historical"; args are
+        passed to the matching get_* method. When a refetch returns the same
+        data, the existing snapshot and its serialized body are kept.
+        """
+        if kind == "dsex" and args:
+            if args[0]:
+                return await self._get_symbol_snapshot(args[0].upper())
+            args = ()
+
+        key = (kind, *args)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and snapshot.is_fresh(SNAPSHOT_CONFIG["TTL"][kind], time.time()):
+            self._snapshots.move_to_end(key)
+            self.snapshot_hits += 1
+            return snapshot
+
+        # Concurrent misses for the same page wait on a single upstream fetch
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.snapshot_shared += 1
+            return await asyncio.shield(inflight)
+
+        self.snapshot_misses += 1
+        task = asyncio.ensure_future(self._refresh_snapshot(key, kind, args, snapshot))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._fetch_done(key, done))
+        # Shielded so a cancelled caller does not abort the fetch others are waiting on
+        return await asyncio.shield(task)
+
+    def _fetch_done(self, key: Tuple, task: "asyncio.Future[Snapshot]") -> None:
+        self._inflight.pop(key, None)
+        # Every waiter may have been cancelled; retrieve the error so it is not reported as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("snapshot fetch failed key=%s error=%s", key, task.exception())
+
+    async def _refresh_snapshot(self, key: Tuple, kind: str, args: Tuple,
+                                snapshot: Optional[Snapshot]) -> Snapshot:
+        if self.shared is not None:
+            return await self._refresh_shared(key, kind, args, snapshot)
+        return await self._fetch_snapshot(key, kind, args, snapshot)
+
+    async def _refresh_shared(self, key: Tuple, kind: str, args: Tuple,
+                              snapshot: Optional[Snapshot]) -> Snapshot:
+        """Use a fresh snapshot another worker published, else fetch it while holding the key's lock"""
+        ttl = SNAPSHOT_CONFIG["TTL"][kind]
+        shared = await asyncio.to_thread(self.shared.load, key)
+        if shared is not None and shared.is_fresh(ttl, time.time()):
+            return self._adopt_snapshot(key, kind, shared, snapshot)
+
+        lock = self.shared.lock(key)
+        await lock.acquire_async(CLUSTER_CONFIG["LOCK_POLL"])
+        try:
+            # Whoever held the lock may have just refreshed it
+            shared = await asyncio.to_thread(self.shared.load, key)
+            if shared is not None and shared.is_fresh(ttl, time.time()):
+                return self._adopt_snapshot(key, kind, shared, snapshot)
+            previous = shared or snapshot
+            refreshed = await self._fetch_snapshot(key, kind, args, previous)
+            if refreshed is previous and previous is not snapshot:
+                # Unchanged upstream, but new to this worker
+                self._notify(kind, refreshed)
+            await asyncio.to_thread(self.shared.publish, key, refreshed)
+            return refreshed
+        finally:
+            lock.release()
+
+    def _adopt_snapshot(self, key: Tuple, kind: str, shared: Snapshot,
+                        snapshot: Optional[Snapshot]) -> Snapshot:
+        if shared is not snapshot:
+            self._notify(kind, shared)
+        self._store_snapshot(key, shared)
+        return shared
+
+    async def load_shared_snapshot(self, kind: str, *args) -> Optional[Snapshot]:
+        """Take up the latest snapshot another worker published, without fetching upstream"""
+        key = (kind, *args)
+        shared = await asyncio.to_thread(self.shared.load, key)
+        if shared is None:
+            return None
+        return self._adopt_snapshot(key, kind, shared, self._snapshots.get(key))
+
+    async def _fetch_snapshot(self, key: Tuple, kind: str, args: Tuple,
+                              snapshot: Optional[Snapshot]) -> Snapshot:
+        data = await getattr(self, self.SNAPSHOT_LOADERS[kind])(*args)
+        data_bytes = orjson.dumps(data)
+        now = time.time()
+        if snapshot is not None and snapshot.data_bytes == data_bytes:
+            snapshot.checked_at = now
+        else:
+            snapshot = Snapshot(data, data_bytes, now)
+            self._notify(kind, snapshot)
+        self._store_snapshot(key, snapshot)
+        return snapshot
+
+    def add_snapshot_listener(self, kind: str, callback: Callable[[Snapshot], None]) -> None:
+        """Call callback with every new snapshot of kind; unchanged refetches are not reported"""
+        self._listeners.setdefault(kind, []).append(callback)
+
+    def _notify(self, kind: str, snapshot: Snapshot) -> None:
+        for callback in self._listeners.get(kind, ()):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.warning("snapshot listener failed kind=%s error=%s", kind, e)
+    
+    async def _get_symbol_snapshot(self, symbol: str) -> Snapshot:
+        """DSEX rows for one symbol, derived from the cached full DSEX snapshot"""
+        source = await self.get_snapshot("dsex")
+        key = ("dsex", symbol)
+        snapshot = self._symbol_snapshots.get(key)
+        if snapshot is None or snapshot.source is not source:
+            data = self._filter_by_symbol(source.data, symbol)
+            snapshot = Snapshot(data, created_at=source.created_at, source=source)
+        _store_lru(self._symbol_snapshots, key, snapshot, SNAPSHOT_CONFIG["MAX_SYMBOL_ENTRIES"])
+        return snapshot
+    
+    def cache_entries(self) -> Dict[str, int]:
+        """Number of cached page snapshots and derived per-symbol snapshots"""
+        return {"pages": len(self._snapshots), "symbols": len(self._symbol_snapshots)}
+
+    def _store_snapshot(self, key: Tuple, snapshot: Snapshot) -> None:
+        _store_lru(self._snapshots, key, snapshot, SNAPSHOT_CONFIG["MAX_ENTRIES"])
     
     async def close(self):
         """Close the aiohttp session"""
@@ -199,4 +341,10 @@ class StockDataService:
     def __del__(self):
         """Cleanup when object is destroyed"""
         if self.session and not self.session.closed:
-            asyncio.create_task(self.session.close())
\ No newline at end of file
+            asyncio.create_task(self.session.close())
+
+
+# Shared by the routers and background jobs of this process
+stock_service = StockDataService(
+    SharedSnapshots(CLUSTER_CONFIG["SHARED_DIR"]) if CLUSTER_CONFIG["SHARED_DIR"] else None
+)
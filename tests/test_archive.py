@@ -0,0 +1,145 @@
+import asyncio
+from array import array
+from datetime import date, datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from services.archive_service import HISTORICAL_COLUMNS, ArchiveService, encode_rows
+from utils.columnar import MISSING, Partition, write_partition
+from utils.response import DSE_TIMEZONE
+
+
+HISTORICAL_ROWS = [
+    {"#": "1", "DATE": "2024-01-02", "TRADING CODE": "GP", "LTP*": "250.1", "HIGH": "252",
+     "LOW": "249.5", "OPENP*": "250", "CLOSEP*": "250.1", "YCP": "249.9", "TRADE": "1200",
+     "VALUE (mn)": "45.125", "VOLUME": "180432"},
+    {"#": "2", "DATE": "2024-01-02", "TRADING CODE": "ACI", "LTP*": "210.5", "HIGH": "--",
+     "LOW": "", "OPENP*": "209", "CLOSEP*": "210.5", "YCP": "208", "TRADE": "350",
+     "VALUE (mn)": "3.5", "VOLUME": "16654"},
+]
+
+LATEST_ROWS = [
+    {"#": "1", "TRADING CODE": "GP", "LTP*": "250.1", "HIGH": "252", "LOW": "249.5",
+     "CLOSEP*": "250.1", "YCP*": "249.9", "CHANGE": "0.2", "TRADE": "1200",
+     "VALUE (mn)": "45.125", "VOLUME": "180432"},
+]
+
+# Tuesday 2 January 2024, after and before the 15:00 archive time
+AFTER_CLOSE = datetime(2024, 1, 2, 16, 0, tzinfo=DSE_TIMEZONE)
+BEFORE_CLOSE = datetime(2024, 1, 2, 11, 0, tzinfo=DSE_TIMEZONE)
+
+
+def _service(tmp_path, backfill_days=7):
+    stock_service = Mock()
+    stock_service.get_historical_data = AsyncMock(return_value=list(HISTORICAL_ROWS))
+    stock_service.get_stock_data = AsyncMock(return_value=list(LATEST_ROWS))
+    return ArchiveService(stock_service, root=str(tmp_path), backfill_days=backfill_days)
+
+
+def test_partition_round_trip_is_memory_mapped(tmp_path):
+    path = tmp_path / "day" / "prices.col"
+    write_partition(path, {"code": array("H", [0, 1, 2]), "ltp": array("i", [25010, -5, MISSING["i"]])},
+                    {"codes": ["A", "B", "C"]})
+
+    with Partition(path) as partition:
+        ltp = partition.column("ltp")
+        assert isinstance(ltp, memoryview)
+        assert list(ltp) == [25010, -5, MISSING["i"]]
+        assert partition.rows == 3
+        assert partition.metadata == {"codes": ["A", "B", "C"]}
+    assert [p.name for p in path.parent.iterdir()] == ["prices.col"]
+
+
+def test_write_partition_rejects_ragged_columns(tmp_path):
+    with pytest.raises(ValueError):
+        write_partition(tmp_path / "bad.col", {"a": array("i", [1]), "b": array("i", [1, 2])})
+    assert not (tmp_path / "bad.col").exists()
+
+
+def test_encode_rows_uses_fixed_point_and_code_dictionary():
+    columns, codes = encode_rows(HISTORICAL_ROWS, HISTORICAL_COLUMNS)
+
+    assert codes == ["ACI", "GP"]
+    assert list(columns["code"]) == [1, 0]
+    assert list(columns["ltp"]) == [25010, 21050]
+    assert list(columns["value_mn"]) == [45125, 3500]
+    assert list(columns["high"]) == [25200, MISSING["i"]]
+    assert list(columns["low"]) == [24950, MISSING["i"]]
+
+
+def test_pending_days_skip_weekends_archived_days_and_open_market(tmp_path):
+    service = _service(tmp_path)
+
+    # 2023-12-29 and 2023-12-30 are Friday and Saturday
+    assert service.pending_days(AFTER_CLOSE) == [
+        date(2023, 12, 26), date(2023, 12, 27), date(2023, 12, 28),
+        date(2023, 12, 31), date(2024, 1, 1), date(2024, 1, 2)
+    ]
+    assert service.pending_days(BEFORE_CLOSE)[-1] == date(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_archive_day_is_idempotent(tmp_path):
+    service = _service(tmp_path)
+
+    written = await service.archive_day(date(2024, 1, 2), today=date(2024, 1, 2))
+    again = await service.archive_day(date(2024, 1, 2), today=date(2024, 1, 2))
+
+    assert written == {"historical": 2, "latest": 1}
+    assert again == {}
+    service.stock_service.get_historical_data.assert_awaited_once_with("2024-01-02", "2024-01-02")
+    assert service.read(date(2024, 1, 2))[1] == {
+        "code": "ACI", "ltp": 210.5, "high": None, "low": None, "open": 209.0, "close": 210.5,
+        "ycp": 208.0, "trade": 350, "value_mn": 3.5, "volume": 16654
+    }
+    assert service.read(date(2024, 1, 2), "latest")[0]["change"] == 0.2
+
+
+@pytest.mark.asyncio
+async def test_empty_day_end_data_is_retried_today_and_recorded_as_holiday_later(tmp_path):
+    service = _service(tmp_path)
+    service.stock_service.get_historical_data.return_value = []
+
+    today = await service.archive_day(date(2024, 1, 2), today=date(2024, 1, 2))
+    past = await service.archive_day(date(2024, 1, 1), today=date(2024, 1, 2))
+
+    assert "historical" not in today
+    assert past == {"historical": 0}
+    assert service.read(date(2024, 1, 1)) == []
+
+
+@pytest.mark.asyncio
+async def test_run_once_resumes_after_a_failed_day(tmp_path):
+    service = _service(tmp_path, backfill_days=1)
+    service.stock_service.get_historical_data.side_effect = [Exception("upstream down"), list(HISTORICAL_ROWS)]
+
+    results = await service.run_once(AFTER_CLOSE)
+
+    assert list(results) == [date(2024, 1, 2)]
+    assert service.pending_days(AFTER_CLOSE) == [date(2024, 1, 1)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_continues_past_a_failed_day(tmp_path):
+    service = _service(tmp_path)
+    service.stock_service.get_historical_data.side_effect = [list(HISTORICAL_ROWS), Exception("upstream down"),
+                                                             list(HISTORICAL_ROWS)]
+
+    # Monday 1 to Wednesday 3 January 2024
+    results, failed = await service.backfill(date(2024, 1, 1), date(2024, 1, 3))
+
+    assert list(results) == [date(2024, 1, 1), date(2024, 1, 3)]
+    assert failed == [date(2024, 1, 2)]
+    assert not service.is_archived(date(2024, 1, 2), "historical")
+
+
+@pytest.mark.asyncio
+async def test_run_forever_survives_a_failed_run(tmp_path):
+    service = _service(tmp_path)
+    service.run_once = AsyncMock(side_effect=[OSError("disk full"), {}, asyncio.CancelledError()])
+
+    with pytest.raises(asyncio.CancelledError):
+        await service.run_forever(interval=0)
+
+    assert service.run_once.await_count == 3
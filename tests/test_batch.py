@@ -0,0 +1,86 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.dse import router as dse_router
+from services.stock_service import StockDataService
+
+app = FastAPI()
+app.include_router(dse_router)
+client = TestClient(app)
+
+DSEX_ROWS = [
+    {"TRADING CODE": "GP", "LTP*": "250.1"},
+    {"TRADING CODE": "ACI", "LTP*": "210.5"},
+]
+
+
+def make_stock_service():
+    stock_service = StockDataService()
+    stock_service.get_stock_data = AsyncMock(return_value=[{"TRADING CODE": "GP"}])
+    stock_service.get_dsex_data = AsyncMock(return_value=list(DSEX_ROWS))
+    stock_service.get_top30 = AsyncMock(side_effect=Exception("upstream down"))
+    return stock_service
+
+
+def test_batch_streams_one_line_per_query_and_shares_fetches():
+    stock_service = make_stock_service()
+    queries = [
+        {"kind": "latest"},
+        {"id": "gp", "kind": "dsex", "symbol": "GP"},
+        {"id": "aci", "kind": "dsex", "symbol": "aci"},
+        {"kind": "dsex"},
+        {"kind": "top30"},
+    ]
+    with patch('api.dse.stock_service', stock_service):
+        response = client.post("/dse/batch", json={"queries": queries})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert lines[1]["query"] == {"id": "gp", "kind": "dsex", "symbol": "GP", "inst": "All Instrument"}
+    assert lines[1]["result"]["data"] == [DSEX_ROWS[0]]
+    assert lines[2]["result"]["data"] == [DSEX_ROWS[1]]
+    assert lines[3]["result"]["data"] == DSEX_ROWS
+    assert lines[4]["result"] == {"success": False, "error": "upstream down"}
+    # Three DSEX queries, one upstream fetch
+    stock_service.get_dsex_data.assert_awaited_once()
+
+
+def test_batch_validates_queries():
+    response = client.post("/dse/batch", json={"queries": [{"kind": "historical", "startDate": "2024-01-01"}]})
+    assert response.status_code == 422
+
+    response = client.post("/dse/batch", json={"queries": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_snapshot_misses_share_one_fetch():
+    stock_service = StockDataService()
+    release = asyncio.Event()
+
+    async def slow_fetch(*args):
+        await release.wait()
+        return list(DSEX_ROWS)
+
+    stock_service.get_historical_data = AsyncMock(side_effect=slow_fetch)
+    waiters = [
+        asyncio.ensure_future(stock_service.get_snapshot("historical", "2024-01-01", "2024-01-02", "All Instrument"))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    # A cancelled caller must not abort the fetch the others are waiting on
+    waiters[0].cancel()
+    release.set()
+    snapshots = await asyncio.gather(*waiters[1:])
+
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert stock_service.get_historical_data.await_count == 1
+    assert (stock_service.snapshot_misses, stock_service.snapshot_shared) == (1, 4)
+    assert stock_service._inflight == {}
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from auth.oauth import GoogleOAuthManager
+from services.stock_service import StockDataService
+from utils.locks import FileLock, LeaderElection
+from utils.shared_snapshots import SharedSnapshots
+from utils.snapshot import Snapshot
+from utils.token_storage import TokenStorage
+
+ROWS = [{"TRADING CODE": "GP", "LTP*": "250.1", "VOLUME": "100"}]
+
+
+def test_file_lock_is_exclusive_until_released(tmp_path):
+    first, second = FileLock(tmp_path / "a.lock"), FileLock(tmp_path / "a.lock")
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_stops(tmp_path):
+    leader = LeaderElection(tmp_path / "leader.lock", retry=0.01)
+    follower = LeaderElection(tmp_path / "leader.lock", retry=0.01)
+    led = []
+    followed = asyncio.Event()
+
+    async def lead(name):
+        led.append(name)
+        await asyncio.Event().wait()
+
+    async def follow():
+        followed.set()
+        await asyncio.Event().wait()
+
+    leading = asyncio.ensure_future(leader.run(lambda: lead("first")))
+    following = asyncio.ensure_future(follower.run(lambda: lead("second"), follow))
+    await asyncio.wait_for(followed.wait(), 1)
+    assert leader.is_leader and not follower.is_leader
+
+    leading.cancel()
+    await asyncio.sleep(0.1)
+    assert follower.is_leader
+    assert led == ["first", "second"]
+    following.cancel()
+    await asyncio.gather(following, return_exceptions=True)
+    assert not follower.is_leader
+
+
+def _worker(tmp_path, rows):
+    stock_service = StockDataService(SharedSnapshots(str(tmp_path)))
+    stock_service.get_stock_data = AsyncMock(return_value=rows)
+    return stock_service
+
+
+@pytest.mark.asyncio
+async def test_workers_read_snapshots_another_worker_published(tmp_path):
+    leader, follower = _worker(tmp_path, ROWS), _worker(tmp_path, [])
+    seen = []
+    follower.add_snapshot_listener("latest", seen.append)
+
+    published = await leader.get_snapshot("latest")
+    snapshot = await follower.get_snapshot("latest")
+
+    assert snapshot.data == ROWS
+    assert snapshot.created_at == published.created_at
+    follower.get_stock_data.assert_not_awaited()
+    assert seen == [snapshot]
+    # Reloading an unchanged file keeps the snapshot and its cached bodies
+    assert await follower.load_shared_snapshot("latest") is snapshot
+    assert seen == [snapshot]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_across_workers_share_one_fetch(tmp_path):
+    release = asyncio.Event()
+
+    async def slow_fetch():
+        await release.wait()
+        return ROWS
+
+    workers = [_worker(tmp_path, ROWS) for _ in range(3)]
+    for worker in workers:
+        worker.get_stock_data = AsyncMock(side_effect=slow_fetch)
+    waiters = [asyncio.ensure_future(worker.get_snapshot("latest")) for worker in workers]
+    await asyncio.sleep(0.05)
+    release.set()
+    snapshots = await asyncio.gather(*waiters)
+
+    assert sum(worker.get_stock_data.await_count for worker in workers) == 1
+    assert all(snapshot.data == ROWS for snapshot in snapshots)
+
+
+def _expiry(minutes):
+    expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=minutes)
+    return expiry.strftime("%Y-%m-%dT%H:%M:%S") + "Z"
+
+
+def test_background_refresh_only_touches_expiring_tokens(tmp_path):
+    manager = GoogleOAuthManager(client_secret_file=str(tmp_path / "missing.json"))
+    manager.token_storage = TokenStorage(str(tmp_path / "tokens"))
+    manager.token_storage.save_token("soon@example.com", {"token": "old", "refresh_token": "r", "expiry": _expiry(5)})
+    manager.token_storage.save_token("later@example.com", {"token": "old", "refresh_token": "r", "expiry": _expiry(60)})
+    refreshed = Mock(token="new", refresh_token="r", token_uri="uri", client_id="id", client_secret="secret",
+                     scopes=["scope"], expiry=datetime(2030, 1, 1))
+
+    with patch('auth.oauth.load_credentials', return_value=refreshed), \
+            patch('auth.oauth.refresh_credentials') as refresh:
+        assert manager.refresh_expiring_tokens(margin=600) == 1
+
+    refresh.assert_called_once_with(refreshed)
+    assert manager.token_storage.load_token("soon@example.com")["token"] == "new"
+    assert manager.token_storage.load_token("soon@example.com")["expiry"] == "2030-01-01T00:00:00Z"
+    assert manager.token_storage.load_token("later@example.com")["token"] == "old"
+    # Saves are atomic renames, leaving no temporary files behind
+    assert not list((tmp_path / "tokens").glob("*.tmp"))
+
+
+def test_request_refresh_reuses_token_another_worker_refreshed(tmp_path):
+    manager = GoogleOAuthManager(client_secret_file=str(tmp_path / "missing.json"))
+    manager.token_storage = TokenStorage(str(tmp_path / "tokens"))
+    stale = {"token": "old", "refresh_token": "r"}
+    manager.token_storage.save_token("user@example.com", {"token": "new", "refresh_token": "r"})
+    manager._token_needs_refresh = lambda token_data: token_data["token"] == "old"
+    manager.refresh_token = Mock()
+
+    token_data = manager._refresh_stored_token("user@example.com", stale)
+
+    assert token_data["token"] == "new"
+    manager.refresh_token.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_leader_job_stops_the_others_before_the_lock_is_released(tmp_path):
+    election = LeaderElection(tmp_path / "leader.lock", retry=0.01)
+    siblings = []
+    running_at_release = []
+    release = election.lock.release
+    election.lock.release = lambda: (running_at_release.append(not siblings[-1].done()), release())
+
+    async def crash():
+        await asyncio.sleep(0)
+        raise RuntimeError("job crashed")
+
+    async def lead():
+        async with asyncio.TaskGroup() as jobs:
+            siblings.append(jobs.create_task(asyncio.Event().wait()))
+            if len(siblings) == 1:
+                jobs.create_task(crash())
+
+    leading = asyncio.ensure_future(election.run(lead))
+    await asyncio.sleep(0.1)
+
+    assert running_at_release == [False]
+    # Leadership was contested again and the jobs restarted
+    assert len(siblings) == 2 and not siblings[-1].done()
+    assert election.is_leader
+    leading.cancel()
+    await asyncio.gather(leading, return_exceptions=True)
+    assert not election.is_leader
+
+
+def test_loaded_snapshots_are_bounded(tmp_path):
+    shared = SharedSnapshots(str(tmp_path), max_entries=2)
+    for name in ("latest", "top30", "dsex"):
+        shared.publish((name,), Snapshot(ROWS, created_at=1704088800))
+
+    assert list(shared._loaded) == [("top30",), ("dsex",)]
+    # Evicted keys are read back from disk
+    assert shared.load(("latest",)).data == ROWS
+    assert list(shared._loaded) == [("dsex",), ("latest",)]
+
+
+def test_prune_removes_stale_snapshots_and_free_locks(tmp_path):
+    shared = SharedSnapshots(str(tmp_path))
+    for key in (("historical", "2023-01-01"), ("historical", "2023-01-02"), ("latest",)):
+        shared.publish(key, Snapshot(ROWS, created_at=1704088800))
+        with shared.lock(key):
+            pass
+    held = shared.lock(("historical", "2023-01-02"))
+    held.acquire()
+    stale = time.time() - 7200
+    for key in (("historical", "2023-01-01"), ("historical", "2023-01-02")):
+        for path in (shared._path(key), shared._path(key).with_suffix(".lock")):
+            os.utime(path, (stale, stale))
+
+    assert shared.prune(max_age=3600) == 3
+    held.release()
+
+    assert shared.load(("historical", "2023-01-01")) is None
+    assert shared.load(("historical", "2023-01-02")) is None
+    assert shared.load(("latest",)).data == ROWS
+    assert sorted(path.suffix for path in shared.directory.iterdir()) == [".lock", ".lock", ".snap"]
@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.dse import router as dse_router
+from benchmarks import dse_fixtures
+from services.stock_service import StockDataService
+from utils.compression import ENCODERS, NegotiatedGZipMiddleware, negotiate_encoding, parse_accept_encoding
+
+app = FastAPI()
+app.include_router(dse_router)
+client = TestClient(app)
+
+
+def make_stock_service(rows):
+    stock_service = StockDataService()
+    stock_service.get_stock_data = AsyncMock(return_value=rows)
+    return stock_service
+
+
+def test_parse_and_negotiate_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=0") == {
+        "gzip": 0.5, "br": 1.0, "identity": 0.0
+    }
+    assert negotiate_encoding("gzip, deflate", 10_000) == "gzip"
+    assert negotiate_encoding("gzip", 10) is None
+    assert negotiate_encoding("gzip;q=0", 10_000) is None
+    assert negotiate_encoding(None, 10_000) is None
+    assert negotiate_encoding("*", 10_000) == next(iter(ENCODERS))
+
+
+def test_latest_is_gzipped_and_revalidates_with_304():
+    stock_service = make_stock_service(dse_fixtures.latest_rows())
+    with patch('api.dse.stock_service', stock_service):
+        response = client.get("/dse/latest", headers={"Accept-Encoding": "gzip"})
+        etag = response.headers["etag"]
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert etag.endswith('-gzip"')
+        assert response.json()["data"][0]["TRADING CODE"] == "GP"
+
+        not_modified = client.get(
+            "/dse/latest", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+
+        # The identity representation shares the snapshot's ETag family
+        identity = client.get(
+            "/dse/latest", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+        )
+        assert identity.status_code == 304
+
+
+def test_compressed_body_is_reused_per_snapshot():
+    stock_service = make_stock_service(dse_fixtures.latest_rows())
+    with patch('api.dse.stock_service', stock_service), \
+            patch('utils.snapshot.compress', wraps=lambda body, encoding: gzip.compress(body)) as compress:
+        first = client.get("/dse/latest", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/dse/latest", headers={"Accept-Encoding": "gzip"})
+
+    assert first.content == second.content
+    assert compress.call_count == 1
+    assert stock_service.get_stock_data.await_count == 1
+
+
+def test_stale_etag_gets_full_body():
+    stock_service = make_stock_service(dse_fixtures.latest_rows(count=50))
+    with patch('api.dse.stock_service', stock_service):
+        response = client.get(
+            "/dse/latest", headers={"Accept-Encoding": "identity", "If-None-Match": '"stale"'}
+        )
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert len(response.json()["data"]) == 50
+
+
+def test_gzip_middleware_leaves_negotiated_responses_alone():
+    gzip_app = FastAPI()
+    gzip_app.add_middleware(NegotiatedGZipMiddleware, minimum_size=100)
+    gzip_app.include_router(dse_router)
+    gzip_app.get("/other")(lambda: {"padding": "x" * 500})
+    gzip_client = TestClient(gzip_app)
+    stock_service = make_stock_service(dse_fixtures.latest_rows())
+    with patch('api.dse.stock_service', stock_service):
+        declined = gzip_client.get("/dse/latest", headers={"Accept-Encoding": "gzip;q=0"})
+        negotiated = gzip_client.get("/dse/latest", headers={"Accept-Encoding": "gzip"})
+    other = gzip_client.get("/other", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in declined.headers
+    assert declined.json()["data"][0]["TRADING CODE"] == "GP"
+    # Compressed once by the route, not again by the middleware
+    assert negotiated.headers["content-encoding"] == "gzip"
+    assert negotiated.json() == declined.json()
+    assert other.headers["content-encoding"] == "gzip"
+
+
+def test_large_bodies_are_compressed_in_a_thread():
+    stock_service = make_stock_service(dse_fixtures.latest_rows())
+    with patch('api.dse.stock_service', stock_service), \
+            patch.dict('utils.response.COMPRESSION_CONFIG', {"THREAD_MINIMUM_SIZE": 0}), \
+            patch('utils.response.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+        response = client.get("/dse/latest", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["data"][0]["TRADING CODE"] == "GP"
+    to_thread.assert_called_once()
@@ -0,0 +1,74 @@
+from unittest.mock import Mock
+
+from models.schemas import EmailData
+from services.email_service import GmailService
+from utils.email_cache import EmailCache
+
+
+def make_email(message_id, snippet="Test snippet"):
+    return EmailData(
+        id=message_id,
+        sender="test@example.com",
+        subject="Test Subject",
+        snippet=snippet,
+        date="2024-01-01 12:00:00"
+    )
+
+
+def test_lru_eviction_and_stats():
+    cache = EmailCache(max_entries=2)
+    cache.put("a@example.com", make_email("1"))
+    cache.put("a@example.com", make_email("2"))
+
+    assert cache.get("a@example.com", "1") is not None  # 1 is now most recent
+    cache.put("a@example.com", make_email("3"))
+
+    assert cache.get("a@example.com", "2") is None
+    assert cache.get("a@example.com", "1") is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["memory_bytes"] > 0
+
+
+def test_spilled_entries_are_promoted(tmp_path):
+    cache = EmailCache(max_entries=1, spill_dir=str(tmp_path))
+    cache.put("a@example.com", make_email("1", snippet="body one"))
+    cache.put("a@example.com", make_email("2"))
+
+    email_data = cache.get("a@example.com", "1")
+
+    assert email_data.snippet == "body one"
+    assert cache.disk_hits == 1
+
+
+def test_clear_user_only_drops_that_user(tmp_path):
+    cache = EmailCache(max_entries=1, spill_dir=str(tmp_path))
+    cache.put("a@example.com", make_email("1"))
+    cache.put("a@example.com", make_email("2"))
+    cache.put("b@example.com", make_email("3"))
+
+    cache.clear_user("a@example.com")
+
+    assert cache.get("a@example.com", "1") is None
+    assert cache.get("a@example.com", "2") is None
+    assert cache.get("b@example.com", "3") is not None
+    assert cache.stats()["memory_bytes"] == cache._entry_size(make_email("3"))
+
+
+def test_listing_hydrates_only_uncached_ids():
+    cache = EmailCache()
+    cache.put("a@example.com", make_email("1"))
+
+    gmail_service = GmailService.__new__(GmailService)
+    gmail_service.user_email = "a@example.com"
+    gmail_service.cache = cache
+    gmail_service._get_email_details = Mock(side_effect=lambda message_id: make_email(message_id))
+
+    emails = gmail_service._hydrate_messages([{"id": "1"}, {"id": "2"}])
+
+    assert [email.id for email in emails] == ["1", "2"]
+    gmail_service._get_email_details.assert_called_once_with("2")
+    assert cache.get("a@example.com", "2") is not None
@@ -1,95 +1,134 @@
+import asyncio
+import re
+
 import pytest
 from unittest.mock import Mock, patch
 from fastapi.testclient import TestClient
 from main import app
+from auth.oauth import get_oauth_manager
+from benchmarks import gmail_fixtures
+from benchmarks.gmail_transport import FAKE_TOKEN, ReplayHttp, build_replay_service, synthetic_mailbox
+from benchmarks.record import scrub_message
 from models.schemas import EmailData
+from utils.email_cache import EmailCache
+from utils.mime import extract_body
 
 client = TestClient(app)
 
 
-@patch('api.emails.oauth_manager')
-@patch('api.emails.GmailService')
-def test_get_emails_success(mock_gmail_service, mock_oauth_manager):
-    mock_oauth_manager.validate_token.return_value = True
-    
-    mock_email_data = [
+@pytest.fixture
+def mock_oauth_manager():
+    manager = Mock()
+    manager.get_stored_token.return_value = dict(FAKE_TOKEN)
+    app.dependency_overrides[get_oauth_manager] = lambda: manager
+    yield manager
+    app.dependency_overrides.clear()
+
+
+def _emails(subject="Test Subject"):
+    return [
         EmailData(
             id="1",
             sender="test@example.com",
-            subject="Test Subject",
+            subject=subject,
             snippet="Test snippet",
             date="2024-01-01 12:00:00"
         )
     ]
-    
+
+
+@patch('api.emails.GmailService')
+def test_get_emails_success(mock_gmail_service, mock_oauth_manager):
     mock_service_instance = Mock()
-    mock_service_instance.get_recent_emails.return_value = mock_email_data
+    mock_service_instance.get_recent_emails.return_value = _emails()
     mock_gmail_service.return_value = mock_service_instance
-    
-    token_request = {
-        "token": {
-            "token": "mock_token",
-            "refresh_token": "mock_refresh_token"
-        }
-    }
-    
-    response = client.post("/emails", json=token_request)
-    
+
+    response = client.get("/emails?user_email=test@example.com&max_results=5")
+
     assert response.status_code == 200
     data = response.json()
-    assert "emails" in data
-    assert "count" in data
     assert data["count"] == 1
-    assert len(data["emails"]) == 1
-
-
-@patch('api.emails.oauth_manager')
-def test_get_emails_invalid_token(mock_oauth_manager):
-    mock_oauth_manager.validate_token.return_value = False
-    mock_oauth_manager.refresh_token.return_value = {"token": "invalid"}
-    
-    token_request = {
-        "token": {
-            "token": "invalid_token"
-        }
-    }
-    
-    response = client.post("/emails", json=token_request)
-    
+    assert data["emails"][0]["subject"] == "Test Subject"
+    mock_oauth_manager.get_stored_token.assert_called_once_with("test@example.com")
+    mock_service_instance.get_recent_emails.assert_called_once_with(max_results=5)
+
+
+@patch('api.emails.GmailService')
+def test_gmail_client_is_built_off_the_event_loop(mock_gmail_service, mock_oauth_manager):
+    built_on_loop = []
+
+    def build(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            built_on_loop.append(True)
+        except RuntimeError:
+            built_on_loop.append(False)
+        return Mock(get_recent_emails=Mock(return_value=_emails()))
+
+    mock_gmail_service.side_effect = build
+
+    response = client.get("/emails?user_email=test@example.com")
+
+    assert response.status_code == 200
+    assert built_on_loop == [False]
+
+
+def test_get_emails_without_stored_token(mock_oauth_manager):
+    mock_oauth_manager.get_stored_token.return_value = None
+
+    response = client.get("/emails?user_email=unknown@example.com")
+
     assert response.status_code == 401
-    assert "Invalid or expired token" in response.json()["detail"]
+    assert "No valid token found" in response.json()["detail"]
 
 
-@patch('api.emails.oauth_manager')
 @patch('api.emails.GmailService')
 def test_search_emails_success(mock_gmail_service, mock_oauth_manager):
-    mock_oauth_manager.validate_token.return_value = True
-    
-    mock_email_data = [
-        EmailData(
-            id="1",
-            sender="test@example.com",
-            subject="Search Result",
-            snippet="Search result snippet",
-            date="2024-01-01 12:00:00"
-        )
-    ]
-    
     mock_service_instance = Mock()
-    mock_service_instance.search_emails.return_value = mock_email_data
+    mock_service_instance.search_emails.return_value = _emails("Search Result")
     mock_gmail_service.return_value = mock_service_instance
-    
-    token_request = {
-        "token": {
-            "token": "mock_token",
-            "refresh_token": "mock_refresh_token"
-        }
-    }
-    
-    response = client.post("/emails/search?query=test", json=token_request)
-    
+
+    response = client.get("/emails/search?user_email=test@example.com&query=dividend")
+
     assert response.status_code == 200
     data = response.json()
-    assert "emails" in data
-    assert "count" in data
-    assert data["count"] == 1
\ No newline at end of file
+    assert data["count"] == 1
+    assert data["emails"][0]["subject"] == "Search Result"
+    mock_service_instance.search_emails.assert_called_once_with(query="dividend", max_results=10)
+
+
+@patch('api.emails.email_cache', EmailCache(max_entries=100))
+def test_get_emails_through_replay_transport(mock_oauth_manager):
+    replay_http = ReplayHttp(synthetic_mailbox(8))
+
+    with patch('googleapiclient.discovery.build', lambda *args, **kwargs: build_replay_service(replay_http)):
+        first = client.get("/emails?user_email=bench@example.com&max_results=4")
+        second = client.get("/emails?user_email=bench@example.com&max_results=4")
+
+    assert first.status_code == 200
+    assert first.json()["count"] == 4
+    assert all(email["snippet"] for email in first.json()["emails"])
+    assert second.json() == first.json()
+    # The second listing is served from the email cache
+    assert replay_http.requests == {"messages.list": 2, "messages.get": 4}
+
+
+def test_scrubbed_recordings_keep_structure_and_replay():
+    original = gmail_fixtures.alternative_message()
+    original["payload"]["headers"].append({"name": "Received", "value": "from mail.example.org"})
+
+    scrubbed = scrub_message(original, "18c0000000000000", 0)
+
+    headers = {header["name"]: header["value"] for header in scrubbed["payload"]["headers"]}
+    assert "Received" not in headers
+    assert headers["From"] == "Sender 0 <sender0@example.com>"
+    assert headers["Subject"] == "xxxxxx xxxxxx"
+    assert [part["mimeType"] for part in scrubbed["payload"]["parts"]] == \
+        [part["mimeType"] for part in original["payload"]["parts"]]
+    text = extract_body(scrubbed["payload"])
+    # Every letter and digit is replaced, the length is kept
+    assert set(re.findall(r"[^\W_]", text)) == {"x"}
+    assert len(text) == len(extract_body(original["payload"]))
+
+    service = build_replay_service(ReplayHttp({scrubbed["id"]: scrubbed}))
+    assert service.users().messages().get(userId="me", id=scrubbed["id"]).execute() == scrubbed
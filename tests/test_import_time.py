@@ -0,0 +1,17 @@
+from benchmarks.bench_import import OVERHEAD_BUDGET, eager_lazy_modules, import_tree, overhead
+
+
+def test_main_does_not_import_heavy_clients():
+    tree = import_tree("main")
+
+    assert tree[-1][1] == "main"
+    assert eager_lazy_modules(name for _, name, _ in tree) == []
+
+
+def test_main_imports_within_budget_over_fastapi():
+    # Relative to fastapi in the same interpreter so a slow or busy machine does not fail the budget
+    assert min(overhead(import_tree()) for _ in range(2)) < OVERHEAD_BUDGET
+
+
+def test_eager_lazy_modules_reports_imported_clients():
+    assert eager_lazy_modules(["fastapi", "aiohttp", "bs4"]) == ["aiohttp", "bs4"]
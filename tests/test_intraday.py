@@ -0,0 +1,154 @@
+import asyncio
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.dse import router as dse_router
+from services.intraday import IntradayStore
+from services.stock_service import StockDataService
+from utils.response import DSE_TIMEZONE
+from utils.ring_buffer import RingBuffer
+
+app = FastAPI()
+app.include_router(dse_router)
+client = TestClient(app)
+
+# Tuesday 2024-01-02, 10:00 Dhaka time
+OPEN = datetime(2024, 1, 2, 10, 0, tzinfo=DSE_TIMEZONE).timestamp()
+
+
+def test_ring_buffer_overwrites_oldest_with_fixed_memory():
+    buffer = RingBuffer((("time", "i"), ("volume", "q")), capacity=3)
+    nbytes = buffer.nbytes
+    for value in range(5):
+        buffer.append(value, value * 10)
+
+    assert len(buffer) == 3
+    assert buffer.columns() == {"time": [2, 3, 4], "volume": [20, 30, 40]}
+    assert buffer.last() == (4, 40)
+    buffer.update_last(4, 45)
+    assert buffer.columns()["volume"] == [20, 30, 45]
+    assert buffer.nbytes == nbytes == 3 * (4 + 8)
+
+
+def _ticks():
+    # (seconds after open, ltp, cumulative volume) for one symbol
+    return [(15 * i, 250 + (i * 7) % 11 - 5, 1000 * (i + 1)) for i in range(60)]
+
+
+def test_bars_built_incrementally_match_recomputation():
+    store = IntradayStore(flush_dir=None)
+    for offset, ltp, volume in _ticks():
+        store.record([{"TRADING CODE": "GP", "LTP*": str(ltp), "VOLUME": str(volume)}], OPEN + offset)
+
+    expected = {}
+    previous = 0
+    for offset, ltp, volume in _ticks():
+        start = int(OPEN) + offset - offset % 300
+        bar = expected.setdefault(start, {"time": start, "open": ltp, "high": ltp, "low": ltp, "volume": 0})
+        bar.update(high=max(bar["high"], ltp), low=min(bar["low"], ltp), close=ltp)
+        bar["volume"] += volume - previous
+        previous = volume
+
+    assert store.bars("gp", "5m") == list(expected.values())
+    assert len(store.bars("GP", "1m")) == 15
+    series = store.series("GP")
+    assert series["time"][:2] == [int(OPEN), int(OPEN) + 15]
+    assert series["volume"][-1] == 60000
+
+
+def test_mid_session_start_seeds_volume_instead_of_booking_it():
+    store = IntradayStore(flush_dir=None)
+    for offset, volume in ((3600, 50000), (3615, 50400), (3630, 100), (3645, 300)):
+        store.record([{"TRADING CODE": "GP", "LTP*": "250", "VOLUME": str(volume)}], OPEN + offset)
+
+    # The first sample an hour in only sets the baseline, and the drop reseeds it
+    assert [bar["volume"] for bar in store.bars("GP", "1m")] == [600]
+    assert store.series("GP")["volume"] == [50000, 50400, 100, 300]
+
+
+def test_samples_outside_session_are_ignored_and_memory_is_bounded():
+    store = IntradayStore(flush_dir=None)
+    row = [{"TRADING CODE": "GP", "LTP*": "250", "VOLUME": "10"}]
+
+    assert store.record(row, OPEN - 60) == 0
+    # Friday is not a trading day
+    assert store.record(row, datetime(2024, 1, 5, 11, 0, tzinfo=DSE_TIMEZONE).timestamp()) == 0
+    assert store.record(row, OPEN) == 1
+    nbytes = store.nbytes
+    for second in range(1, 3000):
+        store.record(row, OPEN + second)
+    assert store.nbytes == nbytes
+    assert len(store.series("GP")["time"]) == store.sample_capacity
+
+
+@pytest.mark.asyncio
+async def test_only_changed_latest_snapshots_are_recorded():
+    stock_service = StockDataService()
+    store = IntradayStore(flush_dir=None)
+    stock_service.add_snapshot_listener("latest", store.record_snapshot)
+    rows = [{"TRADING CODE": "GP", "LTP*": "250.1", "VOLUME": "100"}]
+    stock_service.get_stock_data = AsyncMock(side_effect=[rows, list(rows), [dict(rows[0], VOLUME="150")]])
+
+    with patch('services.stock_service.time.time', side_effect=[OPEN, OPEN + 15, OPEN + 15, OPEN + 30, OPEN + 30]), \
+            patch.dict('services.stock_service.SNAPSHOT_CONFIG', {"TTL": {"latest": 0}}):
+        for _ in range(3):
+            await stock_service.get_snapshot("latest")
+
+    assert store.series("GP") == {"time": [int(OPEN), int(OPEN) + 30], "ltp": [250.1, 250.1], "volume": [100, 150]}
+
+
+def test_intraday_endpoint():
+    store = IntradayStore(flush_dir=None)
+    store.record([{"TRADING CODE": "GP", "LTP*": "250", "VOLUME": "100"}], OPEN + 5)
+    store.record([{"TRADING CODE": "GP", "LTP*": "251", "VOLUME": "300"}], OPEN + 20)
+
+    with patch('api.dse.intraday_store', store):
+        response = client.get("/dse/intraday/gp", params={"interval": "1m"})
+        missing = client.get("/dse/intraday/ACI")
+        invalid = client.get("/dse/intraday/GP", params={"interval": "7m"})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["date"] == "2024-01-02"
+    assert data["series"]["ltp"] == [250.0, 251.0]
+    assert data["bars"] == [
+        {"time": int(OPEN), "open": 250.0, "high": 251.0, "low": 250.0, "close": 251.0, "volume": 300}
+    ]
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+
+
+def test_flush_and_restore_round_trip(tmp_path):
+    store = IntradayStore(flush_dir=str(tmp_path))
+    for offset, ltp, volume in _ticks():
+        store.record([
+            {"TRADING CODE": "GP", "LTP*": str(ltp), "VOLUME": str(volume)},
+            {"TRADING CODE": "ACI", "LTP*": "210.5", "VOLUME": str(volume // 2)},
+        ], OPEN + offset)
+    path = store.flush()
+
+    restored = IntradayStore(flush_dir=str(tmp_path))
+    assert restored.restore(date(2024, 1, 2)) == 120
+    assert path == tmp_path / "2024" / "2024-01-02" / "intraday.col"
+    assert restored.symbols() == ["ACI", "GP"]
+    assert restored.series("GP") == store.series("GP")
+    assert restored.bars("ACI", "5m") == store.bars("ACI", "5m")
+
+
+@pytest.mark.asyncio
+async def test_new_day_flushes_previous_day_off_the_event_loop(tmp_path):
+    store = IntradayStore(flush_dir=str(tmp_path))
+    row = [{"TRADING CODE": "GP", "LTP*": "250", "VOLUME": "100"}]
+    store.record(row, OPEN)
+
+    with patch('services.intraday.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+        store.record(row, OPEN + 86400)
+        await asyncio.gather(*store._writes)
+
+    to_thread.assert_called_once()
+    assert store.day == date(2024, 1, 3)
+    assert IntradayStore(flush_dir=str(tmp_path)).restore(date(2024, 1, 2)) == 1
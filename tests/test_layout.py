@@ -0,0 +1,82 @@
+import logging
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bs4 import BeautifulSoup
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.dse import router as dse_router
+from benchmarks import dse_fixtures
+from benchmarks.bench_parse import legacy_parse_rows
+from benchmarks.pages import render_table_page
+from services.dse_layout import PAGE_SCHEMAS, LayoutError, LayoutRegistry
+from services.stock_service import StockDataService
+
+
+def _soup(headers, rows):
+    return BeautifulSoup(render_table_page("Test", list(headers), rows), 'html.parser')
+
+
+def test_compiled_layout_matches_legacy_parsing():
+    registry = LayoutRegistry()
+    pages = {
+        "latest": _soup(dse_fixtures.LATEST_HEADERS, dse_fixtures.latest_rows(20)),
+        "historical": _soup(dse_fixtures.HISTORICAL_HEADERS, dse_fixtures.historical_rows(days=2, symbols=10)),
+    }
+    for page, soup in pages.items():
+        schema = PAGE_SCHEMAS[page]
+        expected = legacy_parse_rows(soup, schema.selector, not schema.body_rows_only)
+
+        assert registry.parse(soup, page) == expected
+        assert registry.parse(soup, page) == expected
+    assert len(registry._compiled) == 2
+
+
+def test_changed_layout_is_parsed_by_header_and_flagged(caplog):
+    registry = LayoutRegistry()
+    headers = ["TRADING CODE", "#", "LTP*", "NEW COLUMN"]
+    rows = [{"TRADING CODE": "GP", "#": "1", "LTP*": "250.1", "NEW COLUMN": "x"}]
+
+    with caplog.at_level(logging.WARNING, logger="services.dse_layout"):
+        data = registry.parse(_soup(headers, rows), "latest")
+
+    assert data == [{"TRADING CODE": "GP", "#": "1", "LTP*": "250.1", "NEW COLUMN": "x"}]
+    assert "dse layout differs from schema page=latest" in caplog.text
+
+
+def test_broken_pages_raise_layout_error():
+    registry = LayoutRegistry()
+
+    with pytest.raises(LayoutError, match="share table not found"):
+        registry.parse(BeautifulSoup("<html><body>Maintenance</body></html>", 'html.parser'), "latest")
+    with pytest.raises(LayoutError, match="missing columns"):
+        registry.parse(_soup(["#", "CODE"], [{"#": "1", "CODE": "GP"}]), "latest")
+    with pytest.raises(LayoutError, match="no data rows"):
+        registry.parse(_soup(dse_fixtures.LATEST_HEADERS, []), "top30")
+    # An empty day end archive is a holiday, not a broken page
+    assert registry.parse(_soup(dse_fixtures.HISTORICAL_HEADERS, []), "historical") == []
+
+
+@pytest.mark.asyncio
+async def test_top30_fails_loudly_instead_of_returning_empty():
+    service = StockDataService()
+    service._fetch_and_parse_html = AsyncMock(return_value=BeautifulSoup("<html></html>", 'html.parser'))
+
+    with pytest.raises(LayoutError):
+        await service.get_top30()
+    with pytest.raises(LayoutError):
+        await service.get_dsex_data("GP")
+
+
+def test_layout_errors_are_reported_as_bad_gateway():
+    app = FastAPI()
+    app.include_router(dse_router)
+    service = StockDataService()
+    service._fetch_and_parse_html = AsyncMock(return_value=BeautifulSoup("<html></html>", 'html.parser'))
+
+    with patch('api.dse.stock_service', service):
+        responses = [TestClient(app).get(path) for path in ("/dse/latest", "/dse/top30", "/dse/dsexdata")]
+
+    assert [response.status_code for response in responses] == [502, 502, 502]
+    assert responses[0].json()["detail"].startswith("Unexpected DSE page layout")
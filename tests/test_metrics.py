@@ -0,0 +1,106 @@
+import os
+import time
+
+from utils.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("fetch_seconds", "Fetch latency", ["url"], buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, "/latest")
+    histogram.observe(0.5, "/latest")
+    histogram.observe(5, "/latest")
+
+    text = registry.render()
+    assert "# TYPE fetch_seconds histogram" in text
+    assert 'fetch_seconds_bucket{url="/latest",le="0.1"} 1' in text
+    assert 'fetch_seconds_bucket{url="/latest",le="1"} 2' in text
+    assert 'fetch_seconds_bucket{url="/latest",le="+Inf"} 3' in text
+    assert 'fetch_seconds_sum{url="/latest"} 5.55' in text
+    assert 'fetch_seconds_count{url="/latest"} 3' in text
+
+
+def test_counter_and_gauge_collector():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "Calls", ["method"])
+    counter.inc("messages.get")
+    counter.inc("messages.get", amount=2)
+    registry.gauge_collector("hit_ratio", "Hit ratio", lambda: [({"cache": "email"}, 0.75)])
+    registry.counter_collector("lookups_total", "Lookups", lambda: [({"outcome": "hit"}, 7)])
+
+    text = registry.render()
+    assert 'calls_total{method="messages.get"} 3' in text
+    assert 'hit_ratio{cache="email"} 0.75' in text
+    assert "# TYPE lookups_total counter" in text
+    assert 'lookups_total{outcome="hit"} 7' in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors", ["error"]).inc('bad "quote"\n')
+
+    assert 'errors_total{error="bad \\"quote\\"\\n"} 1' in registry.render()
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    histogram = registry.histogram("parse_seconds", "Parse time")
+
+    with histogram.time():
+        pass
+    histogram.observe(1.0)
+    registry.counter("calls_total", "Calls").inc()
+
+    assert "parse_seconds_count" not in registry.render()
+    assert "calls_total 1" not in registry.render()
+
+
+def test_failing_collector_does_not_break_scrape():
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("boom")
+        yield
+
+    registry.gauge_collector("broken", "Broken", broken)
+    registry.counter("ok_total", "Ok").inc()
+
+    assert "ok_total 1" in registry.render()
+
+
+def _worker_registry(directory, worker):
+    registry = MetricsRegistry(shared_dir=str(directory), worker=worker)
+    registry.counter("calls_total", "Calls", ["method"]).inc("messages.get", amount=int(worker))
+    registry.histogram("fetch_seconds", "Fetch latency", buckets=(0.1, 1.0)).observe(0.05 * int(worker))
+    registry.gauge_collector("cache_entries", "Entries", lambda: [({"cache": "email"}, 10 * int(worker))])
+    return registry
+
+
+def test_shared_registry_merges_every_workers_metrics(tmp_path):
+    first, second = _worker_registry(tmp_path, "1"), _worker_registry(tmp_path, "3")
+    second.publish()
+
+    text = first.render()
+
+    # Counters and histograms are summed, whichever worker answers the scrape
+    assert 'calls_total{method="messages.get"} 4' in text
+    assert 'fetch_seconds_bucket{le="0.1"} 1' in text
+    assert 'fetch_seconds_count 2' in text
+    assert 'calls_total{method="messages.get"} 4' in second.render()
+    # Gauges stay per worker
+    assert 'cache_entries{cache="email",worker="1"} 10' in text
+    assert 'cache_entries{cache="email",worker="3"} 30' in text
+    assert text.count("# TYPE calls_total counter") == 1
+
+
+def test_stale_workers_keep_their_totals_but_not_their_gauges(tmp_path):
+    first, exited = _worker_registry(tmp_path, "1"), _worker_registry(tmp_path, "3")
+    exited.publish()
+    stale = time.time() - 3600
+    os.utime(tmp_path / "metrics" / "3.json", (stale, stale))
+
+    text = first.render()
+
+    assert 'calls_total{method="messages.get"} 4' in text
+    assert 'worker="3"' not in text
@@ -0,0 +1,72 @@
+from benchmarks import gmail_fixtures
+from utils.mime import decode_part_data, extract_body, html_to_text, truncate_utf8
+
+
+def test_plain_body_in_nested_alternative():
+    message = gmail_fixtures.alternative_message(paragraphs=1)
+
+    body = extract_body(message['payload'])
+
+    assert body == gmail_fixtures.news_text(1)
+
+
+def test_single_part_message():
+    message = gmail_fixtures.simple_message(paragraphs=2)
+
+    assert extract_body(message['payload']) == gmail_fixtures.news_text(2)
+
+
+def test_html_only_falls_back_to_text():
+    message = gmail_fixtures.html_only_message(paragraphs=2)
+
+    body = extract_body(message['payload'])
+
+    assert body.startswith("GP and SQURPHARMA gained")
+    assert "<p>" not in body
+    assert "track()" not in body
+    assert "color" not in body
+
+
+def test_deeply_nested_message():
+    message = gmail_fixtures.deeply_nested_message(depth=200, paragraphs=1)
+
+    assert extract_body(message['payload']) == gmail_fixtures.news_text(1)
+
+
+def test_first_plain_part_wins_and_size_is_capped():
+    message = gmail_fixtures.large_message(megabytes=1)
+
+    body = extract_body(message['payload'], max_bytes=1000)
+
+    assert len(body) == 1000
+    assert body == gmail_fixtures.news_text(20)[:1000]
+
+
+def test_truncate_counts_utf8_bytes():
+    text = "শেয়ার" * 10
+
+    truncated = truncate_utf8(text, 10)
+
+    assert len(truncated.encode('utf-8')) <= 10
+    assert text.startswith(truncated)
+    assert truncate_utf8("GP", 10) == "GP"
+
+
+def test_attachments_and_empty_payloads_are_skipped():
+    payload = gmail_fixtures.multipart('mixed', gmail_fixtures.attachment_part('a.pdf'))
+
+    assert extract_body(payload) == ''
+    assert extract_body({}) == ''
+
+
+def test_decode_respects_charset():
+    data = gmail_fixtures.encode("café")
+
+    assert decode_part_data(data, 100) == "café"
+    assert decode_part_data(data, 100, charset='no-such-charset') == "café"
+
+
+def test_html_to_text_keeps_line_breaks():
+    text = html_to_text("<div>Line one<br>Line two</div><p>Line three</p>")
+
+    assert text == "Line one\nLine two\nLine three"
@@ -1,23 +1,31 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 from fastapi.testclient import TestClient
 from main import app
+from auth.oauth import GoogleOAuthManager, get_oauth_manager
+from utils.token_storage import TokenStorage
 
 client = TestClient(app)
 
 
-@patch('api.oauth.oauth_manager')
+@pytest.fixture
+def mock_oauth_manager():
+    manager = Mock()
+    app.dependency_overrides[get_oauth_manager] = lambda: manager
+    yield manager
+    app.dependency_overrides.clear()
+
+
 def test_get_login_url(mock_oauth_manager):
     mock_oauth_manager.get_authorization_url.return_value = "https://accounts.google.com/oauth/authorize?..."
-    
+
     response = client.get("/oauth/login")
-    
+
     assert response.status_code == 200
     assert "auth_url" in response.json()
     assert response.json()["auth_url"].startswith("https://accounts.google.com")
 
 
-@patch('api.oauth.oauth_manager')
 def test_oauth_callback_success(mock_oauth_manager):
     mock_token_data = {
         "token": "mock_token",
@@ -25,22 +33,44 @@ def test_oauth_callback_success(mock_oauth_manager):
         "token_uri": "https://oauth2.googleapis.com/token",
         "client_id": "mock_client_id",
         "client_secret": "mock_client_secret",
-        "scopes": ["https://www.googleapis.com/auth/gmail.readonly"]
+        "scopes": ["https://www.googleapis.com/auth/gmail.readonly"],
+        "user_email": "test@example.com"
     }
     mock_oauth_manager.exchange_code_for_token.return_value = mock_token_data
-    
+
     response = client.get("/oauth/callback?code=mock_code&state=mock_state")
-    
+
     assert response.status_code == 200
-    assert response.headers["content-type"] == "application/json"
-    assert "attachment" in response.headers["content-disposition"]
+    assert response.json()["user_email"] == "test@example.com"
+    mock_oauth_manager.save_user_token.assert_called_once_with("test@example.com", mock_token_data)
 
 
-@patch('api.oauth.oauth_manager')
 def test_oauth_callback_failure(mock_oauth_manager):
     mock_oauth_manager.exchange_code_for_token.side_effect = Exception("OAuth failed")
-    
+
     response = client.get("/oauth/callback?code=invalid_code")
-    
+
     assert response.status_code == 400
-    assert "OAuth callback failed" in response.json()["detail"]
\ No newline at end of file
+    assert "OAuth callback failed" in response.json()["detail"]
+
+
+def test_manager_reads_client_secret_on_first_use(tmp_path, monkeypatch):
+    # The default token directory is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    manager = GoogleOAuthManager(client_secret_file="missing.json")
+
+    # Construction touches neither the secret file nor the token directory
+    assert manager.token_storage.storage_dir.resolve() == tmp_path / "tokens"
+    assert not manager.token_storage.storage_dir.exists()
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError, match="Client secret file not found"):
+        manager.get_authorization_url()
+
+
+def test_token_storage_creates_directory_on_save(tmp_path):
+    storage = TokenStorage(str(tmp_path / "tokens"))
+    assert not storage.storage_dir.exists()
+
+    storage.save_token("test@example.com", {"token": "abc"})
+
+    assert storage.load_token("test@example.com") == {"token": "abc", "user_email": "test@example.com"}
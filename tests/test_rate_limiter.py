@@ -0,0 +1,107 @@
+from unittest.mock import Mock
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from utils.rate_limiter import GmailQuotaLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs):
+    options = dict(
+        method_units={"messages.list": 5, "messages.get": 5, "history.list": 2},
+        user_rate=10, user_burst=10, global_rate=100, global_burst=100,
+        max_retries=3, backoff_base=0.5, backoff_max=4,
+        clock=clock, sleep=clock.sleep
+    )
+    options.update(kwargs)
+    return GmailQuotaLimiter(**options)
+
+
+def http_error(status, headers=None):
+    resp = httplib2.Response({"status": status, **(headers or {})})
+    return HttpError(resp, b'{"error": {"message": "quota"}}')
+
+
+def test_token_bucket_reservations_queue_up():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+
+    assert bucket.reserve(10) == 0
+    assert bucket.reserve(5) == pytest.approx(0.5)
+    assert bucket.reserve(5) == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert bucket.remaining() == pytest.approx(0)
+
+
+def test_acquire_uses_method_units_and_throttles():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+
+    assert limiter.acquire("a@example.com", "messages.get") == 0
+    assert limiter.acquire("a@example.com", "messages.get") == 0
+    assert limiter.acquire("a@example.com", "messages.get") == pytest.approx(0.5)
+    # Other users have their own budget
+    assert limiter.acquire("b@example.com", "history.list") == 0
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_execute_retries_429_then_succeeds():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    request = Mock()
+    request.execute.side_effect = [http_error(429, {"retry-after": "2"}), {"messages": []}]
+
+    assert limiter.execute(request, "a@example.com", "messages.list") == {"messages": []}
+    assert limiter.metrics()["retries"] == {"messages.list": 1}
+    assert clock.now >= 2
+
+
+def test_execute_does_not_retry_client_errors():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    request = Mock()
+    request.execute.side_effect = http_error(404)
+
+    with pytest.raises(HttpError):
+        limiter.execute(request, "a@example.com", "messages.get")
+    assert request.execute.call_count == 1
+
+
+def test_execute_gives_up_after_max_retries():
+    clock = FakeClock()
+    limiter = make_limiter(clock, max_retries=2)
+    request = Mock()
+    request.execute.side_effect = http_error(503)
+
+    with pytest.raises(HttpError):
+        limiter.execute(request, "a@example.com", "messages.get")
+    assert request.execute.call_count == 3
+
+
+def test_metrics_aggregate_users_and_idle_buckets_are_evicted():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.acquire("a@example.com", "messages.get")
+    limiter.acquire("b@example.com", "history.list")
+
+    metrics = limiter.metrics()
+    assert "a@example.com" not in str(metrics)
+    assert metrics["user_remaining_units"] == {"active_users": 2, "min": 5, "avg": 6.5}
+
+    # Both buckets refill within a second and are dropped on the next new user
+    clock.now = 5.0
+    limiter.acquire("c@example.com", "messages.get")
+    assert list(limiter.user_buckets) == ["c@example.com"]
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+from models.schemas import EmailData
+from services.sentiment_service import SentimentScorer, SentimentService
+from utils.aho_corasick import SymbolIndex
+
+
+def make_email(message_id, subject, snippet):
+    return EmailData(
+        id=message_id,
+        sender="news@example.com",
+        subject=subject,
+        snippet=snippet,
+        date="2024-01-01 12:00:00"
+    )
+
+
+def test_symbol_index_matches_whole_codes_only():
+    index = SymbolIndex(["GP", "GPH", "BRACBANK", "1JANATAMF"])
+
+    found = index.find("GP rallied, GPHISPAT slumped; BRACBANK and 1JANATAMF flat. gp")
+
+    assert found == {"GP", "BRACBANK", "1JANATAMF"}
+
+
+def test_symbol_index_overlapping_codes():
+    index = SymbolIndex(["ABB", "AB", "BBS", "BBSCABLES"])
+
+    assert index.find("AB, ABB and BBSCABLES") == {"AB", "ABB", "BBSCABLES"}
+    assert index.find("") == set()
+
+
+def test_scorer_polarity_negation_and_intensity():
+    scorer = SentimentScorer()
+
+    positive, _, _ = scorer.score_text("Shares surged on record profit")
+    negative, _, _ = scorer.score_text("Shares plunged after fraud concerns")
+    negated, _, _ = scorer.score_text("Shares did not gain")
+    slight, _, _ = scorer.score_text("Shares rose slightly rose")
+
+    assert positive > 0.5
+    assert negative < -0.5
+    assert negated < 0
+    assert 0 < slight < positive
+    assert scorer.score_text("The board meeting is on Sunday") == (0.0, 0, 0)
+    assert scorer.label(0.0) == "neutral"
+
+
+def test_service_tags_symbols_and_caches_per_message():
+    service = SentimentService()
+    service.set_symbols(["GP", "SQURPHARMA"])
+    email_data = make_email("1", "GP profit jumps", "SQURPHARMA also gained")
+
+    first = service.score_email(email_data)
+    second = service.score_email(email_data)
+
+    assert first.symbols == ["GP", "SQURPHARMA"]
+    assert first.label == "positive"
+    assert second is first
+    assert service.stats()["hits"] == 1
+
+
+def test_cached_results_are_retagged_when_symbols_change():
+    service = SentimentService()
+    service.set_symbols(["GP"])
+    email_data = make_email("1", "GP and BATBC rise", "")
+    assert service.score_email(email_data).symbols == ["GP"]
+
+    assert service.set_symbols(["GP", "BATBC"]) is True
+    assert service.set_symbols(["GP", "BATBC"]) is False
+
+    assert service.score_email(email_data).symbols == ["BATBC", "GP"]
+
+
+def test_score_emails_returns_scored_models():
+    service = SentimentService()
+    scored = service.score_emails([make_email("1", "Market crash", "Stocks fell sharply")])
+
+    assert scored[0].id == "1"
+    assert scored[0].sentiment.label == "negative"
+
+
+@pytest.mark.asyncio
+async def test_refresh_symbols_from_latest_data():
+    class FakeStockService:
+        calls = 0
+        fail = True
+
+        async def get_snapshot(self, kind):
+            assert kind == "latest"
+            self.calls += 1
+            if self.fail:
+                raise Exception("dsebd down")
+            return SimpleNamespace(data=[{"TRADING CODE": "GP"}, {"TRADING CODE": "ACI "}])
+
+    stock_service = FakeStockService()
+    service = SentimentService(refresh_seconds=3600, retry_seconds=60)
+
+    # A failure backs off instead of rescraping on every request
+    await service.refresh_symbols(stock_service)
+    await service.refresh_symbols(stock_service)
+    assert stock_service.calls == 1
+
+    stock_service.fail = False
+    service.symbols_failed_at -= 60
+    await service.refresh_symbols(stock_service)
+    await service.refresh_symbols(stock_service)
+
+    assert service.symbol_index.symbols == {"GP", "ACI"}
+    assert stock_service.calls == 2
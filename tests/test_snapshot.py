@@ -0,0 +1,113 @@
+import asyncio
+import gc
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.stock_service import StockDataService
+from utils.response import api_response, format_timestamp, json_response
+from utils.snapshot import Snapshot, snapshot_response
+
+
+ROWS = [
+    {"TRADING CODE": "GP", "LTP*": "250.1"},
+    {"TRADING CODE": "ACI", "LTP*": "210.5"},
+]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_body_matches_api_response_envelope():
+    snapshot = Snapshot(ROWS, created_at=1704088800)
+
+    body = json.loads(snapshot.body)
+
+    assert body == {"success": True, "data": ROWS, "timestamp": "2024-01-01T12:00:00+06:00"}
+    assert snapshot.body is snapshot.body
+    assert (await snapshot_response(snapshot)).body == snapshot.body
+
+
+def test_json_response_and_api_response_agree():
+    body = json.loads(json_response(ROWS).body)
+
+    assert body.keys() == api_response(ROWS).keys()
+    assert body["data"] == ROWS
+    assert format_timestamp(0) == "1970-01-01T06:00:00+06:00"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reused_within_ttl_and_when_unchanged():
+    service = StockDataService()
+    service.get_stock_data = AsyncMock(return_value=list(ROWS))
+
+    first = await service.get_snapshot("latest")
+    second = await service.get_snapshot("latest")
+    assert second is first
+    assert service.get_stock_data.await_count == 1
+
+    first.checked_at -= 3600
+    third = await service.get_snapshot("latest")
+    assert third is first
+    assert service.get_stock_data.await_count == 2
+
+    service.get_stock_data.return_value = ROWS[:1]
+    first.checked_at -= 3600
+    fourth = await service.get_snapshot("latest")
+    assert fourth is not first
+    assert fourth.data == ROWS[:1]
+
+
+@pytest.mark.asyncio
+async def test_symbol_snapshots_derive_from_full_dsex_page():
+    service = StockDataService()
+    service.get_dsex_data = AsyncMock(return_value=list(ROWS))
+
+    full = await service.get_snapshot("dsex", None)
+    gp = await service.get_snapshot("dsex", "gp")
+    aci = await service.get_snapshot("dsex", "ACI")
+
+    assert service.get_dsex_data.await_count == 1
+    service.get_dsex_data.assert_awaited_with()
+    assert full.data == ROWS
+    assert gp.data == [ROWS[0]]
+    assert aci.data == [ROWS[1]]
+    assert await service.get_snapshot("dsex", "GP") is gp
+
+
+@pytest.mark.asyncio
+async def test_symbol_snapshots_cannot_evict_page_snapshots():
+    service = StockDataService()
+    service.get_dsex_data = AsyncMock(return_value=list(ROWS))
+
+    full = await service.get_snapshot("dsex", None)
+    for index in range(300):
+        await service.get_snapshot("dsex", f"SYM{index}")
+
+    assert service._snapshots[("dsex",)] is full
+    assert len(service._symbol_snapshots) == 256
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_with_no_waiters_left_is_not_reported_unhandled():
+    service = StockDataService()
+    release = asyncio.Event()
+
+    async def failing_fetch():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    service.get_stock_data = AsyncMock(side_effect=failing_fetch)
+    unhandled = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+    waiter = asyncio.ensure_future(service.get_snapshot("latest"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    # The cancelled waiter's traceback would keep the fetch task alive
+    del waiter
+    release.set()
+    await asyncio.sleep(0.01)
+    gc.collect()
+
+    assert unhandled == []
+    assert not service._inflight
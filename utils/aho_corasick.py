@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class SymbolIndex:
+    """Aho-Corasick automaton for finding trading codes in free text.
+
+    The automaton is compiled once from the set of codes and then scans a
+    text in a single pass regardless of how many codes are indexed. Matches
+    are case-sensitive and must sit on word boundaries, so "GP" matches in
+    "GP rose" but not in "GPH" or "gp".
+    """
+
+    def __init__(self, symbols: Iterable[str]):
+        self.symbols = frozenset(symbol for symbol in symbols if symbol)
+        # Each state is a dict of transitions; outputs and failure links are parallel lists
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for symbol in self.symbols:
+            self._add(symbol)
+        self._build_failure_links()
+
+    def _add(self, symbol: str) -> None:
+        state = 0
+        for char in symbol:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(symbol)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @staticmethod
+    def _is_boundary(text: str, index: int) -> bool:
+        return index < 0 or index >= len(text) or not text[index].isalnum()
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of indexed symbols occurring in text"""
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for symbol in output[state]:
+                start = index - len(symbol) + 1
+                if self._is_boundary(text, start - 1) and self._is_boundary(text, index + 1):
+                    found.add(symbol)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.symbols)
@@ -0,0 +1,125 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAGIC = b"DSECOL1\n"
+ALIGNMENT = 8
+_HEADER_LENGTH = struct.Struct("<I")
+
+# Smallest value of each signed integer type marks a missing cell
+MISSING = {"b": -2 ** 7, "h": -2 ** 15, "i": -2 ** 31, "q": -2 ** 63}
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def write_partition(path: Path, columns: Dict[str, array], metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Atomically write equal-length typed columns to a single memory-mappable file.
+
+    Layout: magic, little-endian uint32 header length, JSON header, then each
+    column's raw array bytes aligned to 8 bytes. The header records every
+    column's typecode, offset and byte length so readers can map a column
+    without touching the others. The file is written next to its final path
+    and renamed into place, so readers only ever see complete partitions.
+    """
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+    rows = lengths.pop() if lengths else 0
+
+    descriptors = []
+    offset = 0
+    for name, values in columns.items():
+        nbytes = len(values) * values.itemsize
+        descriptors.append({"name": name, "type": values.typecode, "offset": offset, "bytes": nbytes})
+        offset += nbytes + _padding(nbytes)
+
+    header = json.dumps({
+        "rows": rows,
+        "byteorder": sys.byteorder,
+        "columns": descriptors,
+        "metadata": metadata or {}
+    }, separators=(",", ":")).encode("utf-8")
+    data_start = len(MAGIC) + _HEADER_LENGTH.size + len(header)
+    header += b" " * _padding(data_start)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for values in columns.values():
+                raw = values.tobytes()
+                f.write(raw)
+                f.write(b"\0" * _padding(len(raw)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+class Partition:
+    """Read-only memory-mapped view of a file written by write_partition"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._mmap is None or self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a columnar partition: {self.path}")
+
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        self._data_start = header_start + header_length
+        self.rows: int = header["rows"]
+        self.metadata: Dict[str, Any] = header["metadata"]
+        self._native = header["byteorder"] == sys.byteorder
+        self._columns = {column["name"]: column for column in header["columns"]}
+        self._views: List[memoryview] = []
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str):
+        """Column values without copying; a memoryview into the mapped file"""
+        descriptor = self._columns[name]
+        start = self._data_start + descriptor["offset"]
+        raw = memoryview(self._mmap)[start:start + descriptor["bytes"]]
+        if not self._native:
+            values = array(descriptor["type"])
+            values.frombytes(raw)
+            raw.release()
+            values.byteswap()
+            return values
+        view = raw.cast(descriptor["type"])
+        self._views.extend((raw, view))
+        return view
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "Partition":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,108 @@
+import gzip
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import COMPRESSION_CONFIG
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, install with the "compression" extra
+    brotli = None
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime=0 keeps the output, and therefore its ETag, deterministic
+    return gzip.compress(body, compresslevel=COMPRESSION_CONFIG["GZIP_LEVEL"], mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=COMPRESSION_CONFIG["BROTLI_QUALITY"])
+
+
+# Server preference order
+ENCODERS = {"br": _brotli, "gzip": _gzip} if brotli is not None else {"gzip": _gzip}
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    if not header:
+        return accepted
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header: Optional[str], size: int) -> Optional[str]:
+    """Pick the preferred content coding the client accepts, or None for identity"""
+    if size < COMPRESSION_CONFIG["MINIMUM_SIZE"]:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for coding in ENCODERS:
+        q = accepted.get(coding, wildcard)
+        if q > best[0]:
+            best = (q, coding)
+    return best[1]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](body)
+
+
+def _headers(message: Message) -> MutableHeaders:
+    # MutableHeaders edits the message's header list in place
+    return MutableHeaders(raw=message["headers"])
+
+
+class NegotiatedGZipMiddleware:
+    """GZipMiddleware for responses that did not negotiate their own content coding.
+
+    A response that already varies on Accept-Encoding picked its coding,
+    possibly none, so it passes through untouched. GZipMiddleware only skips
+    responses with a Content-Encoding, so one is set on the way in and removed
+    on the way out; identity is never sent as a Content-Encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_CONFIG["MINIMUM_SIZE"]):
+        self.app = app
+        self.gzip = GZipMiddleware(self._mark_negotiated, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def unmark(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = _headers(message)
+                if headers.get("content-encoding") == "identity":
+                    del headers["content-encoding"]
+            await send(message)
+
+        await self.gzip(scope, receive, unmark)
+
+    async def _mark_negotiated(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def mark(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = _headers(message)
+                if "accept-encoding" in headers.get("vary", "").lower() and "content-encoding" not in headers:
+                    headers["Content-Encoding"] = "identity"
+            await send(message)
+
+        await self.app(scope, receive, mark)
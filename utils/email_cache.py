@@ -0,0 +1,169 @@
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from config import EMAIL_CACHE_CONFIG
+from models.schemas import EmailData
+
+
+CacheKey = Tuple[str, str]
+
+
+class EmailCache:
+    """Bounded LRU cache of hydrated Gmail messages keyed by (user, message_id).
+
+    Gmail message contents never change once received, so entries are never
+    invalidated by age; they are only evicted when the cache is full or when
+    the user's token is removed. Evicted entries are written to ``spill_dir``
+    when one is configured and promoted back into memory on the next hit.
+    """
+
+    def __init__(self, max_entries: int = 2000, spill_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._entries: "OrderedDict[CacheKey, EmailData]" = OrderedDict()
+        self._sizes: Dict[CacheKey, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_user_hash(self, user_email: str) -> str:
+        """Create a hash of user email for directory names"""
+        return hashlib.sha256(user_email.encode()).hexdigest()[:16]
+
+    def _get_spill_path(self, key: CacheKey) -> Path:
+        user_email, message_id = key
+        return self.spill_dir / self._get_user_hash(user_email) / f"{message_id}.json"
+
+    @staticmethod
+    def _entry_size(email_data: EmailData) -> int:
+        """Approximate in-memory footprint of the cached text fields"""
+        return sum(
+            len(value) for value in (
+                email_data.id, email_data.sender, email_data.subject,
+                email_data.snippet, email_data.date
+            )
+        )
+
+    def _insert(self, key: CacheKey, email_data: EmailData) -> None:
+        if key in self._entries:
+            self._bytes -= self._sizes[key]
+        self._entries[key] = email_data
+        self._entries.move_to_end(key)
+        size = self._entry_size(email_data)
+        self._sizes[key] = size
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+            self._spill(old_key, old_value)
+
+    def _spill(self, key: CacheKey, email_data: EmailData) -> None:
+        if self.spill_dir is None:
+            return
+        path = self._get_spill_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(email_data.model_dump_json())
+        except OSError:
+            pass
+
+    def _load_spilled(self, key: CacheKey) -> Optional[EmailData]:
+        if self.spill_dir is None:
+            return None
+        path = self._get_spill_path(key)
+        try:
+            return EmailData.model_validate_json(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, user_email: str, message_id: str) -> Optional[EmailData]:
+        """Return cached message or None"""
+        key = (user_email, message_id)
+        with self._lock:
+            email_data = self._entries.get(key)
+            if email_data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return email_data
+
+            email_data = self._load_spilled(key)
+            if email_data is not None:
+                self.disk_hits += 1
+                self._insert(key, email_data)
+                return email_data
+
+            self.misses += 1
+            return None
+
+    def get_many(self, user_email: str, message_ids: Iterable[str]) -> Dict[str, EmailData]:
+        """Return the cached subset of message_ids as {message_id: EmailData}"""
+        found = {}
+        for message_id in message_ids:
+            email_data = self.get(user_email, message_id)
+            if email_data is not None:
+                found[message_id] = email_data
+        return found
+
+    def put(self, user_email: str, email_data: EmailData) -> None:
+        """Store a hydrated message"""
+        with self._lock:
+            self._insert((user_email, email_data.id), email_data)
+
+    def clear_user(self, user_email: str) -> int:
+        """Drop all entries of a user from memory and disk, return number removed"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == user_email]
+            for key in keys:
+                del self._entries[key]
+                self._bytes -= self._sizes.pop(key)
+
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir / self._get_user_hash(user_email), ignore_errors=True)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return (self.hits + self.disk_hits) / lookups
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and approximate memory footprint"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+email_cache = EmailCache(
+    max_entries=EMAIL_CACHE_CONFIG["MAX_ENTRIES"],
+    spill_dir=EMAIL_CACHE_CONFIG["SPILL_DIR"]
+)
@@ -0,0 +1,112 @@
+import asyncio
+import fcntl
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by every process that opens the same path.
+
+    The kernel drops the lock when its holder exits, so a crashed process
+    never leaves it held.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def acquire(self) -> None:
+        """Block until the lock is held"""
+        if self._fd is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        self._fd = fd
+
+    async def acquire_async(self, poll: float = 0.02) -> None:
+        """Wait for the lock without blocking the event loop; safe to cancel"""
+        while not self.try_acquire():
+            await asyncio.sleep(poll)
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class LeaderElection:
+    """Elects one process among those sharing lock_path to run background jobs"""
+
+    def __init__(self, lock_path: Path, retry: float = 5.0):
+        self.lock = FileLock(lock_path)
+        self.retry = retry
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lock.locked
+
+    def try_acquire(self) -> bool:
+        if self.lock.locked:
+            return True
+        if not self.lock.try_acquire():
+            return False
+        os.ftruncate(self.lock._fd, 0)
+        os.write(self.lock._fd, f"{os.getpid()}\n".encode())
+        logger.info("elected leader pid=%d lock=%s", os.getpid(), self.lock.path)
+        return True
+
+    async def run(self, lead: Callable[[], Awaitable[None]],
+                  follow: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        """Run follow until leadership is won, then lead; a follower takes over when the leader exits.
+
+        lead must only return or raise once every job it started has stopped,
+        since the lock is released right after. If it fails, leadership is
+        given up and contested again after retry seconds.
+        """
+        while True:
+            follower = asyncio.ensure_future(follow()) if follow is not None else None
+            try:
+                while not self.try_acquire():
+                    await asyncio.sleep(self.retry)
+                if follower is not None:
+                    follower.cancel()
+                    await asyncio.gather(follower, return_exceptions=True)
+                await lead()
+                return
+            except Exception:
+                logger.exception("leader jobs failed pid=%d", os.getpid())
+            finally:
+                if follower is not None:
+                    follower.cancel()
+                self.lock.release()
+            await asyncio.sleep(self.retry)
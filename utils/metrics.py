@@ -0,0 +1,349 @@
+import asyncio
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from config import CLUSTER_CONFIG, METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+# (labels, value) samples yielded by collectors
+Sample = Tuple[Dict[str, str], float]
+# Metric name -> {"type", "help", "samples"[, "buckets"]}; histogram samples are (labels, counts, sum)
+Dump = Dict[str, Dict[str, Any]]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float('inf'):
+        return "+Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_metric(name: str, entry: Dict[str, Any]) -> List[str]:
+    lines = [f"# HELP {name} {entry['help']}", f"# TYPE {name} {entry['type']}"]
+    if entry["type"] != "histogram":
+        for labels, value in entry["samples"]:
+            lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return lines
+    bounds = tuple(entry["buckets"]) + (float('inf'),)
+    for labels, counts, total in entry["samples"]:
+        names, values = list(labels), list(labels.values())
+        cumulative = 0
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(names, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(names, values)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(names, values)} {cumulative}")
+    return lines
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labelvalues', 'started')
+
+    def __init__(self, histogram: "Histogram", labelvalues: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+        return False
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str,
+                 labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List:
+        raise NotImplementedError
+
+    def dump(self) -> Dict[str, Any]:
+        return {"type": self.type, "help": self.help, "samples": self.samples()}
+
+    def render(self) -> List[str]:
+        return _format_metric(self.name, self.dump())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(dict(zip(self.labelnames, labelvalues)), value) for labelvalues, value in values]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labelvalues)
+            if counts is None:
+                counts = self._counts[labelvalues] = [0] * (len(self.buckets) + 1)
+                self._sums[labelvalues] = 0.0
+            counts[index] += 1
+            self._sums[labelvalues] += value
+
+    def time(self, *labelvalues: str):
+        """Context manager observing the elapsed wall time of its block"""
+        if not self.registry.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, labelvalues)
+
+    def samples(self) -> List[Tuple[Dict[str, str], List[int], float]]:
+        with self._lock:
+            series = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        return [(dict(zip(self.labelnames, labelvalues)), counts, total) for labelvalues, counts, total in series]
+
+    def dump(self) -> Dict[str, Any]:
+        return {**super().dump(), "buckets": list(self.buckets)}
+
+
+class GaugeCollector(_Metric):
+    """Gauge whose samples are read from a callback at scrape time"""
+    type = "gauge"
+
+    def __init__(self, *args, collect: Callable[[], Iterable[Sample]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.collect = collect
+
+    def samples(self) -> List[Sample]:
+        return list(self.collect())
+
+
+class CounterCollector(GaugeCollector):
+    """Counter whose monotonically increasing totals are read from a callback at scrape time"""
+    type = "counter"
+
+
+def _merge(dumps: List[Tuple[str, Dump, bool]]) -> Dump:
+    """Combine workers' dumps: counters and histograms are summed, gauges get a worker label.
+
+    Totals of workers that exited stay in the sum so counters never go
+    backwards; their gauges are dropped once stale.
+    """
+    merged: Dump = {}
+    for worker, dump, live in dumps:
+        for name, entry in dump.items():
+            target = merged.setdefault(name, {**entry, "samples": {}})
+            for sample in entry["samples"]:
+                labels = sample[0]
+                if entry["type"] == "gauge":
+                    if live:
+                        target["samples"][(worker, *labels.items())] = ({**labels, "worker": worker}, sample[1])
+                    continue
+                key = tuple(labels.items())
+                previous = target["samples"].get(key)
+                if previous is None:
+                    target["samples"][key] = sample
+                elif entry["type"] == "histogram":
+                    counts = [a + b for a, b in zip(previous[1], sample[1])]
+                    target["samples"][key] = (labels, counts, previous[2] + sample[2])
+                else:
+                    target["samples"][key] = (labels, previous[1] + sample[1])
+    for entry in merged.values():
+        entry["samples"] = list(entry["samples"].values())
+    return merged
+
+
+class MetricsRegistry:
+    """Minimal Prometheus registry.
+
+    When disabled, every observe/inc returns after a single attribute check
+    and timers are a shared no-op context manager, so instrumented code
+    pays nothing measurable.
+
+    With a shared directory, every worker publishes its metrics to a file
+    there and a scrape, answered by whichever worker takes the connection,
+    reports all of them merged.
+    """
+
+    def __init__(self, enabled: bool = True, shared_dir: Optional[str] = None,
+                 worker: Optional[str] = None):
+        self.enabled = enabled
+        self.shared_dir = Path(shared_dir) / "metrics" if shared_dir else None
+        self.worker = worker or str(os.getpid())
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help, labelnames, buckets=buckets))
+
+    def gauge_collector(self, name: str, help: str,
+                        collect: Callable[[], Iterable[Sample]]) -> GaugeCollector:
+        """Register a gauge whose samples come from collect() on every scrape"""
+        return self._register(GaugeCollector(self, name, help, collect=collect))
+
+    def counter_collector(self, name: str, help: str,
+                          collect: Callable[[], Iterable[Sample]]) -> CounterCollector:
+        """Register a counter whose totals come from collect() on every scrape; name should end in _total"""
+        return self._register(CounterCollector(self, name, help, collect=collect))
+
+    def dump(self) -> Dump:
+        """Every metric's current samples; cheap, and reads state owned by the event loop"""
+        dump = {}
+        for metric in list(self._metrics.values()):
+            try:
+                dump[metric.name] = metric.dump()
+            except Exception:
+                # A failing collector must not break the whole scrape
+                continue
+        return dump
+
+    def publish(self, dump: Optional[Dump] = None) -> None:
+        """Write this worker's metrics to the shared directory, replacing its previous file"""
+        self.shared_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.shared_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(dump if dump is not None else self.dump()))
+            os.replace(tmp_path, self.shared_dir / f"{self.worker}.json")
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _load_workers(self, own: Dump) -> List[Tuple[str, Dump, bool]]:
+        stale_before = time.time() - 3 * METRICS_CONFIG["PUBLISH_INTERVAL"]
+        dumps = [(self.worker, own, True)]
+        for path in sorted(self.shared_dir.glob("*.json")):
+            if path.stem == self.worker:
+                continue
+            try:
+                dumps.append((path.stem, orjson.loads(path.read_bytes()), path.stat().st_mtime >= stale_before))
+            except (FileNotFoundError, orjson.JSONDecodeError):
+                continue
+        return dumps
+
+    def render(self, dump: Optional[Dump] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4).
+
+        With a shared directory this reads every worker's file, so call it
+        off the event loop with a dump taken on it.
+        """
+        dump = dump if dump is not None else self.dump()
+        if self.shared_dir is not None:
+            self.publish(dump)
+            dump = _merge(self._load_workers(dump))
+        lines = []
+        for name, entry in dump.items():
+            lines.extend(_format_metric(name, entry))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=METRICS_CONFIG["ENABLED"], shared_dir=CLUSTER_CONFIG["SHARED_DIR"])
+
+
+# Hot-path instruments shared across modules
+dse_fetch_seconds = metrics.histogram(
+    "dse_fetch_seconds", "Upstream dsebd.org fetch latency", ["url", "outcome"])
+dse_html_parse_seconds = metrics.histogram(
+    "dse_html_parse_seconds", "Time spent building the HTML tree of a DSE page", ["url"])
+dse_parse_seconds = metrics.histogram(
+    "dse_parse_seconds", "Time spent parsing DSE table rows", ["selector"])
+dse_parse_rows = metrics.histogram(
+    "dse_parse_rows", "Rows parsed per DSE table", ["selector"], buckets=ROW_BUCKETS)
+gmail_request_seconds = metrics.histogram(
+    "gmail_request_seconds", "Gmail API call latency", ["method", "outcome"])
+token_refresh_seconds = metrics.histogram(
+    "token_refresh_seconds", "OAuth token refresh latency", ["outcome"])
+event_loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds", "Delay between scheduled and actual event loop wakeups",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+
+async def publish_metrics(interval: float = METRICS_CONFIG["PUBLISH_INTERVAL"]) -> None:
+    """Keep this worker's metrics file fresh for scrapes other workers answer"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(metrics.publish, metrics.dump())
+        except Exception as e:
+            logger.warning("metrics publish failed error=%s", e)
+
+
+async def monitor_event_loop_lag(interval: Optional[float] = None) -> None:
+    """Measure how late the event loop wakes up from a fixed sleep, forever"""
+    interval = interval or METRICS_CONFIG["EVENT_LOOP_LAG_INTERVAL"]
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag_seconds.observe(max(0.0, loop.time() - started - interval))
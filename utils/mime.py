@@ -0,0 +1,111 @@
+import base64
+import re
+from typing import Dict, Any, List, Optional
+
+from lxml import etree, html
+
+from config import GMAIL_CONFIG
+
+
+_CHARSET_RE = re.compile(r'charset="?([\w.:-]+)"?', re.IGNORECASE)
+_INLINE_SPACE_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+_BLANK_LINES_RE = re.compile(r'\s*\n\s*')
+_HTML_PARSER = html.HTMLParser(remove_comments=True, remove_pis=True)
+
+
+def _get_charset(part: Dict[str, Any]) -> str:
+    """Read charset from the part's Content-Type header, defaulting to utf-8"""
+    for header in part.get('headers', []):
+        if header['name'].lower() == 'content-type':
+            match = _CHARSET_RE.search(header['value'])
+            if match:
+                return match.group(1)
+    return 'utf-8'
+
+
+def decode_part_data(data: str, max_bytes: int, charset: str = 'utf-8') -> str:
+    """Decode base64url body data, decoding at most max_bytes of content.
+
+    Only the prefix of the encoded string needed for max_bytes is sliced off
+    before decoding, so a multi-megabyte body is never copied in full.
+    """
+    max_chars = (max_bytes + 2) // 3 * 4
+    if len(data) > max_chars:
+        data = data[:max_chars]
+    elif len(data) % 4:
+        data += '=' * (-len(data) % 4)
+
+    raw = base64.urlsafe_b64decode(data)[:max_bytes]
+    try:
+        return raw.decode(charset, errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """Cut text to at most max_bytes of UTF-8, dropping a character split at the cut"""
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode('utf-8', errors='ignore')
+
+
+def html_to_text(markup: str) -> str:
+    """Convert an HTML body to plain text, dropping scripts, styles and markup"""
+    if not markup.strip():
+        return ''
+    try:
+        root = html.document_fromstring(markup, parser=_HTML_PARSER)
+    except (etree.ParserError, ValueError):
+        return markup
+
+    etree.strip_elements(root, 'script', 'style', 'head', with_tail=False)
+    for br in root.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+    for block in root.iter('p', 'div', 'tr', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+        block.tail = '\n' + (block.tail or '')
+
+    text = _INLINE_SPACE_RE.sub(' ', root.text_content())
+    return _BLANK_LINES_RE.sub('\n', text).strip()
+
+
+def extract_body(payload: Dict[str, Any], max_bytes: Optional[int] = None) -> str:
+    """Return the readable body of a Gmail ``format='full'`` payload.
+
+    Walks the MIME tree iteratively in document order and stops at the first
+    inline text/plain part. If none exists, the first text/html part is
+    converted to text. Attachments and bodies stored by attachmentId are
+    skipped. Returns '' when the message has no readable body.
+    """
+    if max_bytes is None:
+        max_bytes = GMAIL_CONFIG["MAX_BODY_BYTES"]
+
+    html_part = None
+    stack: List[Dict[str, Any]] = [payload]
+
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            # Reversed so that the first child is visited first
+            stack.extend(reversed(children))
+            continue
+
+        if part.get('filename'):
+            continue
+
+        data = part.get('body', {}).get('data')
+        if not data:
+            continue
+
+        mime_type = part.get('mimeType', '')
+        if mime_type == 'text/plain':
+            return decode_part_data(data, max_bytes, _get_charset(part))
+        if mime_type == 'text/html' and html_part is None:
+            html_part = part
+
+    if html_part is not None:
+        markup = decode_part_data(html_part['body']['data'], max_bytes, _get_charset(html_part))
+        return truncate_utf8(html_to_text(markup), max_bytes)
+
+    return ''
@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Any
+
+from googleapiclient.errors import HttpError
+
+from config import GMAIL_QUOTA_CONFIG
+from utils.metrics import gmail_request_seconds
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking.
+
+    ``reserve`` always takes the requested units, letting the balance go
+    negative, and returns how long the caller must wait before the units
+    are actually available. Concurrent callers therefore queue up behind
+    each other without polling.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, units: float) -> float:
+        """Take units from the bucket and return the seconds to wait for them"""
+        with self._lock:
+            self._refill()
+            self.tokens -= units
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def drain(self) -> None:
+        """Empty the bucket, used when upstream reports we are over quota"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+    def remaining(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+class GmailQuotaLimiter:
+    """Per-user and global Gmail quota budgets with retrying request execution"""
+
+    def __init__(self, method_units: Dict[str, int], user_rate: float, user_burst: float,
+                 global_rate: float, global_burst: float, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 32,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.method_units = method_units
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.sleep = sleep
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self.user_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        self.throttled_seconds = 0.0
+        # A bucket left alone this long is full again and can be dropped
+        self.idle_seconds = user_burst / user_rate
+        self._evicted_at = clock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any] = GMAIL_QUOTA_CONFIG) -> "GmailQuotaLimiter":
+        return cls(
+            method_units=config["METHOD_UNITS"],
+            user_rate=config["USER_UNITS_PER_SECOND"],
+            user_burst=config["USER_BURST"],
+            global_rate=config["GLOBAL_UNITS_PER_SECOND"],
+            global_burst=config["GLOBAL_BURST"],
+            max_retries=config["MAX_RETRIES"],
+            backoff_base=config["BACKOFF_BASE"],
+            backoff_max=config["BACKOFF_MAX"]
+        )
+
+    def _user_bucket(self, user: str) -> TokenBucket:
+        # Caller holds self._lock
+        bucket = self.user_buckets.get(user)
+        if bucket is None:
+            self._evict_idle()
+            bucket = TokenBucket(self.user_rate, self.user_burst, self.clock)
+            self.user_buckets[user] = bucket
+        return bucket
+
+    def _evict_idle(self) -> None:
+        """Drop full buckets; a new bucket for the same user would be identical"""
+        now = self.clock()
+        if now - self._evicted_at < self.idle_seconds:
+            return
+        self._evicted_at = now
+        for user, bucket in list(self.user_buckets.items()):
+            if bucket.remaining() >= bucket.capacity:
+                del self.user_buckets[user]
+
+    def acquire(self, user: str, method: str) -> float:
+        """Block until the user and global budgets allow one call of method"""
+        units = self.method_units.get(method, 1)
+        with self._lock:
+            # Reserved under the lock so the bucket cannot be evicted in between
+            user_wait = self._user_bucket(user).reserve(units)
+        wait = max(user_wait, self.global_bucket.reserve(units))
+        if wait > 0:
+            with self._lock:
+                self.throttled_seconds += wait
+            self.sleep(wait)
+        return wait
+
+    def is_retryable(self, error: HttpError) -> bool:
+        status = error.resp.status
+        if status in RETRYABLE_STATUSES:
+            return True
+        if status == 403:
+            reasons = {detail.get('reason') for detail in (error.error_details or [])
+                       if isinstance(detail, dict)}
+            return bool(reasons & RATE_LIMIT_REASONS)
+        return False
+
+    def _backoff(self, attempt: int, error: HttpError) -> float:
+        retry_after = error.resp.get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: spread retries of concurrent callers over the window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def execute(self, request: Any, user: str, method: str) -> Any:
+        """Execute a googleapiclient request within budget, retrying 429/5xx"""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(user, method)
+            with self._lock:
+                self.calls[method] = self.calls.get(method, 0) + 1
+            started = time.perf_counter()
+            try:
+                response = request.execute()
+                gmail_request_seconds.observe(time.perf_counter() - started, method, "ok")
+                return response
+            except HttpError as error:
+                gmail_request_seconds.observe(time.perf_counter() - started, method, str(error.resp.status))
+                if attempt == self.max_retries or not self.is_retryable(error):
+                    raise
+                with self._lock:
+                    if error.resp.status in (403, 429):
+                        self._user_bucket(user).drain()
+                    self.retries[method] = self.retries.get(method, 0) + 1
+                self.sleep(self._backoff(attempt, error))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Remaining global budget, aggregate per-user budget and call/retry counters.
+
+        Per-user figures are aggregated so no mailbox address is exposed.
+        """
+        with self._lock:
+            self._evict_idle()
+            remaining = [bucket.remaining() for bucket in self.user_buckets.values()]
+            calls, retries, throttled = dict(self.calls), dict(self.retries), self.throttled_seconds
+        return {
+            "global_remaining_units": round(self.global_bucket.remaining(), 2),
+            "user_remaining_units": {
+                "active_users": len(remaining),
+                "min": round(min(remaining), 2) if remaining else self.user_burst,
+                "avg": round(sum(remaining) / len(remaining), 2) if remaining else self.user_burst
+            },
+            "calls": calls,
+            "retries": retries,
+            "throttled_seconds": round(throttled, 3)
+        }
+
+
+gmail_limiter = GmailQuotaLimiter.from_config()
@@ -1,12 +1,115 @@
-from datetime import datetime
-from typing import Dict
-from pyparsing import Any
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from config import COMPRESSION_CONFIG
+from utils.compression import compress, negotiate_encoding
+
+
+# Dhaka Stock Exchange time (Asia/Dhaka, no DST)
+DSE_TIMEZONE = timezone(timedelta(hours=6))
+
+# (second, formatted) as one tuple, so threadpool callers never pair a second with another's text
+_last: Tuple[Optional[int], str] = (None, "")
+
+
+def format_timestamp(epoch: Optional[float] = None) -> str:
+    """ISO-8601 timestamp in DSE time, memoized per second"""
+    global _last
+    second = int(time.time() if epoch is None else epoch)
+    last_second, text = _last
+    if second != last_second:
+        text = datetime.fromtimestamp(second, DSE_TIMEZONE).isoformat()
+        _last = (second, text)
+    return text
 
 
 def api_response(data: Any) -> Dict[str, Any]:
-    timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S+06:00")
     return {
         "success": True,
         "data": data,
-        "timestamp": timestamp
-    }
\ No newline at end of file
+        "timestamp": format_timestamp()
+    }
+
+
+def envelope_bytes(data_bytes: bytes, timestamp: str) -> bytes:
+    """Wrap already-serialized data in the api_response envelope"""
+    return b''.join((
+        b'{"success":true,"data":', data_bytes,
+        b',"timestamp":"', timestamp.encode('ascii'), b'"}'
+    ))
+
+
+def json_response(data: Any) -> Response:
+    """api_response envelope serialized with orjson, bypassing jsonable_encoder"""
+    return Response(
+        content=envelope_bytes(orjson.dumps(data), format_timestamp()),
+        media_type="application/json"
+    )
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a body sent with a content coding; each coding is its own representation"""
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether If-None-Match matches etag or any encoded representation of it"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag == etag or tag.startswith(etag[:-1] + '-'):
+            return True
+    return False
+
+
+async def conditional_response(request: Request, body: bytes, etag: str,
+                               encode: Callable[[str], bytes] = None) -> Response:
+    """Serve body with ETag/304 handling and negotiated compression.
+
+    encode(encoding) returns the compressed body; callers that keep the
+    body around pass a caching function so it is compressed only once.
+    Large bodies are compressed in a worker thread.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(body))
+    headers = {
+        "ETag": representation_etag(etag, encoding),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        encoder = encode if encode is not None else (lambda coding: compress(body, coding))
+        if len(body) >= COMPRESSION_CONFIG["THREAD_MINIMUM_SIZE"]:
+            body = await asyncio.to_thread(encoder, encoding)
+        else:
+            body = encoder(encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def model_response(model: BaseModel, request: Optional[Request] = None) -> Response:
+    """Serialize a pydantic response model directly to bytes"""
+    body = model.model_dump_json().encode()
+    if request is None:
+        return Response(content=body, media_type="application/json")
+    return await conditional_response(request, body, make_etag(body))
@@ -0,0 +1,66 @@
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+
+class RingBuffer:
+    """Fixed-capacity columnar ring buffer backed by preallocated typed arrays.
+
+    Every column is allocated up front, so memory never grows after
+    construction. Appends overwrite the oldest row once the buffer is full
+    and are O(1); the most recent row can be updated in place.
+    """
+
+    __slots__ = ('names', 'capacity', '_columns', '_next', 'count')
+
+    def __init__(self, columns: Sequence[Tuple[str, str]], capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.names = tuple(name for name, _ in columns)
+        self.capacity = capacity
+        self._columns = tuple(array(typecode, [0]) * capacity for _, typecode in columns)
+        self._next = 0
+        self.count = 0
+
+    def append(self, *values) -> None:
+        index = self._next
+        for column, value in zip(self._columns, values):
+            column[index] = value
+        self._next = (index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def _last_index(self) -> int:
+        if not self.count:
+            raise IndexError("ring buffer is empty")
+        return (self._next - 1) % self.capacity
+
+    def last(self) -> Tuple:
+        index = self._last_index()
+        return tuple(column[index] for column in self._columns)
+
+    def update_last(self, *values) -> None:
+        index = self._last_index()
+        for column, value in zip(self._columns, values):
+            column[index] = value
+
+    def clear(self) -> None:
+        self._next = 0
+        self.count = 0
+
+    def columns(self) -> Dict[str, List]:
+        """Column values ordered oldest to newest"""
+        start = (self._next - self.count) % self.capacity
+        result = {}
+        for name, column in zip(self.names, self._columns):
+            if start + self.count <= self.capacity:
+                result[name] = column[start:start + self.count].tolist()
+            else:
+                result[name] = column[start:].tolist() + column[:self._next].tolist()
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * self.capacity for column in self._columns)
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+import orjson
+
+from config import CLUSTER_CONFIG, SNAPSHOT_CONFIG
+from utils.locks import FileLock
+from utils.snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class SharedSnapshots:
+    """DSE snapshots published to a directory every worker reads.
+
+    Each key is one file: a JSON header line with the fetch times followed by
+    the serialized data. Files are replaced atomically, and a reader keeps
+    returning the same Snapshot object while the data is unchanged so its
+    serialized and compressed bodies stay cached.
+    """
+
+    def __init__(self, directory: str, max_entries: int = SNAPSHOT_CONFIG["MAX_ENTRIES"]):
+        self.directory = Path(directory) / "snapshots"
+        self.max_entries = max_entries
+        # Key -> (file identity, snapshot built from it), least recently used first;
+        # every publish makes a new inode
+        self._loaded: "OrderedDict[Tuple, Tuple[Tuple[int, int], Snapshot]]" = OrderedDict()
+
+    def _path(self, key: Tuple) -> Path:
+        name = hashlib.sha256(repr(key).encode()).hexdigest()[:24]
+        return self.directory / f"{name}.snap"
+
+    def lock(self, key: Tuple) -> FileLock:
+        """Lock held by the worker refreshing key, so only one fetches upstream"""
+        return FileLock(self._path(key).with_suffix(".lock"))
+
+    def publish(self, key: Tuple, snapshot: Snapshot) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header = orjson.dumps({"created_at": snapshot.created_at, "checked_at": snapshot.checked_at})
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header + b"\n" + snapshot.data_bytes)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        stat = self._path(key).stat()
+        self._remember(key, (stat.st_ino, stat.st_mtime_ns), snapshot)
+
+    def _remember(self, key: Tuple, identity: Tuple[int, int], snapshot: Snapshot) -> None:
+        self._loaded[key] = (identity, snapshot)
+        self._loaded.move_to_end(key)
+        while len(self._loaded) > self.max_entries:
+            self._loaded.popitem(last=False)
+
+    def load(self, key: Tuple) -> Optional[Snapshot]:
+        """Latest published snapshot of key, or None if none was published"""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        loaded = self._loaded.get(key)
+        if loaded is not None and loaded[0] == identity:
+            self._loaded.move_to_end(key)
+            return loaded[1]
+
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                identity = (stat.st_ino, stat.st_mtime_ns)
+                header = orjson.loads(f.readline())
+                data_bytes = f.read()
+        except FileNotFoundError:
+            return None
+        if loaded is not None and loaded[1].created_at == header["created_at"]:
+            # Upstream was checked again but the data did not change
+            snapshot = loaded[1]
+        else:
+            snapshot = Snapshot(orjson.loads(data_bytes), data_bytes, header["created_at"])
+        snapshot.checked_at = max(snapshot.checked_at, header["checked_at"])
+        self._remember(key, identity, snapshot)
+        return snapshot
+
+    def prune(self, max_age: float = CLUSTER_CONFIG["SNAPSHOT_MAX_AGE"]) -> int:
+        """Delete snapshots not published for max_age seconds, with their locks; returns files removed.
+
+        Pages nobody requests any more, e.g. old historical ranges, would
+        otherwise stay on disk for good. A lock is only removed while this
+        process holds it, so a worker refreshing the key keeps its lock file.
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        for path in self.directory.glob("*"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                if path.suffix == ".lock":
+                    snap = path.with_suffix(".snap")
+                    if snap.exists() and snap.stat().st_mtime >= cutoff:
+                        continue
+                    lock = FileLock(path)
+                    if not lock.try_acquire():
+                        continue
+                    try:
+                        path.unlink()
+                    finally:
+                        lock.release()
+                else:
+                    path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def prune_forever(self, interval: float = CLUSTER_CONFIG["PRUNE_INTERVAL"],
+                            max_age: float = CLUSTER_CONFIG["SNAPSHOT_MAX_AGE"]) -> None:
+        """Prune stale snapshot files every interval seconds; run by the leader"""
+        while True:
+            try:
+                removed = await asyncio.to_thread(self.prune, max_age)
+                if removed:
+                    logger.info("shared snapshots pruned files=%d", removed)
+            except Exception as e:
+                logger.warning("shared snapshot prune failed error=%s", e)
+            await asyncio.sleep(interval)
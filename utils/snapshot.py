@@ -0,0 +1,70 @@
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from utils.compression import compress
+from utils.response import conditional_response, envelope_bytes, format_timestamp, make_etag
+
+
+class Snapshot:
+    """Immutable result of one upstream fetch plus its lazily serialized forms.
+
+    A snapshot is only replaced when the upstream data actually changes, so
+    the serialized response body is computed once and shared by every
+    request that reads the same data.
+    """
+
+    __slots__ = ('data', 'data_bytes', 'created_at', 'checked_at', 'source', '_body',
+                 '_etag', '_encoded')
+
+    def __init__(self, data: Any, data_bytes: Optional[bytes] = None,
+                 created_at: Optional[float] = None, source: Optional["Snapshot"] = None):
+        self.data = data
+        self.data_bytes = data_bytes if data_bytes is not None else orjson.dumps(data)
+        self.created_at = created_at if created_at is not None else time.time()
+        # Last time upstream was checked; equals created_at until a refresh finds no change
+        self.checked_at = self.created_at
+        # Snapshot this one was derived from, e.g. a symbol filter over a full page
+        self.source = source
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._encoded: Dict[str, bytes] = {}
+
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.created_at)
+
+    @property
+    def body(self) -> bytes:
+        """api_response envelope bytes, serialized on first use"""
+        if self._body is None:
+            self._body = envelope_bytes(self.data_bytes, self.timestamp)
+        return self._body
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag of the identity body, computed once"""
+        if self._etag is None:
+            self._etag = make_etag(self.body)
+        return self._etag
+
+    def encoded(self, encoding: str) -> bytes:
+        """Body compressed with encoding, compressed once per snapshot"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+            self._encoded[encoding] = body
+        return body
+
+    def is_fresh(self, ttl: float, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) - self.checked_at < ttl
+
+
+async def snapshot_response(snapshot: Snapshot, request: Optional[Request] = None) -> Response:
+    """Serve a snapshot's pre-serialized envelope, with ETag/304 and compression"""
+    if request is None:
+        return Response(content=snapshot.body, media_type="application/json")
+    return await conditional_response(request, snapshot.body, snapshot.etag, snapshot.encoded)
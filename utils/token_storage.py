@@ -1,13 +1,17 @@
 import json
 import hashlib
+import os
+import tempfile
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from utils.locks import FileLock
+
 
 class TokenStorage:
     def __init__(self, storage_dir: str = "tokens"):
+        # Created on first save so read-only workers never touch the filesystem
         self.storage_dir = Path(storage_dir)
-        self.storage_dir.mkdir(exist_ok=True)
     
     def _get_user_hash(self, user_email: str) -> str:
         """Create a hash of user email for filename"""
@@ -20,6 +24,7 @@ class TokenStorage:
     
     def save_token(self, user_email: str, token_data: Dict[str, Any]) -> None:
         """Save user token to file"""
+        self.storage_dir.mkdir(exist_ok=True)
         token_file = self._get_token_file_path(user_email)
         
         # Add user email to token data for reference
@@ -28,8 +33,20 @@ class TokenStorage:
             "user_email": user_email
         }
         
-        with open(token_file, 'w') as f:
-            json.dump(token_data_with_user, f, indent=2)
+        # Written to a temporary file and swapped in, so readers in other
+        # workers never see a partially written token
+        fd, tmp_path = tempfile.mkstemp(dir=self.storage_dir, prefix=".token_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(token_data_with_user, f, indent=2)
+            os.replace(tmp_path, token_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    def lock(self, user_email: str) -> FileLock:
+        """Lock serializing token refreshes for one user across workers"""
+        return FileLock(self.storage_dir / f".token_{self._get_user_hash(user_email)}.lock")
     
     def load_token(self, user_email: str) -> Optional[Dict[str, Any]]:
         """Load user token from file"""